@@ -1,5 +1,41 @@
 from django.contrib import admin
-from .models import HouseScore, UserProfile
+from django.contrib.auth import forms
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 
+from .models import HouseScore, LoginEmail, UserProfile
+
+
+class UniqueEmailMixin:
+    """Refuse an email another account already logs in with (see ``LoginEmail``)."""
+
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email and LoginEmail.is_taken(email, exclude_user_id=self.instance.pk):
+            raise ValidationError("This email is already used by another account.")
+        return email
+
+
+class UserChangeForm(UniqueEmailMixin, forms.UserChangeForm):
+    pass
+
+
+class UserCreationForm(UniqueEmailMixin, forms.UserCreationForm):
+
+    class Meta(forms.UserCreationForm.Meta):
+        fields = ('username', 'email')
+
+
+class LoginEmailUserAdmin(UserAdmin):
+    form = UserChangeForm
+    add_form = UserCreationForm
+    add_fieldsets = (
+        (None, {'classes': ('wide',), 'fields': ('username', 'email', 'password1', 'password2')}),
+    )
+
+
+admin.site.unregister(User)
+admin.site.register(User, LoginEmailUserAdmin)
 admin.site.register(HouseScore)
-admin.site.register(UserProfile)
\ No newline at end of file
+admin.site.register(UserProfile)
@@ -0,0 +1,26 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the claims of a validated access token.
+
+    The signature and expiry are checked as usual, but the user is not read from
+    the database: ``request.user`` is a ``ClaimsUser`` that loads its fields only
+    if the view reads them.
+    """
+
+    def get_user(self, validated_token):
+        # Import tardif : les réglages DRF importent cette classe pendant le chargement des modèles
+        from .models import ClaimsUser
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # La révocation compare le hachage du mot de passe : il faut la ligne utilisateur
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return ClaimsUser.from_claims(user_id)
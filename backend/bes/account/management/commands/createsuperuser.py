@@ -0,0 +1,27 @@
+import os
+
+from django.contrib.auth.management.commands import createsuperuser
+from django.core.management.base import CommandError
+
+from account.models import LoginEmail
+
+EMAIL_TAKEN = "This email is already used by another account."
+
+
+class Command(createsuperuser.Command):
+    """``createsuperuser`` refusing an email another account already logs in with."""
+
+    def handle(self, *args, **options):
+        email = options.get('email')
+        if not email and not options['interactive']:
+            email = os.environ.get('DJANGO_SUPERUSER_EMAIL')
+        if email and LoginEmail.is_taken(email):
+            raise CommandError(EMAIL_TAKEN)
+        return super().handle(*args, **options)
+
+    def get_input_data(self, field, message, default=None):
+        value = super().get_input_data(field, message, default)
+        if field.name == 'email' and value and LoginEmail.is_taken(value):
+            self.stderr.write(f"Error: {EMAIL_TAKEN}")
+            return None
+        return value
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_login_emails(apps, schema_editor):
+    """
+    Copy the users' emails into the unique login table.
+
+    Emails shared by several accounts (ignoring case) cannot be made unique
+    automatically: the migration stops and lists them, to be fixed by hand.
+    """
+    User = apps.get_model('auth', 'User')
+    LoginEmail = apps.get_model('account', 'LoginEmail')
+    users_by_email = {}
+    for user_id, email in User.objects.order_by('id').values_list('id', 'email').iterator():
+        email = (email or '').strip().lower()
+        if email:
+            users_by_email.setdefault(email, []).append(user_id)
+
+    duplicates = {email: user_ids for email, user_ids in users_by_email.items() if len(user_ids) > 1}
+    if duplicates:
+        raise RuntimeError(
+            "Several accounts use the same email, make them unique before migrating:\n" + "\n".join(
+                f"  {email}: users {', '.join(map(str, user_ids))}" for email, user_ids in sorted(duplicates.items())
+            )
+        )
+    LoginEmail.objects.bulk_create(
+        [LoginEmail(email=email, user_id=user_ids[0]) for email, user_ids in users_by_email.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('account', '0004_claimsuser'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='login_email', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(fill_login_emails, migrations.RunPython.noop),
+    ]
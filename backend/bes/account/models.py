@@ -1,9 +1,14 @@
 # bes/account/models.py
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from housework.models import House
 from django.conf import settings
+import logging
 import os
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
 
 class HouseScore(models.Model):
     """
@@ -44,4 +49,117 @@ class UserProfile(models.Model):
     is_active = models.BooleanField(default=True)  # Ajout du champ is_active
 
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return self.user.username
+
+
+class ClaimsUser(User):
+    """
+    User built from the claims of a validated access token, without a database query.
+
+    Only the primary key is loaded. The other fields are read the first time a
+    view touches one of them, from a short-lived cache shared by the workers or,
+    on a miss, with a single query for all of them.
+
+    The token is trusted for its lifetime: a user deactivated or deleted meanwhile
+    keeps access until it expires (``ACCESS_TOKEN_LIFETIME``).
+    """
+    CACHE_KEY = 'account:user:{user_id}'
+    # Le hachage du mot de passe ne va jamais dans le cache
+    UNCACHED_FIELDS = ('password',)
+
+    class Meta:
+        proxy = True
+
+    @staticmethod
+    def from_claims(user_id):
+        """Return a user holding only its primary key, every other field deferred."""
+        return ClaimsUser.from_db(router.db_for_read(User), ['id'], [int(user_id)])
+
+    @staticmethod
+    def invalidate(user_ids):
+        cache.delete_many([ClaimsUser.CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if from_queryset is not None or fields is None or not set(fields) <= deferred:
+            return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+        # Premier accès à un champ différé : tous les champs sont chargés d'un coup
+        key = ClaimsUser.CACHE_KEY.format(user_id=self.pk)
+        values = cache.get(key)
+        if values is None:
+            loaded = [field.attname for field in self._meta.concrete_fields if field.attname in deferred]
+            super().refresh_from_db(using=using, fields=loaded)
+            values = {
+                field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+                if field.attname not in ClaimsUser.UNCACHED_FIELDS
+            }
+            cache.set(key, values, getattr(settings, 'ACCOUNT_USER_CACHE_TIMEOUT', 60))
+            return
+
+        for attname, value in values.items():
+            if attname in deferred:
+                setattr(self, attname, value)
+        if not set(fields) <= set(values):
+            super().refresh_from_db(using=using, fields=[name for name in fields if name not in values])
+
+
+class LoginEmail(models.Model):
+    """
+    Unique, indexed login email of a user.
+
+    ``auth.User.email`` is neither unique nor indexed and cannot be altered from
+    this app: logins look the user up here instead. Kept in sync when users are
+    saved (see ``account.signals``).
+
+    :param email: The normalized (trimmed, lower case) email address.
+    :param user: The user who logs in with it.
+    :type email: models.EmailField
+    :type user: models.OneToOneField
+    """
+    email = models.EmailField(unique=True)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='login_email')
+
+    def __str__(self):
+        return self.email
+
+    @staticmethod
+    def normalize(email):
+        return (email or '').strip().lower()
+
+    @staticmethod
+    def is_taken(email, exclude_user_id=None):
+        """Tell if another user already logs in with this email."""
+        return LoginEmail.objects.filter(email=LoginEmail.normalize(email)).exclude(user_id=exclude_user_id).exists()
+
+    @staticmethod
+    def sync(user, created=False):
+        """
+        Store the login email of a user, or remove it when the user has no email.
+
+        Forms and serializers refuse an email another account logs in with. When
+        one gets through anyway (``create_user`` in a shell, a concurrent
+        registration), the user is saved without a login email rather than
+        failing: they cannot log in by email until it is changed.
+
+        :return: Whether the user logs in with their email.
+        """
+        email = LoginEmail.normalize(user.email)
+        if email:
+            try:
+                # Point de sauvegarde dans une transaction : le conflit ne doit pas annuler la transaction appelante
+                with transaction.atomic() if transaction.get_connection().in_atomic_block else nullcontext():
+                    if created or not LoginEmail.objects.filter(user_id=user.pk).update(email=email):
+                        LoginEmail.objects.create(user_id=user.pk, email=email)
+                return True
+            except IntegrityError:
+                logger.warning("User %s saved without login email: %s is used by another account", user.pk, email)
+        if not created:
+            LoginEmail.objects.filter(user_id=user.pk).delete()
+        return False
+
+    @staticmethod
+    def find_user(email):
+        """Return the user who logs in with ``email``, in one indexed query, or None."""
+        login_email = LoginEmail.objects.select_related('user').filter(email=LoginEmail.normalize(email)).first()
+        return login_email.user if login_email else None
@@ -1,7 +1,8 @@
 # bes/account/serializers.py
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import HouseScore, UserProfile, House
+from .models import HouseScore, LoginEmail, UserProfile, House
+from housework.serializers import VariantUrlsField
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.core.exceptions import ValidationError
@@ -10,6 +11,13 @@ from django.contrib.auth.password_validation import validate_password
 
 
 
+def validate_unique_email(serializer, value):
+    """Refuse an email another account already logs in with."""
+    if LoginEmail.is_taken(value, exclude_user_id=getattr(serializer.instance, 'pk', None)):
+        raise serializers.ValidationError("This email is already used by another account.")
+    return value
+
+
 # Serializer pour le modèle HouseScore
 class HouseScoreSerializer(serializers.ModelSerializer):
     class Meta:
@@ -39,6 +47,9 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'password']
 
+    def validate_email(self, value):
+        return validate_unique_email(self, value)
+
     def create(self, validated_data):
         user = User.objects.create_user(
             username=validated_data['username'],
@@ -55,18 +66,18 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         email = attrs.get("email", "")
         password = attrs.get("password", "")
 
-        print(f"Received email: {email}, password: {password}")  # Cette ligne pour déboguer
-
-        user = User.objects.filter(email=email).first()
-        if user and user.check_password(password):
+        user = LoginEmail.find_user(email)
+        if user is None:
+            # Même coût de hachage qu'un compte existant : le temps de réponse ne révèle pas les emails inscrits
+            User().set_password(password)
+        elif user.check_password(password):
             refresh = RefreshToken.for_user(user)
             return {
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),
                 "user_id": user.id,
             }
-        else:
-            raise serializers.ValidationError("Invalid email or password")
+        raise serializers.ValidationError("Invalid email or password")
 
 # Serialiseur de changement de password
 class ChangePasswordSerializer(serializers.ModelSerializer):
@@ -77,6 +88,9 @@ class ChangePasswordSerializer(serializers.ModelSerializer):
         model = User
         fields = ['username', 'email', 'password']
 
+    def validate_email(self, value):
+        return validate_unique_email(self, value)
+
     def update(self, instance, validated_data):
         instance.username = validated_data.get('username', instance.username)
         instance.email = validated_data.get('email', instance.email)
@@ -98,15 +112,19 @@ class UserDetailsSerializer(serializers.ModelSerializer):
         source='house_set'
     )
     avatar = serializers.CharField(source='profile.avatar', allow_blank=True, required=False)
+    avatarUrls = VariantUrlsField(source='profile.avatar')
 
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'password', 'isActive', 'hearths', 'avatar')
+        fields = ('id', 'username', 'email', 'password', 'isActive', 'hearths', 'avatar', 'avatarUrls')
         extra_kwargs = {
             'username': {'required': False},
             'password': {'write_only': True, 'required': False},
         }
 
+    def validate_email(self, value):
+        return validate_unique_email(self, value)
+
     # def to_representation(self, instance):
     #     """Manipulate data representation based on the context."""
     #     ret = super().to_representation(instance)
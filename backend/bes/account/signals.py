@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ClaimsUser, LoginEmail
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def user_changed(sender, instance, **kwargs):
+    """Drop the cached fields of a modified or deleted user."""
+    ClaimsUser.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the unique login email in sync with ``User.email``."""
+    if update_fields is not None and 'email' not in update_fields:
+        return
+    LoginEmail.sync(instance, created)
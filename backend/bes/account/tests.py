@@ -1,3 +1,286 @@
-from django.test import TestCase
+import importlib
+import io
+import os
+import tempfile
+import unittest
+from types import ModuleType
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+import bes.urls
+from housework.testing import HouseTestCase
+
+from .models import ClaimsUser, LoginEmail, UserProfile
+from .throttling import FixedWindowRateThrottle
+
+
+class UserSharedHouseProfilesTests(HouseTestCase):
+    possible_task = False
+
+    def setUp(self):
+        super().setUp()
+        self.stranger = User.objects.create_user('mallory')
+
+    def add_members(self, count):
+        members = []
+        for index in range(count):
+            member = User.objects.create_user(f'member-{len(members)}-{index}-{User.objects.count()}')
+            UserProfile.objects.create(user=member, avatar=f'avatar-{member.id}.png')
+            self.house.hearthUsers.add(member)
+            members.append(member)
+        return members
+
+    def post(self, user_ids):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/account/user/profiles/get_avatars/', {'user_ids': user_ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_only_users_sharing_a_house_are_returned(self):
+        member, = self.add_members(1)
+        data, _ = self.post([member.id, self.stranger.id])
+        self.assertEqual(data, [{'id': member.id, 'name': member.username, 'avatar': f'avatar-{member.id}.png',
+                                 'avatarUrls': None}])
+
+    def test_query_count_does_not_depend_on_the_number_of_ids(self):
+        _, few = self.post([member.id for member in self.add_members(2)])
+        _, many = self.post([member.id for member in self.add_members(50)])
+        self.assertEqual(few, many)
+
+
+class ClaimsJWTAuthenticationTests(HouseTestCase):
+    possible_task = False
+
+    def setUp(self):
+        super().setUp()
+        UserProfile.objects.create(user=self.user, avatar='alice.png')
+        # Authentification par le jeton, sans forcer l'utilisateur
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def user_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries if query['sql'].startswith('SELECT "auth_user"')]
+
+    def test_authentication_does_not_read_the_user(self):
+        self.assertEqual(self.user_queries('/housework/api/houses/'), [])
+
+    def test_user_fields_are_loaded_once_then_cached(self):
+        self.assertEqual(len(self.user_queries('/account/user/self/')), 1)
+        self.assertEqual(self.user_queries('/account/user/self/'), [])
+
+        self.user.email = 'new@example.com'
+        self.user.save()
+        self.assertEqual(len(self.user_queries('/account/user/self/')), 1)
+        self.assertEqual(self.client.get('/account/user/self/').data['email'], 'new@example.com')
+
+    def test_claims_user_is_a_user(self):
+        user = ClaimsUser.from_claims(self.user.id)
+        self.assertEqual(user.get_deferred_fields(), {
+            field.attname for field in User._meta.concrete_fields if field.attname != 'id'
+        })
+        self.assertEqual(user.username, 'alice')
+        self.assertEqual(user.get_deferred_fields(), set())
+
+        # Depuis le cache, sans le hachage du mot de passe
+        user = ClaimsUser.from_claims(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.email, 'alice@example.com')
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('password'))
+        self.assertTrue(self.house.hearthUsers.filter(pk=user.pk).exists())
+        self.assertEqual(UserProfile.objects.get(user=user), self.user.profile)
+
+    def test_updating_the_authenticated_user_refreshes_the_caches(self):
+        house_etag = self.client.get(f'/housework/api/house/{self.house.id}/')['ETag']
+        self.client.get('/account/user/self/')
+        response = self.client.patch('/account/user/update/', {'username': 'alicia'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/account/user/self/').data['username'], 'alicia')
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('password'))
+        self.assertNotEqual(self.client.get(f'/housework/api/house/{self.house.id}/')['ETag'], house_etag)
+
+
+class LoginTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Horloge figée : le test ne doit pas changer de fenêtre de limitation en cours de route
+        timer = mock.patch.object(FixedWindowRateThrottle, 'timer', lambda throttle: 1_000_000.0)
+        timer.start()
+        self.addCleanup(timer.stop)
+        self.user = User.objects.create_user('alice', 'Alice@Example.com', 'password')
+        self.client = APIClient()
+
+    def login(self, email, password='password', **extra):
+        return self.client.post('/account/login/', {'email': email, 'password': password}, format='json', **extra)
+
+    def test_login_uses_one_indexed_query(self):
+        with self.assertNumQueries(1):
+            response = self.login(' alice@example.COM')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user_id'], self.user.id)
+        self.assertEqual(self.login('alice@example.com', 'wrong').status_code, 400)
+
+    def test_unknown_email_still_hashes_the_password(self):
+        with mock.patch('django.contrib.auth.base_user.make_password') as make_password:
+            response = self.login('nobody@example.com')
+        self.assertEqual(response.status_code, 400)
+        make_password.assert_called_once_with('password')
+
+    def test_login_email_follows_the_user_email(self):
+        self.user.email = 'alicia@example.com'
+        self.user.save()
+        self.assertEqual(self.login('alice@example.com').status_code, 400)
+        self.assertEqual(self.login('alicia@example.com').status_code, 200)
+
+        response = self.client.post('/account/user/register/', {
+            'username': 'bob', 'email': 'ALICIA@example.com', 'password': 'password',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.data)
+
+    def test_throttled_attempts_are_rejected_before_hashing(self):
+        for _ in range(10):
+            self.login('alice@example.com', 'wrong', REMOTE_ADDR='10.0.0.1')
+        with mock.patch('django.contrib.auth.base_user.check_password') as check_password:
+            response = self.login('alice@example.com', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        check_password.assert_not_called()
+        self.assertEqual(self.login('bob@example.com', REMOTE_ADDR='10.0.0.2').status_code, 400)
+
+    @override_settings(REST_FRAMEWORK=dict(
+        settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={'login_ip': '3/min', 'login_account': None},
+    ))
+    def test_attempts_are_limited_per_ip(self):
+        for index in range(3):
+            self.assertEqual(self.login(f'user-{index}@example.com', REMOTE_ADDR='10.0.0.1').status_code, 400)
+        self.assertEqual(self.login('alice@example.com', REMOTE_ADDR='10.0.0.1').status_code, 429)
+        self.assertEqual(self.login('alice@example.com', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_emails_differing_by_case_do_not_fail(self):
+        with self.assertLogs('account.models', 'WARNING'):
+            other = User.objects.create_user('bob', 'ALICE@example.com', 'password')
+        self.assertFalse(LoginEmail.objects.filter(user=other).exists())
+        self.assertEqual(self.login('alice@example.com').data['user_id'], self.user.id)
+        other.email = 'bob@example.com'
+        other.save()
+        self.assertEqual(self.login('bob@example.com').data['user_id'], other.id)
+
+        with self.assertRaisesMessage(CommandError, 'already used by another account'):
+            call_command('createsuperuser', username='root', email='alice@EXAMPLE.com', interactive=False)
+        self.assertFalse(User.objects.filter(username='root').exists())
+
+    @unittest.skipUnless(apps.is_installed('django.contrib.admin'), "admin removed by the lean profile")
+    def test_admin_forms_refuse_a_taken_email(self):
+        from .admin import UserChangeForm, UserCreationForm
+
+        form = UserCreationForm({'username': 'bob', 'email': 'Alice@example.com',
+                                 'password1': 'Kq8!vLm2#p', 'password2': 'Kq8!vLm2#p'})
+        self.assertIn('email', form.errors)
+        bob = User.objects.create_user('bob', 'bob@example.com')
+        form = UserChangeForm({'username': 'bob', 'email': ' alice@example.com', 'date_joined': bob.date_joined},
+                              instance=bob)
+        self.assertIn('email', form.errors)
+
+    def test_migration_refuses_duplicate_emails(self):
+        migration = importlib.import_module('account.migrations.0005_loginemail')
+        User.objects.bulk_create([User(username='alice2', email='alice@example.com')])
+        LoginEmail.objects.all().delete()
+        with self.assertRaisesMessage(RuntimeError, 'alice@example.com: users'):
+            migration.fill_login_emails(apps, None)
+
+
+def image_upload(color='red', size=(300, 200), image_format='PNG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    return SimpleUploadedFile(f'image.{image_format.lower()}', buffer.getvalue())
+
+
+class AvatarUploadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = directory.name
+        media_settings = override_settings(MEDIA_ROOT=self.media_root, MEDIA_IMAGE_SIZES=[64, 256])
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/account/user/profile/avatar/', {'image': image}, format='multipart')
+
+    def test_upload_stores_square_content_hashed_variants(self):
+        response = self.upload(image_upload())
+        self.assertEqual(response.status_code, 200)
+        name = response.data['avatar']
+        self.assertRegex(name, rf'^user_{self.user.id}/[0-9a-f]{{16}}$')
+        self.assertEqual(response.data['avatarUrls'], {'64': f'/media/{name}-64.webp', '256': f'/media/{name}-256.webp'})
+        for size in (64, 256):
+            with Image.open(os.path.join(self.media_root, f'{name}-{size}.webp')) as variant:
+                self.assertEqual((variant.format, variant.size), ('WEBP', (size, size)))
+        self.assertEqual(UserProfile.objects.get(user=self.user).avatar, name)
+        self.assertEqual(self.client.get('/account/user/self/').data['avatarUrls'], response.data['avatarUrls'])
+
+        # Même image : mêmes noms ; nouvelle image : les anciennes variantes sont supprimées
+        self.assertEqual(self.upload(image_upload()).data['avatar'], name)
+        other = self.upload(image_upload('blue', image_format='JPEG')).data['avatar']
+        self.assertNotEqual(other, name)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root, f'user_{self.user.id}'))),
+                         sorted(f'{other.split("/")[1]}-{size}.webp' for size in (64, 256)))
+
+    def test_invalid_uploads_are_rejected(self):
+        self.assertEqual(self.upload(SimpleUploadedFile('image.png', b'not an image')).status_code, 400)
+        with override_settings(MEDIA_UPLOAD_MAX_SIZE=10):
+            self.assertEqual(self.upload(image_upload()).status_code, 400)
+        with override_settings(MEDIA_IMAGE_MAX_PIXELS=100):
+            self.assertEqual(self.upload(image_upload()).status_code, 400)
+        self.assertFalse(os.listdir(self.media_root))
+
+    def test_variants_are_served_immutable_or_handed_to_the_web_server(self):
+        name = self.upload(image_upload()).data['avatar']
+        url = f'/media/{name}-64.webp'
+        # Sans DEBUG ni MEDIA_ACCEL, la route n'est pas déclarée : le serveur frontal sert MEDIA_ROOT
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        media_urlconf = ModuleType('media_urls')
+        media_urlconf.urlpatterns = bes.urls.urlpatterns + bes.urls.media_urlpatterns
+        urlconf = override_settings(ROOT_URLCONF=media_urlconf)
+        urlconf.enable()
+        self.addCleanup(urlconf.disable)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+        with override_settings(MEDIA_ACCEL='nginx'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{name}-64.webp')
+        self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_ACCEL='sendfile'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, f'{name}-64.webp'))
+
+        self.assertEqual(self.client.get('/media/missing.webp').status_code, 404)
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
 
-# Create your tests here.
@@ -0,0 +1,68 @@
+import hashlib
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .models import LoginEmail
+
+
+class FixedWindowRateThrottle(SimpleRateThrottle):
+    """
+    Rate throttle counting requests per fixed time window in the cache.
+
+    The counter lives in the default cache, shared by the workers. With Redis
+    or Memcached its ``incr`` is atomic and concurrent attempts are all counted,
+    which the timestamp list of ``SimpleRateThrottle`` does not ensure.
+    A rate set to ``None`` disables the throttle.
+    """
+
+    def get_rate(self):
+        # Lu à chaque requête (et non figé à l'import) pour suivre les réglages
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        window = int(self.timer() // self.duration)
+        self.window_end = (window + 1) * self.duration
+        key = f'{key}_{window}'
+        self.cache.add(key, 0, self.duration)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # Fenêtre expirée entre add et incr
+            self.cache.add(key, 1, self.duration)
+            count = 1
+        return count <= self.num_requests
+
+    def wait(self):
+        return max(self.window_end - self.timer(), 0)
+
+
+class LoginIPThrottle(FixedWindowRateThrottle):
+    """Login attempts per client IP address."""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginAccountThrottle(FixedWindowRateThrottle):
+    """Login attempts per account (the requested email), whatever the client address."""
+    scope = 'login_account'
+
+    def get_cache_key(self, request, view):
+        email = LoginEmail.normalize(request.data.get('email') if hasattr(request.data, 'get') else '')
+        if not email:
+            return None
+        # Pas d'adresse email en clair dans les clés du cache
+        ident = hashlib.sha256(email.encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
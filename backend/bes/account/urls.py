@@ -1,18 +1,22 @@
 from django.urls import path
-from .views import CustomTokenObtainPairView, UserCreateView, UserProfileDetailView, UserSharedHouseProfiles,UserUpdateView, CurrentUserView, csrf, UserProfileCreateView, UserProfileUpdateView
-from rest_framework_simplejwt.views import TokenRefreshView
+
+from bes.lazy import lazy_view
+
+# Vues importées à leur première requête (voir bes.lazy)
+views = 'account.views.'
 
 
 
 urlpatterns = [
-    path('csrf/', csrf, name='csrf-token'),
-    path('login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('user/register/', UserCreateView.as_view(), name='user-register'),
-    path('user/update/', UserUpdateView.as_view(), name='user-update'),
-    path('user/self/', CurrentUserView.as_view(), name='current-user'),
-    path('user/<int:pk>/', UserProfileDetailView.as_view(), name='user-profile-detail'),
-    path('user/profile/create/', UserProfileCreateView.as_view(), name='create-user-profile'),
-    path('user/profile/update/', UserProfileUpdateView.as_view(), name='update-user-profile'),
-    path('user/profiles/get_avatars/' , UserSharedHouseProfiles.as_view(), name='get-user-avatars-and-names'),
+    path('csrf/', lazy_view(views + 'csrf'), name='csrf-token'),
+    path('login/', lazy_view(views + 'CustomTokenObtainPairView'), name='token_obtain_pair'),
+    path('token/refresh/', lazy_view('rest_framework_simplejwt.views.TokenRefreshView'), name='token_refresh'),
+    path('user/register/', lazy_view(views + 'UserCreateView'), name='user-register'),
+    path('user/update/', lazy_view(views + 'UserUpdateView'), name='user-update'),
+    path('user/self/', lazy_view(views + 'CurrentUserView'), name='current-user'),
+    path('user/<int:pk>/', lazy_view(views + 'UserProfileDetailView'), name='user-profile-detail'),
+    path('user/profile/create/', lazy_view(views + 'UserProfileCreateView'), name='create-user-profile'),
+    path('user/profile/update/', lazy_view(views + 'UserProfileUpdateView'), name='update-user-profile'),
+    path('user/profile/avatar/', lazy_view(views + 'UserAvatarView'), name='upload-avatar'),
+    path('user/profiles/get_avatars/' , lazy_view(views + 'UserSharedHouseProfiles'), name='get-user-avatars-and-names'),
 ]
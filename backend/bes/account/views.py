@@ -1,3 +1,4 @@
+import functools
 from venv import logger
 from rest_framework import viewsets, status
 
@@ -7,12 +8,15 @@ from .serializers import ChangePasswordSerializer, CustomTokenObtainPairSerializ
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.decorators import api_view, permission_classes, action
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt, csrf_protect
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import ClaimsJWTAuthentication
+from .throttling import LoginAccountThrottle, LoginIPThrottle
+from bes import media
 from django.contrib.auth.models import User
 from django.middleware.csrf import get_token
 from django.http import Http404, JsonResponse
@@ -53,6 +57,35 @@ class UserProfileUpdateView(generics.UpdateAPIView):
             logger.error(f"Multiple profiles found for user {self.request.user.id}!")
             raise Http404("Plusieurs profils trouvés pour un utilisateur unique. Contactez l'assistance.")
 
+class UserAvatarView(APIView):
+    """
+    Upload the avatar of the authenticated user, stored as pre-resized variants.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        """
+        Handle POST request with the ``image`` file of the avatar.
+
+        :param request: The HTTP request object, a multipart form with an ``image`` file.
+        :return: A JSON response with the avatar name and the URL of each variant.
+        """
+        upload = request.FILES.get('image')
+        if upload is None:
+            return Response({"error": "No image provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile, created = UserProfile.objects.get_or_create(user=request.user)
+        try:
+            name = media.store_image(upload, functools.partial(UserProfile.user_directory_path, profile))
+        except media.ImageError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        media.replace_image(profile.avatar, name)
+        profile.avatar = name
+        profile.save(update_fields=['avatar'])
+        return Response({'avatar': name, 'avatarUrls': media.variant_urls(name)})
+
 # VueSet pour gérer les HouseScores
 class HouseScoreViewSet(viewsets.ModelViewSet):
     queryset = HouseScore.objects.all()
@@ -80,7 +113,13 @@ class UserProfileDetailView(generics.RetrieveAPIView):
 
     def get_queryset(self):
         # Filtrer les utilisateurs selon la relation House pour s'assurer de retourner les utilisateurs partageant le même 'house' que le requérant
-        users_in_common_houses = User.objects.filter(house__in=self.request.user.house_set.all()).distinct()
+        # (une seule jointure sur la table d'appartenance, profil et foyers chargés avec l'utilisateur)
+        users_in_common_houses = (
+            User.objects.filter(house__hearthUsers=self.request.user)
+            .distinct()
+            .select_related('profile')
+            .prefetch_related('house_set')
+        )
         return users_in_common_houses
     
 # Vu pour changer tout pour parti de son propre profil(password, username, email)
@@ -107,11 +146,13 @@ class UserUpdateView(generics.UpdateAPIView):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    # Rejet des rafales avant tout calcul de hachage
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
 
 # Vue pour récupérer l'utilisateur courant via token actuel
 class CurrentUserView(generics.RetrieveAPIView):
     serializer_class = UserDetailsSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     # @ensure_csrf_cookie
@@ -138,23 +179,22 @@ class UserSharedHouseProfiles(APIView):
         user_ids = request.data.get('user_ids', [])
         
         if not user_ids:
-            return Response({"error": "No user ids provided"}, status=status.HTTP_400_BAB_REQUEST)
+            return Response({"error": "No user ids provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Récupérer les foyers en commun avec l'utilisateur authentifié
-        shared_houses = House.objects.filter(users=request.user)
-        
-        # Recherche des utilisateurs parmi les ids donnés
-        potential_shared_users = User.objects.filter(id__in=user_ids).distinct()
-
-        # Filtrer seulement ceux qui sont dans les foyers partagés
-        shared_users = [user for user in potential_shared_users if shared_houses.intersection(user.house_set.all()).exists()]
+        # Une seule requête : jointure sur la table d'appartenance aux foyers de l'utilisateur authentifié
+        shared_users = (
+            User.objects.filter(id__in=user_ids, house__hearthUsers=request.user)
+            .values('id', 'username', 'profile__avatar')
+            .distinct()
+            .order_by('id')
+        )
 
         # Prépare la réponse
         result = [{
-            'id': user.id,
-            'name': user.username,
-            'avatar': user.profile.avatar if hasattr(user, 'profile') and user.profile and user.profile.avatar else None
+            'id': user['id'],
+            'name': user['username'],
+            'avatar': user['profile__avatar'] or None,
+            'avatarUrls': media.variant_urls(user['profile__avatar']),
         } for user in shared_users]
 
         return Response(result)
-
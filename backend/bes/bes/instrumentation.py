@@ -0,0 +1,201 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` measures, for every request, the number of SQL
+queries, the time spent in the database, the response rendering time and the
+total time. They are sent back in a ``Server-Timing`` header and aggregated per
+route into the in-process ``metrics`` registry, exposed in the Prometheus text
+format by ``bes.views.MetricsView``.
+
+The registry lives in each worker process: with several gunicorn workers,
+every scrape reports the worker that answered it (``pid`` label).
+"""
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms, keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    def increment(self, name, labels=None, value=1, help_text=''):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None, buckets=DURATION_BUCKETS, help_text=''):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0, 'count': 0}
+            for index, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        pid = str(os.getpid())
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            help_texts = dict(self._help)
+
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f'# HELP {name} {help_texts.get(name) or name}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f'{name}{_labels(labels, pid=pid)} {value}')
+        for (name, labels), histogram in histograms:
+            describe(name, 'histogram')
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                lines.append(f'{name}_bucket{_labels(labels, pid=pid, le=bound)} {count}')
+            lines.append(f'{name}_bucket{_labels(labels, pid=pid, le="+Inf")} {histogram["count"]}')
+            lines.append(f'{name}_sum{_labels(labels, pid=pid)} {histogram["sum"]}')
+            lines.append(f'{name}_count{_labels(labels, pid=pid)} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + sorted(extra.items())
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+metrics = MetricsRegistry()
+
+
+class RequestTimings:
+    """Measurements collected while one request is handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def rendered(self, response):
+        if self.render_started is not None:
+            self.render_time = time.perf_counter() - self.render_started
+
+
+class PerformanceMiddleware:
+    """
+    Measure SQL queries, database time, render time and total time of each request.
+
+    Queries run while a streaming response is consumed happen after the
+    middleware returns and are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERFORMANCE_INSTRUMENTATION', True)
+        self.server_timing = getattr(settings, 'PERFORMANCE_SERVER_TIMING', True)
+        # Sous ASGI, la chaîne reste asynchrone pour ne pas bloquer les vues async
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        timings = request.performance_timings = RequestTimings()
+        started = time.perf_counter()
+        with self.wrap_connections(timings):
+            response = self.get_response(request)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        timings = request.performance_timings = RequestTimings()
+        started = time.perf_counter()
+        with self.wrap_connections(timings):
+            response = await self.get_response(request)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def wrap_connections(self, timings):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timings.record_query))
+        return stack
+
+    def finish(self, request, response, timings, total):
+        """Record the request metrics and add the Server-Timing header."""
+        match = getattr(request, 'resolver_match', None)
+        labels = {'route': match.route if match else 'unresolved', 'method': request.method}
+        metrics.increment('bes_requests_total', dict(labels, status=response.status_code),
+                          help_text='Requests handled, per route, method and status.')
+        metrics.observe('bes_request_duration_seconds', total, labels,
+                        help_text='Total request handling time.')
+        metrics.observe('bes_request_db_duration_seconds', timings.db_time, labels,
+                        help_text='Time spent running SQL queries.')
+        metrics.observe('bes_request_render_duration_seconds', timings.render_time, labels,
+                        help_text='Time spent rendering (serializing) the response.')
+        metrics.observe('bes_request_queries', timings.queries, labels, buckets=QUERY_BUCKETS,
+                        help_text='SQL queries per request.')
+
+        if self.server_timing:
+            app_time = max(total - timings.db_time - timings.render_time, 0)
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings.db_time * 1000:.2f};desc="{timings.queries} queries"',
+                f'render;dur={timings.render_time * 1000:.2f}',
+                f'app;dur={app_time * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}',
+            ])
+        return response
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, 'performance_timings', None)
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(timings.rendered)
+        return response
+
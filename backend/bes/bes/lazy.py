@@ -0,0 +1,78 @@
+"""
+Views imported on their first request.
+
+The URLconf is loaded by every process, including management commands (the
+system checks resolve it). Routing through ``lazy_view`` keeps DRF, the
+serializers and the view modules out of those processes and out of the
+start-up time of the workers: a view module is imported the first time one of
+its routes is called.
+
+Under gunicorn with ``preload_app`` the master calls ``load_views`` before
+forking, so the workers share the imported modules instead of each importing
+them (see ``gunicorn.conf.py``).
+"""
+from importlib import import_module
+
+from django.urls import get_resolver
+
+# Toutes les vues paresseuses déclarées, pour load_views
+LAZY_VIEWS = []
+
+
+class LazyView:
+    """
+    Resolve ``'module.attribute'`` to a view on first use.
+
+    :param path: Dotted path of a view function or of a class-based view.
+    :param args: Positional arguments of ``as_view`` (actions of a ``ViewSet``).
+    :param initkwargs: Keyword arguments of ``as_view``.
+    """
+
+    def __init__(self, path, args=(), initkwargs=None):
+        self.path = path
+        self.args = args
+        self.initkwargs = initkwargs or {}
+        self.view = None
+
+    def resolve(self):
+        if self.view is None:
+            module_name, attribute = self.path.rsplit('.', 1)
+            view = getattr(import_module(module_name), attribute)
+            if hasattr(view, 'as_view'):
+                view = view.as_view(*self.args, **self.initkwargs)
+            self.view = view
+        return self.view
+
+
+def lazy_view(path, *args, asynchronous=False, csrf_exempt=True, **initkwargs):
+    """
+    Return a view that imports ``path`` on its first request.
+
+    :param asynchronous: The view is a coroutine function (served by ASGI).
+    :param csrf_exempt: What the resolved view declares (true for DRF views), read
+        by ``CsrfViewMiddleware`` before the view is imported.
+    """
+    lazy = LazyView(path, args, initkwargs)
+    LAZY_VIEWS.append(lazy)
+
+    if asynchronous:
+        async def view(request, *args, **kwargs):
+            return await lazy.resolve()(request, *args, **kwargs)
+    else:
+        def view(request, *args, **kwargs):
+            return lazy.resolve()(request, *args, **kwargs)
+
+    view.__module__, view.__name__ = path.rsplit('.', 1)
+    view.__qualname__ = view.__name__
+    view.csrf_exempt = csrf_exempt
+    view.lazy = lazy
+    return view
+
+
+def load_views():
+    """Import the URLconf and every lazy view, e.g. in the gunicorn master before forking."""
+    # Charge l'URLconf, qui déclare les vues paresseuses
+    get_resolver().url_patterns
+    for lazy in LAZY_VIEWS:
+        lazy.resolve()
+    return len(LAZY_VIEWS)
@@ -0,0 +1,98 @@
+"""
+Uploaded images (avatars, house images) stored as pre-resized variants.
+
+An upload is decoded once with Pillow and saved as one square WebP variant per
+``MEDIA_IMAGE_SIZES`` side. The name stored on the model is
+``<owner directory>/<hash>``, the hash covering the uploaded bytes and the
+variant settings: a variant name always designates the same bytes, so it is
+served with an immutable cache header, and a new upload gets new names.
+"""
+import hashlib
+import io
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Image envoyée : répertoire du propriétaire et empreinte du contenu
+IMAGE_NAME = re.compile(r'^[\w-]+/[0-9a-f]{16}$')
+VARIANT_NAME = re.compile(r'^[\w-]+/[0-9a-f]{16}-\d+\.webp$')
+
+
+class ImageError(ValueError):
+    """An upload that cannot be stored as an image."""
+
+
+def is_uploaded(name):
+    """Whether an avatar or image name designates an uploaded image (not a bundled one)."""
+    return bool(name) and IMAGE_NAME.match(name) is not None
+
+
+def variant_name(name, size):
+    return f'{name}-{size}.webp'
+
+
+def variant_urls(name):
+    """URL of each variant of an uploaded image, by side in pixels, or None for other names."""
+    if not is_uploaded(name):
+        return None
+    return {str(size): default_storage.url(variant_name(name, size)) for size in settings.MEDIA_IMAGE_SIZES}
+
+
+def store_image(upload, path_for):
+    """
+    Save the variants of an uploaded image and return its name.
+
+    :param upload: The uploaded file.
+    :param path_for: Path of a file name in the owner's directory, e.g. ``UserProfile.user_directory_path``
+        bound to the profile.
+    :raise ImageError: The file is too large or is not a readable image.
+    """
+    if upload.size > settings.MEDIA_UPLOAD_MAX_SIZE:
+        raise ImageError(f"The image exceeds {settings.MEDIA_UPLOAD_MAX_SIZE} bytes")
+    content = upload.read()
+    sizes = sorted(settings.MEDIA_IMAGE_SIZES, reverse=True)
+    digest = hashlib.sha256(content)
+    digest.update(repr((sizes, settings.MEDIA_IMAGE_QUALITY)).encode())
+    name = path_for(digest.hexdigest()[:16])
+    missing = [size for size in sizes if not default_storage.exists(variant_name(name, size))]
+    if not missing:
+        # Image déjà envoyée par ce propriétaire : variantes réutilisées
+        return name
+
+    try:
+        image = Image.open(io.BytesIO(content))
+        if image.width * image.height > settings.MEDIA_IMAGE_MAX_PIXELS:
+            raise ImageError("The image has too many pixels")
+        # JPEG : décodage directement à l'échelle réduite la plus proche de la plus grande variante
+        image.draft('RGB', (sizes[0], sizes[0]))
+        image = ImageOps.exif_transpose(image)
+        transparent = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if transparent else 'RGB')
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as error:
+        raise ImageError("The file is not a valid image") from error
+
+    for size in sizes:
+        # Du plus grand au plus petit : chaque variante est réduite depuis la précédente
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        if size in missing:
+            buffer = io.BytesIO()
+            image.save(buffer, 'WEBP', quality=settings.MEDIA_IMAGE_QUALITY)
+            default_storage.save(variant_name(name, size), ContentFile(buffer.getvalue()))
+    return name
+
+
+def replace_image(previous, name):
+    """Delete the variants of a replaced uploaded image once the new name is committed."""
+    # Seulement dans le répertoire du même propriétaire : le nom précédent a pu être saisi librement
+    if previous == name or not is_uploaded(previous) or previous.split('/')[0] != name.split('/')[0]:
+        return
+
+    def delete():
+        for size in settings.MEDIA_IMAGE_SIZES:
+            default_storage.delete(variant_name(previous, size))
+
+    transaction.on_commit(delete)
@@ -0,0 +1,155 @@
+"""
+Read replicas with read-your-writes stickiness.
+
+``ReplicaRouter`` sends the reads of safe requests (GET, HEAD, OPTIONS) to one
+of the ``DATABASE_REPLICAS`` aliases and everything else to ``default``:
+writes, reads of unsafe requests, reads that follow a write in the same request
+and reads made outside a request (management commands, shell), which may write
+what they read.
+
+``ReplicaRoutingMiddleware`` tracks the current request. A user whose request
+wrote to the primary is pinned to it for ``DATABASE_REPLICA_PIN_SECONDS``, so
+the reads that follow see the write despite the replication lag. The pin is
+kept in the cache, shared by the workers, and keyed by the user id: API clients
+authenticate with a bearer token and do not send cookies back.
+
+Reads that fill a shared cache go to the primary too (``primary_reads``): a
+lagging replica would store stale memberships or catalogs for every worker.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_KEY = 'bes:primary-pin:{user_id}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RequestRouting:
+    """Routing state of one request."""
+
+    def __init__(self, request):
+        self.request = request
+        self.safe = request.method in SAFE_METHODS
+        self.wrote = False
+        self.pinned = None
+        self.resolving = False
+        # Blocs primary_reads en cours
+        self.primary_reads = 0
+
+    def user_id(self):
+        user = getattr(self.request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    def use_primary(self):
+        if not self.safe or self.wrote or self.primary_reads:
+            return True
+        if self.pinned is None:
+            if self.resolving:
+                # Lecture faite pendant l'authentification (session, utilisateur) : base principale
+                return True
+            self.resolving = True
+            try:
+                user_id = self.user_id()
+            finally:
+                self.resolving = False
+            if user_id is None:
+                # Utilisateur pas encore authentifié par DRF : décision reportée
+                return False
+            self.pinned = cache.get(PIN_KEY.format(user_id=user_id)) is not None
+        return self.pinned
+
+    def pin(self):
+        """Keep the reads of the user on the primary for the pin window."""
+        user_id = self.user_id()
+        timeout = settings.DATABASE_REPLICA_PIN_SECONDS
+        if user_id is not None and timeout > 0:
+            cache.set(PIN_KEY.format(user_id=user_id), True, timeout)
+
+
+current_routing = ContextVar('current_routing', default=None)
+
+
+def end_routing(**kwargs):
+    # Fin de la réponse (contenu en flux compris) : les requêtes suivantes du thread repartent de zéro
+    current_routing.set(None)
+
+
+request_finished.connect(end_routing)
+
+
+@contextmanager
+def primary_reads():
+    """Send the reads of the block to the primary, e.g. those that fill a shared cache."""
+    routing = current_routing.get()
+    if routing is None:
+        # Hors requête : tout est déjà lu sur la base principale
+        yield
+        return
+    routing.primary_reads += 1
+    try:
+        yield
+    finally:
+        routing.primary_reads -= 1
+
+
+class ReplicaRouter:
+    """Send safe reads to a replica and everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        routing = current_routing.get()
+        if not replicas or routing is None or routing.use_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les réplicas contiennent les mêmes données que la base principale
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par la réplication
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    """Track the request for ``ReplicaRouter`` and pin the users who wrote to the primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = RequestRouting(request)
+        current_routing.set(routing)
+        response = self.get_response(request)
+        self.finish(routing)
+        return response
+
+    async def __acall__(self, request):
+        routing = RequestRouting(request)
+        current_routing.set(routing)
+        response = await self.get_response(request)
+        self.finish(routing)
+        return response
+
+    def finish(self, routing):
+        if routing.wrote and settings.DATABASE_REPLICAS:
+            routing.pin()
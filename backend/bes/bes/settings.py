@@ -53,6 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Mesure des requêtes SQL et des temps de réponse (en premier pour couvrir toute la requête)
+    'bes.instrumentation.PerformanceMiddleware',
+    # Lectures des requêtes sûres vers les réplicas (voir DATABASE_REPLICAS)
+    'bes.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -64,6 +68,27 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
 ]
 
+# Profil allégé pour les petites machines (Raspberry Pi) : sans l'administration, les sessions,
+# les messages, les fichiers statiques ni l'API navigable ; authentification par jeton JWT seulement
+BES_LEAN = os.getenv('BES_LEAN', 'False') == 'True'
+if BES_LEAN:
+    LEAN_REMOVED_APPS = [
+        # Applications utiles seulement pour les gabarits et traductions de l'API navigable
+        'rest_framework',
+        'rest_framework_simplejwt',
+        'django.contrib.admin',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'django.contrib.staticfiles',
+    ]
+    LEAN_REMOVED_MIDDLEWARE = [
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    ]
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in LEAN_REMOVED_APPS]
+    MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in LEAN_REMOVED_MIDDLEWARE]
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:4200",  
     "http://127.0.0.1:4200",  
@@ -71,6 +96,10 @@ CORS_ALLOWED_ORIGINS = [
 # Pour autoriser toutes les origines (interdit pour la production) :
 # CORS_ALLOW_ALL_ORIGINS = True
 
+# Instrumentation des performances : en-tête Server-Timing et métriques exposées sur /metrics/
+PERFORMANCE_INSTRUMENTATION = os.getenv('PERFORMANCE_INSTRUMENTATION', 'True') == 'True'
+PERFORMANCE_SERVER_TIMING = os.getenv('PERFORMANCE_SERVER_TIMING', 'True') == 'True'
+
 ROOT_URLCONF = 'bes.urls'
 
 TEMPLATES = [
@@ -98,9 +127,53 @@ WSGI_APPLICATION = 'bes.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
+    }
+}
+
+# Connexions persistantes (secondes, 0 pour fermer après chaque requête), vérifiées avant réutilisation
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(os.getenv('DATABASE_CONN_MAX_AGE', '60'))
+    database['CONN_HEALTH_CHECKS'] = True
+
+# Réplicas en lecture, séparés par des virgules : hôtes pour MySQL, fichiers pour SQLite
+# (ex. DATABASE_REPLICAS=db-replica.sqlite3). Ils reprennent les réglages de la base principale.
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), 1):
+    location_key = 'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'
+    DATABASES[f'replica{index}'] = dict(DATABASES['default'], **{location_key: location.strip()},
+                                        TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['bes.routers.ReplicaRouter']
+# Durée (secondes) pendant laquelle un utilisateur qui vient d'écrire lit la base principale
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', '5'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Fichiers par défaut : partagés par tous les workers (et les commandes) d'une même machine.
+# Sur plusieurs machines, ou pour des compteurs atomiques, pointer vers Redis
+# (ex. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, CACHE_LOCATION=redis://127.0.0.1:6379).
+# La mémoire locale (LocMemCache) est propre à chaque processus : un seul worker gunicorn avec elle.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache_files')),
     }
 }
+if CACHES['default']['BACKEND'].endswith('.FileBasedCache'):
+    # Au-delà, un tiers des entrées est supprimé au hasard (une version de foyer perdue change les ETag)
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '3000'))}
+# Tests et benchmark : cache dans un répertoire temporaire, jamais celui du serveur
+TEST_RUNNER = 'bes.testing.TestRunner'
+
+# Durée de vie (secondes) des appartenances aux foyers mises en cache
+HOUSEWORK_MEMBERSHIP_CACHE_TIMEOUT = int(os.getenv('HOUSEWORK_MEMBERSHIP_CACHE_TIMEOUT', '300'))
+# Durée de vie (secondes) des catalogues de tâches possibles mis en cache
+HOUSEWORK_CATALOG_CACHE_TIMEOUT = int(os.getenv('HOUSEWORK_CATALOG_CACHE_TIMEOUT', '3600'))
+# Durée de vie (secondes) des champs des utilisateurs authentifiés par jeton mis en cache
+ACCOUNT_USER_CACHE_TIMEOUT = int(os.getenv('ACCOUNT_USER_CACHE_TIMEOUT', '60'))
 
 
 # Password validation
@@ -143,7 +216,21 @@ STATIC_URL = 'static/'
 # Media files
 # https://docs.djangoproject.com/en/4.2/ref/settings/#std-setting-MEDIA_ROOT
 
-MEDIA_ROOT = 'media_files/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', 'media_files/')
+MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
+
+# Images envoyées (avatars, images des foyers) : côtés des variantes carrées en pixels, qualité WebP,
+# taille maximale du fichier (octets) et nombre maximal de pixels décodés
+MEDIA_IMAGE_SIZES = [int(size) for size in os.getenv('MEDIA_IMAGE_SIZES', '64,256').split(',')]
+MEDIA_IMAGE_QUALITY = int(os.getenv('MEDIA_IMAGE_QUALITY', '80'))
+MEDIA_UPLOAD_MAX_SIZE = int(os.getenv('MEDIA_UPLOAD_MAX_SIZE', str(10 * 1024 * 1024)))
+MEDIA_IMAGE_MAX_PIXELS = int(os.getenv('MEDIA_IMAGE_MAX_PIXELS', str(40 * 1000 * 1000)))
+
+# Envoi des fichiers média par le serveur web frontal plutôt que par Django :
+# '' (Django les lit), 'nginx' (X-Accel-Redirect vers l'emplacement interne MEDIA_ACCEL_PREFIX)
+# ou 'sendfile' (X-Sendfile avec le chemin du fichier, Apache/lighttpd)
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -153,7 +240,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Rest framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'account.authentication.ClaimsJWTAuthentication',
+    ) if BES_LEAN else (
+        'account.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.TokenAuthentication',
@@ -161,8 +250,38 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+    ) if BES_LEAN else (
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Tentatives de connexion par adresse IP et par compte ; vide pour désactiver.
+    # Les compteurs sont dans le cache : il doit être partagé entre les workers.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('LOGIN_IP_THROTTLE_RATE', '30/min') or None,
+        'login_account': os.getenv('LOGIN_ACCOUNT_THROTTLE_RATE', '10/min') or None,
+    },
 }
 
+# Tâches réalisées : taille des pages (pagination par curseur) et des lots lus en mode flux
+HOUSEWORK_PAGE_SIZE = int(os.getenv('HOUSEWORK_PAGE_SIZE', '200'))
+HOUSEWORK_MAX_PAGE_SIZE = int(os.getenv('HOUSEWORK_MAX_PAGE_SIZE', '1000'))
+HOUSEWORK_STREAM_CHUNK_SIZE = int(os.getenv('HOUSEWORK_STREAM_CHUNK_SIZE', '500'))
+# Nombre maximal de tâches réalisées créées par une requête create-multiple (somme des count)
+HOUSEWORK_MADE_TASKS_MAX_COUNT = int(os.getenv('HOUSEWORK_MADE_TASKS_MAX_COUNT', '500'))
+
+# Tâches réalisées plus anciennes que ce nombre de jours : déplacées dans l'archive par archive_made_tasks
+HOUSEWORK_ARCHIVE_AFTER_DAYS = int(os.getenv('HOUSEWORK_ARCHIVE_AFTER_DAYS', '365'))
+# Durée de vie (secondes) de la limite de l'archive mise en cache, relue ensuite depuis l'archive
+HOUSEWORK_ARCHIVE_BOUND_CACHE_TIMEOUT = int(os.getenv('HOUSEWORK_ARCHIVE_BOUND_CACHE_TIMEOUT', '300'))
+
+# Événements en direct par foyer : diffuseur (un seul processus par défaut),
+# intervalle des messages de maintien (secondes) et durée maximale d'un flux (secondes)
+HOUSEWORK_EVENT_BROKER = os.getenv('HOUSEWORK_EVENT_BROKER', 'housework.events.InProcessBroker')
+HOUSEWORK_EVENT_HEARTBEAT = int(os.getenv('HOUSEWORK_EVENT_HEARTBEAT', '15'))
+HOUSEWORK_EVENT_STREAM_TIMEOUT = int(os.getenv('HOUSEWORK_EVENT_STREAM_TIMEOUT', '300'))
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -0,0 +1,40 @@
+"""
+Test runner with a cache of its own.
+
+The default cache is shared by every process of the host, the running server
+included: the tests and the benchmark clear it and fill it with their own
+memberships, catalogs and versions. ``TestRunner`` points ``CACHES`` to a
+file-based cache in a temporary directory for the whole run, still shared with
+the processes started by the tests (see ``cache_environment``).
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHE_BACKEND = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+def cache_environment():
+    """Environment variables giving a new process the cache of the current one (``CACHE_BACKEND``, ``CACHE_LOCATION``)."""
+    cache = settings.CACHES['default']
+    return dict(os.environ, CACHE_BACKEND=cache['BACKEND'], CACHE_LOCATION=str(cache.get('LOCATION', '')))
+
+
+class TestRunner(DiscoverRunner):
+    """``DiscoverRunner`` using a temporary file-based cache instead of the configured one."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.TemporaryDirectory(prefix='bes-test-cache-')
+        self.cache_settings = override_settings(CACHES={
+            'default': {'BACKEND': TEST_CACHE_BACKEND, 'LOCATION': self.cache_directory.name},
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        self.cache_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -15,15 +15,28 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 # bes/bes/urls.py
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from bes.lazy import lazy_view
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path("housework/", include("housework.urls")),
     path("account/", include("account.urls")),
-    
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT) # https://docs.djangoproject.com/en/4.2/howto/static-files/#serving-uploaded-files-in-development
-# TODO : à revoir pour la prod : https://docs.djangoproject.com/en/4.2/howto/static-files/deployment/
+    path("metrics/", lazy_view('bes.views.MetricsView'), name='metrics'),
+]
+
+# Fichiers média : lus par Django en développement (DEBUG), ou envoyés par le serveur web frontal (MEDIA_ACCEL).
+# Sinon, le serveur frontal sert directement MEDIA_ROOT sous MEDIA_URL
+media_urlpatterns = [
+    path(settings.MEDIA_URL.lstrip('/') + '<path:path>', lazy_view('bes.views.serve_media', csrf_exempt=False),
+         name='media'),
+]
+if settings.DEBUG or settings.MEDIA_ACCEL:
+    urlpatterns += media_urlpatterns
+
+# Administration absente du profil allégé (BES_LEAN)
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
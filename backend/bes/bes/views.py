@@ -0,0 +1,52 @@
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from .instrumentation import metrics
+from .media import VARIANT_NAME
+
+
+class MetricsView(APIView):
+    """Expose the aggregated request metrics of this worker, for staff users."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a media file, or hand it over to the front web server (``MEDIA_ACCEL``).
+
+    Image variants have content-hashed names: they are cached as immutable.
+    """
+    try:
+        full_path = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    if settings.MEDIA_ACCEL == 'nginx':
+        # Le worker rend la main aussitôt : nginx lit le fichier depuis son emplacement interne
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX + path)
+    elif settings.MEDIA_ACCEL == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    if VARIANT_NAME.match(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
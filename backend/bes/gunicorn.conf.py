@@ -0,0 +1,60 @@
+"""
+Gunicorn settings, read from the working directory (``backend/bes``).
+
+With ``preload_app`` the master imports Django, the URLconf and every view
+once, then forks the workers: they share those pages copy-on-write instead of
+each importing them. ``gc.freeze()`` moves the objects loaded so far out of
+the collected generations, so the collector of a worker does not write to
+them (reference counts aside) and keeps the pages shared.
+
+Several workers need a cache they all see (memberships, house versions, login
+throttles): gunicorn refuses to start them with a process-local ``LocMemCache``.
+"""
+import gc
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bes.settings')
+
+# Caches propres à chaque processus : un worker n'y voit pas ce que les autres ont écrit ou invalidé
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def process_local_caches():
+    from django.conf import settings
+
+    return [alias for alias, cache in settings.CACHES.items() if cache['BACKEND'] in PROCESS_LOCAL_CACHES]
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# Un seul worker par défaut tant que le cache n'est pas partagé
+workers = int(os.getenv('GUNICORN_WORKERS', '1' if process_local_caches() else '2'))
+# Chargement de l'application dans le maître, avant de forker les workers
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+# Redémarrage des workers après ce nombre de requêtes (0 : jamais), contre la croissance de la mémoire
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    # Nombre final de workers (la ligne de commande l'emporte sur ce fichier)
+    local = process_local_caches()
+    if server.cfg.workers > 1 and local:
+        raise RuntimeError(
+            f"{server.cfg.workers} workers cannot share the process-local cache {', '.join(local)}: "
+            "set CACHE_BACKEND to a shared cache or run a single worker"
+        )
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.db import connections
+
+    from bes.lazy import load_views
+
+    count = load_views()
+    # Aucune connexion ne doit être partagée avec les workers
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    server.log.info("Preloaded %d views, %d objects frozen", count, gc.get_freeze_count())
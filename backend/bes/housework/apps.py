@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HouseworkConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'housework'
+
+    def ready(self):
+        # Connecte les receveurs de signaux (invalidation des caches)
+        from . import signals
@@ -0,0 +1,238 @@
+"""
+Asynchronous variants of the read-heavy housework endpoints, and the live
+per-house event stream.
+
+Served by an ASGI server (``bes.asgi``), they wait for the database without
+holding a worker: queries go through Django's async ORM and only the short
+synchronous helpers (cache fill on a miss, rollup totals) run in the sync
+thread. Responses are identical to the synchronous endpoints.
+"""
+import asyncio
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from account.authentication import ClaimsJWTAuthentication
+
+from .caching import get_possible_task_catalog, house_etag, is_house_member
+from .events import get_broker
+from .models import House, HouseworkDailyRollup, HouseworkMadeTaskArchive, HouseworkPossibleTask, Score
+from .pagination import DateIdKeysetPagination, astream_json_array, ordered_union
+from .serializers import (
+    HouseSerializer, HouseworkMadeTaskDateRangeSerializer, HouseworkPossibleTaskSerializer, ScoreSerializer,
+)
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder,
+                        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+
+
+def authenticate(request, query_token=False):
+    """
+    Return the user of the request's JWT access token, or None.
+
+    The token is checked by ``ClaimsJWTAuthentication``, as on the synchronous API
+    (revoked tokens included).
+
+    :param query_token: Also accept the token in the ``token`` query parameter, for
+        clients that cannot set headers (``EventSource``).
+    """
+    authenticator = ClaimsJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else None
+    if raw_token is None and query_token:
+        raw_token = request.GET.get('token', '').encode() or None
+    if raw_token is None:
+        return None
+    try:
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    except (AuthenticationFailed, TokenError):
+        return None
+
+
+def async_api_view(view=None, query_token=False):
+    """Authenticate an async GET view with a JWT access token and answer other methods with a 405."""
+    if view is None:
+        return functools.partial(async_api_view, query_token=query_token)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            # La révocation lit la ligne utilisateur : requête synchrone hors de la boucle
+            user = await sync_to_async(authenticate)(request, query_token)
+        else:
+            user = authenticate(request, query_token)
+        if user is None:
+            return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def conditional(request, house_id, build_response):
+    """Answer ``If-None-Match`` with a 304 from the house version, like the ``condition`` decorator."""
+    etag = await sync_to_async(house_etag)(request, house_id)
+    if etag is not None:
+        etag = f'"{etag}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if isinstance(not_modified, HttpResponseNotModified):
+            return not_modified
+    response = await build_response()
+    if etag is not None and response.status_code == 200:
+        response.headers.setdefault('ETag', etag)
+    return response
+
+
+@async_api_view
+async def house_list(request):
+    """Async variant of ``HouseList.get``."""
+    houses = HouseSerializer.setup_eager_loading(House.objects.filter(hearthUsers__id=request.user.id))
+    # L'itération asynchrone charge aussi les relations préchargées
+    return json_response(HouseSerializer([house async for house in houses], many=True).data)
+
+
+@async_api_view
+async def possible_tasks(request, house_id):
+    """Async variant of ``HouseworkPossibleTaskView.get`` for one house."""
+    if not await sync_to_async(is_house_member)(request.user, house_id):
+        return json_response({'detail': "Vous n'appartenez pas à cette maison."}, status=403)
+
+    async def build_response():
+        catalog = await sync_to_async(get_possible_task_catalog)(house_id, lambda: HouseworkPossibleTaskSerializer(
+            HouseworkPossibleTask.objects.filter(house__id=house_id), many=True
+        ).data)
+        return json_response(catalog)
+
+    return await conditional(request, house_id, build_response)
+
+
+@async_api_view
+async def house_scores(request, house_id):
+    """Async variant of ``HouseScoresView.get``."""
+    if not await sync_to_async(is_house_member)(request.user, house_id):
+        if not await House.objects.filter(pk=house_id).aexists():
+            return json_response({'error': 'House not found'}, status=404)
+        return json_response({'error': 'Access denied: You are not a member of this house'}, status=403)
+
+    async def build_response():
+        start_date = request.GET.get('start_date')
+        end_date = request.GET.get('end_date')
+        if start_date or end_date:
+            try:
+                start_date = parse_datetime(start_date or '')
+                end_date = parse_datetime(end_date or '')
+            except ValueError as e:
+                return json_response({'error': str(e)}, status=400)
+            if not (start_date and end_date):
+                return json_response({'error': 'Invalid date format'}, status=400)
+            totals = await sync_to_async(HouseworkDailyRollup.totals)(house_id, start_date, end_date, group_by=['user'])
+            return json_response([
+                {'user': total['user'], 'hearth': house_id, 'score': total['total_score'],
+                 'count': total['count'], 'total_duration': total['total_duration']}
+                for total in totals
+            ])
+        scores = [score async for score in Score.objects.filter(hearth_id=house_id)]
+        return json_response(ScoreSerializer(scores, many=True).data)
+
+    return await conditional(request, house_id, build_response)
+
+
+@async_api_view
+async def made_task_date_range(request):
+    """Async variant of ``HouseworkMadeTaskDateRangeView.get``, with the same parameters."""
+    house_id = request.GET.get('house_id')
+    try:
+        start_date = parse_datetime(request.GET.get('start_date') or '')
+        end_date = parse_datetime(request.GET.get('end_date') or '')
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    if not all([start_date, end_date, house_id]):
+        return json_response({'error': 'Missing required parameters'}, status=400)
+
+    if request.GET.get('totals') in ('1', 'true'):
+        group_by = [name for name in request.GET.get('group_by', '').split(',') if name]
+        if any(name not in HouseworkDailyRollup.GROUPS for name in group_by):
+            return json_response({'error': 'Invalid group_by'}, status=400)
+        return json_response(await sync_to_async(HouseworkDailyRollup.totals)(house_id, start_date, end_date, group_by))
+
+    sources = await sync_to_async(HouseworkMadeTaskArchive.date_range)(house_id, start_date, end_date)
+    tasks = ordered_union(sources)
+
+    if request.GET.get('stream') in ('1', 'true'):
+        chunk_size = getattr(settings, 'HOUSEWORK_STREAM_CHUNK_SIZE', 500)
+        return StreamingHttpResponse(
+            astream_json_array(tasks, HouseworkMadeTaskDateRangeSerializer, chunk_size),
+            content_type='application/json',
+        )
+
+    paginator = DateIdKeysetPagination()
+    if paginator.cursor_query_param in request.GET or paginator.page_size_query_param in request.GET:
+        try:
+            page_queryset = paginator.page_queryset(sources, Request(request))
+        except NotFound as e:
+            return json_response({'detail': str(e.detail)}, status=404)
+        page = paginator.build_page([task async for task in page_queryset])
+        data = HouseworkMadeTaskDateRangeSerializer(page, many=True).data
+        return json_response({'next': paginator.get_next_link(), 'results': data})
+
+    tasks = [task async for task in tasks]
+    return json_response(HouseworkMadeTaskDateRangeSerializer(tasks, many=True).data)
+
+
+@async_api_view(query_token=True)
+async def house_events(request, house_id):
+    """
+    Server-sent events of a house: ``made_tasks``, ``score`` and ``members``.
+
+    Each message carries the JSON event. Comments keep the connection alive,
+    and the stream ends after ``HOUSEWORK_EVENT_STREAM_TIMEOUT`` seconds: the
+    ``EventSource`` reconnects by itself. An ``overflow`` event means events were
+    missed and the client must reload the house state.
+    """
+    if not await sync_to_async(is_house_member)(request.user, house_id):
+        return json_response({'detail': "Vous n'appartenez pas à cette maison."}, status=403)
+
+    broker = get_broker()
+    # Abonnement avant la réponse : aucun événement validé ensuite n'est perdu
+    subscription = broker.subscribe(house_id)
+    response = StreamingHttpResponse(
+        event_stream(broker, subscription, getattr(settings, 'HOUSEWORK_EVENT_HEARTBEAT', 15),
+                     getattr(settings, 'HOUSEWORK_EVENT_STREAM_TIMEOUT', 300)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def event_stream(broker, subscription, heartbeat, timeout):
+    """Format the events of a subscription as server-sent events until ``timeout`` seconds have passed."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        yield 'retry: 3000\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            event = await subscription.get(timeout=min(heartbeat, remaining))
+            if subscription.overflowed:
+                yield 'event: overflow\ndata: {}\n\n'
+                return
+            if event is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield f'event: {event["type"]}\ndata: {json.dumps(event, separators=(",", ":"))}\n\n'
+    finally:
+        broker.unsubscribe(subscription)
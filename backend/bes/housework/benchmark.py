@@ -0,0 +1,420 @@
+"""
+Endpoint benchmark suite.
+
+Seeds a synthetic dataset (houses, members, possible tasks and a long made-task
+history), then times every route of ``housework/urls.py`` and
+``account/urls.py`` through the test client. Each route declares a SQL query
+budget; latency percentiles are compared against a stored JSON baseline.
+Used by the ``benchmark`` management command.
+
+Latency policy: each route is timed in several series after a warm-up, and its
+p50 is the median of the series medians, so one slow series (a GC pause, a
+busy neighbour) does not move it. A regression fails only when the p50 exceeds
+the baseline by both ``max_regression`` percent and ``min_regression_ms``:
+sub-millisecond routes vary by more than 25% between identical runs.
+
+Query budget policy: each route records the query count measured on the
+seeded dataset (``expected_queries``); its budget is that count plus
+``QUERY_BUDGET_MARGIN``. The margin absorbs a constant extra query or a
+savepoint pair, while an N+1 over the seeded members, tasks or rows exceeds
+it. Routes measured at 0 queries (served from the cache) keep a budget of 0.
+When a change costs more queries on purpose, update ``expected_queries`` to the
+new measure in the same commit.
+"""
+import datetime
+import io
+import itertools
+import json
+import math
+import random
+import statistics
+import time
+from collections import namedtuple
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, RequestFactory
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from account.authentication import ClaimsJWTAuthentication
+from account.models import LoginEmail, UserProfile
+
+from .models import (
+    House, HouseInvitation, HouseworkDailyRollup, HouseworkMadeTask, HouseworkPossibleTask, Score, ScorePeriod,
+)
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+# Requêtes SQL tolérées au-delà du nombre mesuré (voir la politique des budgets ci-dessus)
+QUERY_BUDGET_MARGIN = 2
+# Âge (secondes) au-delà duquel les jetons d'accès des requêtes mesurées sont renouvelés
+TOKEN_RENEWAL_SECONDS = 60
+
+# Appel HTTP préparé (non chronométré) pour une itération d'une route : data est encodé selon content_type
+# (JSON, formulaire multipart, ou corps brut pour les autres types)
+Call = namedtuple('Call', ['path', 'data', 'user', 'content_type'], defaults=[None, None, 'application/json'])
+
+# Route mesurée : ``setup(context)`` renvoie le Call de chaque itération,
+# ``expected_queries`` le nombre de requêtes SQL mesuré sur le jeu de données
+Route = namedtuple('Route', ['name', 'method', 'setup', 'expected_queries', 'expected_status'])
+
+
+def seed_dataset(houses=20, members=5, possible_tasks=10, made_tasks=20000, days=365, seed=0, batch_size=2000):
+    """
+    Fill the (test) database with a synthetic dataset and return the benchmark context.
+
+    Every member is in one house, logs tasks of that house spread over the last
+    ``days`` days, and has a profile and a score matching their history.
+    """
+    rng = random.Random(seed)
+    password = make_password(BENCHMARK_PASSWORD)
+    User.objects.bulk_create([
+        User(username=f'bench-{index}', email=f'bench-{index}@example.com', password=password)
+        for index in range(houses * members)
+    ])
+    users = list(User.objects.filter(username__startswith='bench-').order_by('id'))
+    UserProfile.objects.bulk_create([UserProfile(user=user, avatar=f'avatar-{user.id}.png') for user in users])
+    LoginEmail.objects.bulk_create([LoginEmail(user=user, email=user.email) for user in users])
+
+    House.objects.bulk_create([
+        House(name=f'Maison {index}', admin_user=users[index * members], imageName='defaultHouse')
+        for index in range(houses)
+    ])
+    house_list = list(House.objects.order_by('id'))
+    house_members = {
+        house.id: users[index * members:(index + 1) * members] for index, house in enumerate(house_list)
+    }
+    House.hearthUsers.through.objects.bulk_create([
+        House.hearthUsers.through(house_id=house_id, user_id=user.id)
+        for house_id, member_list in house_members.items()
+        for user in member_list
+    ])
+
+    HouseworkPossibleTask.objects.bulk_create([
+        HouseworkPossibleTask(name=f'Tâche {index}', house=house, duration=rng.randint(5, 60), difficulty=rng.randint(1, 5))
+        for house in house_list
+        for index in range(possible_tasks)
+    ])
+    tasks_by_house = {}
+    for task in HouseworkPossibleTask.objects.order_by('id'):
+        tasks_by_house.setdefault(task.house_id, []).append(task)
+
+    now = timezone.now()
+    totals = {}
+    batch = []
+    for _ in range(made_tasks):
+        house = rng.choice(house_list)
+        user = rng.choice(house_members[house.id])
+        task = rng.choice(tasks_by_house[house.id])
+        score = task.duration * task.difficulty
+        batch.append(HouseworkMadeTask(
+            name=task.name, score=score, duration=task.duration, difficulty=task.difficulty,
+            date=now - datetime.timedelta(seconds=rng.randint(0, days * 86400)),
+            user=user, house=house, possible_task=task,
+        ))
+        totals[(house.id, user.id)] = totals.get((house.id, user.id), 0) + score
+        if len(batch) >= batch_size:
+            HouseworkMadeTask.objects.bulk_create(batch)
+            batch = []
+    HouseworkMadeTask.objects.bulk_create(batch)
+    HouseworkDailyRollup.rebuild(batch_size=batch_size)
+
+    Score.objects.bulk_create([
+        Score(hearth_id=house_id, user=user, score=totals.get((house_id, user.id), 0),
+              corrected_score=totals.get((house_id, user.id), 0))
+        for house_id, member_list in house_members.items()
+        for user in member_list
+    ])
+    ScorePeriod.objects.bulk_create([
+        ScorePeriod(score=score, involvement=score.involvement, total=score.score) for score in Score.objects.all()
+    ])
+
+    house = house_list[0]
+    return {
+        'house': house,
+        'user': house_members[house.id][0],
+        'members': house_members[house.id],
+        'possible_task': tasks_by_house[house.id][0],
+        'start': now - datetime.timedelta(days=days),
+        'end': now,
+        'sequence': itertools.count(),
+        'dataset': {
+            'houses': houses, 'members': members, 'possible_tasks': possible_tasks,
+            'made_tasks': made_tasks, 'days': days,
+        },
+    }
+
+
+def _new_user(context, with_profile=True):
+    """Create a throwaway user (and profile) for routes that modify or consume their caller."""
+    index = next(context['sequence'])
+    user = User.objects.create_user(f'bench-extra-{index}', f'bench-extra-{index}@example.com', BENCHMARK_PASSWORD)
+    if with_profile:
+        UserProfile.objects.create(user=user, avatar='avatar.png')
+    return user
+
+
+def _new_house(context):
+    """Create a throwaway house administrated by the main user, with one extra member."""
+    house = House.objects.create(name='Maison jetable', admin_user=context['user'])
+    house.add_user(context['user'])
+    member = _new_user(context)
+    house.add_user(member)
+    return house, member
+
+
+def _date_range(context, path='/housework/api/tasks/made/date-range/', **params):
+    query = '&'.join(f'{key}={value}' for key, value in dict(
+        start_date=context['start'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+        end_date=context['end'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+        house_id=context['house'].id,
+        **params,
+    ).items())
+    return Call(f'{path}?{query}')
+
+
+def _image(context):
+    """A new image for each upload, so that its variants are computed every time."""
+    index = next(context['sequence'])
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (index % 256, index // 256 % 256, 128)).save(buffer, 'PNG')
+    return SimpleUploadedFile('image.png', buffer.getvalue(), 'image/png')
+
+
+def _import(context, rows=100):
+    """An NDJSON body of past made tasks of the main user."""
+    lines = (
+        json.dumps({'date': (context['end'] - datetime.timedelta(days=day % 300 + 1)).isoformat(),
+                    'possible_task': context['possible_task'].id})
+        for day in range(rows)
+    )
+    return Call(f"/housework/api/house/{context['house'].id}/import/", '\n'.join(lines),
+                content_type='application/x-ndjson')
+
+
+def _invitation(context):
+    invitation = HouseInvitation.objects.create(house=context['house'], invited_by=context['user'])
+    return Call(f'/housework/api/invite/accept/{invitation.token}/', user=_new_user(context))
+
+
+ROUTES = [
+    # housework/urls.py (la route 'api/house/' sans identifiant n'a pas de méthode exploitable)
+    Route('houses', 'GET', lambda c: Call('/housework/api/houses/'), 2, 200),
+    Route('houses-details', 'GET', lambda c: Call('/housework/api/houses/details/'), 2, 200),
+    Route('house-detail', 'GET', lambda c: Call(f"/housework/api/house/{c['house'].id}/"), 2, 200),
+    Route('house-update', 'PUT', lambda c: Call(f"/housework/api/house/{c['house'].id}/", {'name': 'Maison 0'}), 9, 200),
+    Route('house-delete', 'DELETE', lambda c: Call(f"/housework/api/house/{_new_house(c)[0].id}/"), 16, 204),
+    Route('house-remove-user', 'POST',
+          lambda c: Call('/housework/api/house/{0.id}/remove_user/{1.id}/'.format(*_new_house(c))), 8, 204),
+    Route('house-create', 'POST', lambda c: Call('/housework/api/house/create/'), 13, 201),
+    Route('possible-tasks', 'GET', lambda c: Call(f"/housework/api/house/{c['house'].id}/tasks/"), 0, 200),
+    Route('possible-task-add', 'POST', lambda c: Call('/housework/api/tasks/possible/add/', {
+        'name': f"Tâche ajoutée {next(c['sequence'])}", 'house': c['house'].id, 'duration': 10, 'difficulty': 2,
+    }), 3, 201),
+    Route('possible-task-update', 'PUT', lambda c: Call(
+        f"/housework/api/tasks/possible/{c['possible_task'].id}/", {'duration': c['possible_task'].duration},
+    ), 3, 200),
+    Route('possible-task-delete', 'DELETE', lambda c: Call('/housework/api/tasks/possible/{}/'.format(
+        HouseworkPossibleTask.objects.create(name='Tâche jetable', house=c['house'], duration=1, difficulty=1).id,
+    )), 7, 204),
+    Route('made-tasks-date-range', 'GET', lambda c: _date_range(c), 1, 200),
+    Route('made-tasks-date-range-page', 'GET', lambda c: _date_range(c, page_size=200), 1, 200),
+    Route('made-tasks-date-range-stream', 'GET', lambda c: _date_range(c, stream=1), 1, 200),
+    Route('made-tasks-date-range-totals', 'GET', lambda c: _date_range(c, totals=1, group_by='user'), 2, 200),
+    Route('made-tasks-create-multiple', 'POST', lambda c: Call('/housework/api/tasks/made/create-multiple/', [
+        {'possible_task_id': c['possible_task'].id, 'count': 5},
+    ]), 11, 201),
+    Route('invitation-generate', 'POST', lambda c: Call(f"/housework/api/house/{c['house'].id}/invite/"), 1, 201),
+    Route('invitation-accept', 'POST', _invitation, 14, 200),
+    Route('house-scores', 'GET', lambda c: Call(f"/housework/api/house/{c['house'].id}/scores/"), 1, 200),
+    Route('house-export', 'GET', lambda c: Call(f"/housework/api/house/{c['house'].id}/export/?export_format=csv"),
+          1, 200),
+    Route('house-involvement', 'PUT', lambda c: Call(f"/housework/api/house/{c['house'].id}/involvement/", {
+        'involvement': 1.0, 'effective_from': (c['end'] - datetime.timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }), 7, 200),
+    Route('house-stats', 'GET', lambda c: Call(
+        f"/housework/api/house/{c['house'].id}/stats/?start_date={c['start'].strftime('%Y-%m-%dT%H:%M:%SZ')}"
+        f"&end_date={c['end'].strftime('%Y-%m-%dT%H:%M:%SZ')}&group_by=user,month"
+    ), 2, 200),
+    Route('house-image-upload', 'POST', lambda c: Call(
+        f"/housework/api/house/{c['house'].id}/image/", {'image': _image(c)}, content_type=MULTIPART_CONTENT,
+    ), 2, 200),
+    Route('house-import', 'POST', _import, 17, 201),
+    # Lectures asynchrones (le flux d'événements, sans fin, n'est pas mesuré)
+    Route('async-houses', 'GET', lambda c: Call('/housework/api/async/houses/'), 2, 200),
+    Route('async-possible-tasks', 'GET', lambda c: Call(f"/housework/api/async/house/{c['house'].id}/tasks/"),
+          0, 200),
+    Route('async-house-scores', 'GET', lambda c: Call(f"/housework/api/async/house/{c['house'].id}/scores/"),
+          1, 200),
+    Route('async-made-tasks-date-range', 'GET',
+          lambda c: _date_range(c, path='/housework/api/async/tasks/made/date-range/'), 1, 200),
+
+    # account/urls.py
+    Route('csrf', 'GET', lambda c: Call('/account/csrf/'), 0, 200),
+    Route('login', 'POST', lambda c: Call('/account/login/', {
+        'email': c['user'].email, 'password': BENCHMARK_PASSWORD,
+    }, user=False), 1, 200),
+    Route('login-unknown-email', 'POST', lambda c: Call('/account/login/', {
+        'email': 'nobody@example.com', 'password': BENCHMARK_PASSWORD,
+    }, user=False), 1, 400),
+    Route('token-refresh', 'POST', lambda c: Call('/account/token/refresh/', {
+        'refresh': str(RefreshToken.for_user(c['user'])),
+    }, user=False), 1, 200),
+    Route('user-register', 'POST', lambda c: Call('/account/user/register/', {
+        'username': f"bench-new-{next(c['sequence'])}", 'email': f"bench-new-{next(c['sequence'])}@example.com",
+        'password': BENCHMARK_PASSWORD,
+    }, user=False), 5, 201),
+    Route('user-update', 'PATCH', lambda c: Call('/account/user/update/', {
+        'email': f"bench-updated-{next(c['sequence'])}@example.com",
+    }, user=_new_user(c)), 12, 200),
+    Route('user-self', 'GET', lambda c: Call('/account/user/self/'), 2, 200),
+    Route('user-detail', 'GET', lambda c: Call(f"/account/user/{c['members'][1].id}/"), 2, 200),
+    Route('user-profile-create', 'POST', lambda c: Call('/account/user/profile/create/', {'avatar': 'avatar.png'},
+                                                        user=_new_user(c, with_profile=False)), 2, 201),
+    Route('user-profile-update', 'PATCH', lambda c: Call('/account/user/profile/update/', {'avatar': 'avatar.png'}),
+          3, 200),
+    Route('user-avatar-upload', 'POST', lambda c: Call(
+        '/account/user/profile/avatar/', {'image': _image(c)}, content_type=MULTIPART_CONTENT,
+    ), 4, 200),
+    Route('user-avatars', 'POST', lambda c: Call('/account/user/profiles/get_avatars/', {
+        'user_ids': [member.id for member in c['members']],
+    }), 1, 200),
+]
+
+
+def query_budget(route):
+    """Return the query budget of a route: its measured count plus the margin, 0 for routes without query."""
+    return route.expected_queries + QUERY_BUDGET_MARGIN if route.expected_queries else 0
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class BenchmarkRunner:
+    """Time routes through the test client and collect latency and query counts."""
+
+    def __init__(self, context, iterations=30, warmup=5, repeats=3):
+        self.context = context
+        self.iterations = iterations
+        self.warmup = warmup
+        self.repeats = repeats
+        self.client = Client()
+        # Jetons d'accès par utilisateur, avec leur date d'émission
+        self.tokens = {}
+
+    def authorization(self, user):
+        if user is False:
+            return {}
+        user = user or self.context['user']
+        token, issued = self.tokens.get(user.pk, (None, 0))
+        # Renouvelé bien avant l'expiration (ACCESS_TOKEN_LIFETIME) : une exécution dure plusieurs minutes
+        if time.monotonic() - issued > TOKEN_RENEWAL_SECONDS:
+            token, issued = str(RefreshToken.for_user(user).access_token), time.monotonic()
+            self.tokens[user.pk] = token, issued
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def request(self, route):
+        """Prepare then send one request; return (status, elapsed seconds, query count)."""
+        call = route.setup(self.context)
+        content_type = call.content_type
+        if content_type == MULTIPART_CONTENT:
+            data = encode_multipart(BOUNDARY, call.data)
+        elif content_type == 'application/json':
+            data = json.dumps(call.data) if call.data is not None else ''
+        else:
+            data = call.data
+        headers = self.authorization(call.user)
+        # Journal des requêtes limité (9000) : vidé pour que le décompte reste exact
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.generic(route.method, call.path, data, content_type, **headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, len(queries)
+
+    def run(self, route):
+        for _ in range(self.warmup):
+            self.request(route)
+        timings, medians, query_counts, statuses = [], [], [], set()
+        for _ in range(self.repeats):
+            series = []
+            for _ in range(self.iterations):
+                status, elapsed, queries = self.request(route)
+                series.append(elapsed * 1000)
+                query_counts.append(queries)
+                statuses.add(status)
+            timings.extend(series)
+            medians.append(statistics.median(series))
+        return {
+            'method': route.method,
+            # Médiane des médianes de chaque série
+            'p50_ms': round(statistics.median(medians), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'queries': max(query_counts),
+            'query_budget': query_budget(route),
+            'statuses': sorted(statuses),
+        }
+
+
+def compare_authentication(user, iterations=200):
+    """
+    Time the authentication of one JWT request with the stock ``JWTAuthentication``
+    (user row loaded) and with ``ClaimsJWTAuthentication`` (claims only).
+    """
+    token = str(RefreshToken.for_user(user).access_token)
+    http_request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    results = {}
+    for authentication_class in (JWTAuthentication, ClaimsJWTAuthentication):
+        authenticator = authentication_class()
+        timings, query_counts = [], []
+        for _ in range(iterations):
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                authenticator.authenticate(Request(http_request))
+                timings.append((time.perf_counter() - started) * 1_000_000)
+            query_counts.append(len(queries))
+        results[authentication_class.__name__] = {
+            'p50_us': round(statistics.median(timings), 1),
+            'p95_us': round(percentile(timings, 0.95), 1),
+            'queries': max(query_counts),
+        }
+    return results
+
+
+def check_results(results, routes, baseline=None, max_regression=25.0, min_regression_ms=2.0):
+    """
+    Return the list of failures: unexpected statuses, query budgets exceeded and
+    p50 latencies regressing against the baseline by more than ``max_regression``
+    percent and more than ``min_regression_ms`` milliseconds.
+    """
+    failures = []
+    baseline_routes = (baseline or {}).get('routes', {})
+    for route in routes:
+        result = results[route.name]
+        if result['statuses'] != [route.expected_status]:
+            failures.append(f"{route.name}: status {result['statuses']} instead of {route.expected_status}")
+        if result['queries'] > query_budget(route):
+            failures.append(f"{route.name}: {result['queries']} queries, budget is {query_budget(route)} "
+                            f"({route.expected_queries} measured + {QUERY_BUDGET_MARGIN})")
+        reference = baseline_routes.get(route.name)
+        if reference and result['p50_ms'] > max(reference['p50_ms'] * (1 + max_regression / 100),
+                                                reference['p50_ms'] + min_regression_ms):
+            failures.append(
+                f"{route.name}: p50 {result['p50_ms']:.2f} ms, baseline {reference['p50_ms']:.2f} ms "
+                f"(+{(result['p50_ms'] / reference['p50_ms'] - 1) * 100:.0f}%)"
+            )
+    return failures
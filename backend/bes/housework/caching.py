@@ -0,0 +1,168 @@
+"""
+Shared caches of the housework app.
+
+They go through Django's cache framework, so every gunicorn worker sees the
+same entries as soon as ``CACHES`` points to a shared backend. The entries
+are filled from the primary database, never from a replica that may lag.
+"""
+import datetime
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+
+from bes.instrumentation import metrics
+from bes.routers import primary_reads
+
+MEMBERSHIP_KEY = 'housework:membership:{user_id}'
+HOUSE_VERSION_KEY = 'housework:house-version:{house_id}'
+CATALOG_KEY = 'housework:catalog:{house_id}'
+ARCHIVE_BOUND_KEY = 'housework:archive-bound:{house_id}'
+
+
+def _delete_now_and_on_commit(keys):
+    """
+    Delete cache entries now and again once the current transaction commits.
+
+    The second deletion drops any entry another request refilled with the
+    pre-commit state in between.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_user_house_ids(user_id):
+    """Return the ids of the houses a user belongs to, as a frozenset."""
+    from .models import House
+
+    key = MEMBERSHIP_KEY.format(user_id=user_id)
+    house_ids = cache.get(key)
+    if house_ids is None:
+        with primary_reads():
+            house_ids = frozenset(
+                House.hearthUsers.through.objects.filter(user_id=user_id).values_list('house_id', flat=True)
+            )
+        cache.set(key, house_ids, getattr(settings, 'HOUSEWORK_MEMBERSHIP_CACHE_TIMEOUT', 300))
+    return house_ids
+
+
+def is_house_member(user, house_id):
+    """Tell whether a user belongs to a house, without a query when the membership is cached."""
+    try:
+        house_id = int(house_id)
+    except (TypeError, ValueError):
+        return False
+    return house_id in get_user_house_ids(user.pk)
+
+
+def invalidate_memberships(user_ids):
+    """Forget the cached house ids of some users."""
+    _delete_now_and_on_commit(MEMBERSHIP_KEY.format(user_id=user_id) for user_id in set(user_ids))
+
+
+def get_house_version(house_id):
+    """
+    Return the current version number of a house.
+
+    A missing version (never read, or evicted) starts from a random value, so
+    it cannot match a version handed out before the eviction. The versions must
+    live in a cache shared by the workers: a worker with its own copy would
+    answer 304 to a house another worker changed.
+    """
+    key = HOUSE_VERSION_KEY.format(house_id=house_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, secrets.randbits(48), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_house_versions(house_ids):
+    """Change the version of some houses, now and again once the current transaction commits."""
+    keys = [HOUSE_VERSION_KEY.format(house_id=house_id) for house_id in set(house_ids) if house_id is not None]
+
+    def bump():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Version absente : la prochaine lecture en tire une nouvelle
+                pass
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def house_etag(request, house_id, members_only=True):
+    """
+    Return a strong ETag for a house-scoped read, or None to skip conditional handling.
+
+    The ETag depends on the house version, the requested URL and the Accept
+    header, so it changes whenever a write touches the house.
+    """
+    if house_id is None or (members_only and not is_house_member(request.user, house_id)):
+        return None
+    fingerprint = '{}|{}|{}'.format(
+        get_house_version(house_id), request.get_full_path(), request.META.get('HTTP_ACCEPT', ''),
+    )
+    return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+def get_possible_task_catalog(house_id, build):
+    """
+    Return the serialized possible tasks of a house, calling ``build()`` to fill the cache on a miss.
+
+    Hits and misses are counted in the ``/metrics/`` registry.
+    """
+    key = CATALOG_KEY.format(house_id=house_id)
+    catalog = cache.get(key)
+    if catalog is None:
+        metrics.increment('housework_catalog_cache_misses_total', help_text='Possible-task catalog cache misses.')
+        with primary_reads():
+            catalog = build()
+        cache.set(key, catalog, getattr(settings, 'HOUSEWORK_CATALOG_CACHE_TIMEOUT', 3600))
+    else:
+        metrics.increment('housework_catalog_cache_hits_total', help_text='Possible-task catalog cache hits.')
+    return catalog
+
+
+def invalidate_possible_task_catalogs(house_ids):
+    """Forget the cached possible-task catalogs of some houses."""
+    _delete_now_and_on_commit(CATALOG_KEY.format(house_id=house_id) for house_id in set(house_ids))
+
+
+def get_archive_bound(house_id):
+    """
+    Return the date before which made tasks of a house may be archived, or None without archive.
+
+    The archive table is the reference: on a miss the bound is read back from
+    the newest archived task. The cached copy expires, so a worker whose copy
+    missed an archival run reads the archive again within the timeout.
+    """
+    from .models import HouseworkMadeTaskArchive
+
+    key = ARCHIVE_BOUND_KEY.format(house_id=house_id)
+    # Valeur enveloppée : None (pas d'archive) se distingue d'une entrée absente
+    cached = cache.get(key)
+    if cached is None:
+        with primary_reads():
+            newest = HouseworkMadeTaskArchive.objects.filter(house_id=house_id).aggregate(
+                newest=models.Max('date'),
+            )['newest']
+        cached = (newest + datetime.timedelta(microseconds=1) if newest else None,)
+        # add : ne remplace pas une limite relevée entre-temps par l'archivage
+        cache.add(key, cached, getattr(settings, 'HOUSEWORK_ARCHIVE_BOUND_CACHE_TIMEOUT', 300))
+    return cached[0]
+
+
+def raise_archive_bound(house_id, bound):
+    """Announce that made tasks of a house older than ``bound`` are about to move to the archive."""
+    current = get_archive_bound(house_id)
+    if current is None or current < bound:
+        cache.set(ARCHIVE_BOUND_KEY.format(house_id=house_id), (bound,),
+                  getattr(settings, 'HOUSEWORK_ARCHIVE_BOUND_CACHE_TIMEOUT', 300))
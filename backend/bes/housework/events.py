@@ -0,0 +1,119 @@
+"""
+Per-house live events.
+
+Writes publish small events (tasks logged, score changed, members changed) once
+their transaction commits; the server-sent events endpoint forwards them to the
+clients subscribed to the house.
+
+The fan-out goes through the broker configured by ``HOUSEWORK_EVENT_BROKER``.
+``InProcessBroker`` only reaches the subscribers of the process that published
+the event: it suits a single ASGI worker and the tests. Several workers need a
+broker backed by a shared channel (e.g. Redis pub/sub) with the same interface.
+"""
+import asyncio
+import functools
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class BaseBroker:
+    """Interface of the event brokers."""
+
+    def publish(self, house_id, event):
+        """Send ``event`` (a JSON serializable dict) to the subscribers of a house. Called from sync code."""
+        raise NotImplementedError
+
+    def subscribe(self, house_id):
+        """Return a subscription to a house, from the event loop that will read it."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class Subscription:
+    """
+    Events of one house for one client, buffered in an ``asyncio.Queue``.
+
+    A client too slow to drain its queue is marked as overflowed: it missed
+    events and must reload the house state.
+    """
+
+    def __init__(self, house_id, loop, max_size):
+        self.house_id = house_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        """Return the next event, or None after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker(BaseBroker):
+    """Broker delivering events to the subscribers of the current process."""
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, house_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(int(house_id), ()))
+        for subscription in subscriptions:
+            # Les abonnés vivent dans la boucle d'événements ASGI, pas dans le thread de la requête
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Boucle fermée : l'abonné a disparu sans se désabonner
+                self.unsubscribe(subscription)
+
+    def subscribe(self, house_id):
+        subscription = Subscription(int(house_id), asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(subscription.house_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.house_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.house_id, None)
+
+    def subscriber_count(self, house_id):
+        with self._lock:
+            return len(self._subscriptions.get(int(house_id), ()))
+
+
+@functools.lru_cache(maxsize=None)
+def get_broker():
+    """Return the broker configured by ``HOUSEWORK_EVENT_BROKER``, built once per process."""
+    return import_string(getattr(settings, 'HOUSEWORK_EVENT_BROKER', 'housework.events.InProcessBroker'))()
+
+
+def publish_on_commit(house_ids, event_type, **data):
+    """Publish an event to each house once the current transaction commits (immediately outside one)."""
+    house_ids = [int(house_id) for house_id in house_ids]
+    if not house_ids:
+        return
+
+    def publish():
+        broker = get_broker()
+        for house_id in house_ids:
+            broker.publish(house_id, dict(data, type=event_type, house=house_id))
+
+    transaction.on_commit(publish)
@@ -0,0 +1,103 @@
+"""
+Streaming exports of a house's data as CSV or NDJSON.
+
+Rows are read with ``values_list`` and ``iterator(chunk_size=...)`` and written
+one chunk at a time, so memory stays flat whatever the history length and the
+first bytes leave before the whole history is read.
+"""
+import csv
+import datetime
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import History, HouseworkMadeTaskArchive, Score
+from .pagination import ordered_union
+
+# Jeu de données exportable : colonnes publiées et colonnes lues
+DATASETS = {
+    'made_tasks': (
+        ['id', 'date', 'name', 'user', 'possible_task', 'score', 'duration', 'difficulty'],
+        ['id', 'date', 'name', 'user_id', 'possible_task_id', 'score', 'duration', 'difficulty'],
+    ),
+    'scores': (
+        ['user', 'score', 'corrected_score', 'involvement'],
+        ['user_id', 'score', 'corrected_score', 'involvement'],
+    ),
+    'history': (
+        ['date', 'log'],
+        ['action_date', 'action_log'],
+    ),
+}
+
+# Début de cellule qu'un tableur lirait comme une formule
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def dataset_rows(house_id, dataset, chunk_size):
+    """Yield the rows (tuples of the dataset's columns) of one dataset of a house."""
+    columns = DATASETS[dataset][1]
+    if dataset == 'made_tasks':
+        # Historique complet : tâches récentes et archivées
+        sources = [source.values_list(*columns) for source in HouseworkMadeTaskArchive.sources(house_id)]
+        queryset = ordered_union(sources)
+    elif dataset == 'scores':
+        queryset = Score.objects.filter(hearth_id=house_id).order_by('user_id').values_list(*columns)
+    else:
+        queryset = History.objects.filter(house_id=house_id).order_by('action_date', 'id').values_list(*columns)
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """File-like object whose ``write`` returns the line, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    """
+    Format a CSV cell: dates as ISO 8601 (``Z`` for UTC), like the JSON responses of the API.
+
+    Free text (task names, history) starting like a formula is prefixed with
+    ``'`` so that a spreadsheet shows it as text instead of evaluating it.
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return JSONEncoder().default(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(house_id, dataset, chunk_size):
+    """Yield one dataset of a house as CSV, header first."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(DATASETS[dataset][0])
+    buffer = []
+    for row in dataset_rows(house_id, dataset, chunk_size):
+        buffer.append(writer.writerow([format_value(value) for value in row]))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_ndjson(house_id, datasets, chunk_size):
+    """Yield datasets of a house as NDJSON: one object per line, with its ``type``."""
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for dataset in datasets:
+        fields = DATASETS[dataset][0]
+        buffer = []
+        for row in dataset_rows(house_id, dataset, chunk_size):
+            buffer.append(encoder.encode({'type': dataset, **dict(zip(fields, row))}) + '\n')
+            if len(buffer) >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+        if buffer:
+            yield ''.join(buffer)
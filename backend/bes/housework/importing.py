@@ -0,0 +1,213 @@
+"""
+Bulk import of past made tasks from NDJSON or CSV.
+
+Rows are read one at a time from a stream, validated against the house's
+possible tasks and members loaded once, and inserted with ``bulk_create`` in
+one short transaction per batch, together with the score update of each
+member of the batch: an interrupted import leaves the committed batches and
+their scores consistent. Invalid rows are skipped and reported with their line
+number.
+
+Each row has a ``date`` (ISO 8601 datetime, or date), the possible task as
+``possible_task`` (id) or ``name``, and optionally the ``user`` id of the member
+who did it (the importer by default; only the house admin imports for others).
+"""
+import bisect
+import codecs
+import csv
+import datetime
+import json
+import time
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .events import publish_on_commit
+from .models import House, HouseworkDailyRollup, HouseworkMadeTask, HouseworkPossibleTask, Score, ScorePeriod
+
+FORMATS = ('ndjson', 'csv')
+
+
+class ImportRowError(ValueError):
+    """A row that cannot be imported, reported with its line number."""
+
+
+def read_rows(stream, import_format):
+    """
+    Yield ``(line number, row)`` for each record of a binary stream of lines.
+
+    ``row`` is a dict, or an ``ImportRowError`` for a line that cannot be decoded.
+    """
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if import_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, ImportRowError("Invalid JSON")
+            continue
+        yield line_number, row if isinstance(row, dict) else ImportRowError("A JSON object is expected")
+
+
+class MadeTaskImporter:
+    """
+    Import the made tasks of one house.
+
+    :param house: The house the tasks are imported into.
+    :param user: The importing member, default author of the rows.
+    :param batch_size: Rows inserted, with their score updates, per transaction.
+    :param max_errors: Row errors listed in the report (all of them are counted).
+    """
+
+    def __init__(self, house, user, batch_size=1000, max_errors=100):
+        self.house = house
+        self.user = user
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.can_import_for_others = house.admin_user_id == user.id
+
+        # Chargés une fois : la validation d'une ligne ne fait aucune requête
+        possible_tasks = list(HouseworkPossibleTask.objects.filter(house=house))
+        self.possible_tasks = {str(task.id): task for task in possible_tasks}
+        self.possible_tasks_by_name = {task.name.strip().lower(): task for task in possible_tasks}
+        self.member_ids = set(
+            House.hearthUsers.through.objects.filter(house_id=house.id).values_list('user_id', flat=True)
+        )
+
+        # Périodes d'implication de chaque membre : le score d'une tâche va à la période de sa date
+        score_users = dict(Score.objects.filter(hearth=house).values_list('id', 'user_id'))
+        periods = {}
+        for period in ScorePeriod.ordered(ScorePeriod.objects.filter(score_id__in=score_users)):
+            periods.setdefault(score_users[period.score_id], []).append(period)
+        self.periods = {
+            user_id: ([period.pk for period in user_periods], [period.start for period in user_periods])
+            for user_id, user_periods in periods.items()
+        }
+
+    def parse(self, row):
+        """Return the made task of a valid row, or raise ``ImportRowError``."""
+        value = str(row.get('date') or '').strip()
+        try:
+            day = parse_date(value)
+            date = datetime.datetime.combine(day, datetime.time.min) if day else parse_datetime(value)
+        except ValueError:
+            date = None
+        if date is None:
+            raise ImportRowError("Invalid or missing date")
+        if timezone.is_naive(date):
+            date = timezone.make_aware(date)
+        if date > timezone.now():
+            raise ImportRowError("Date in the future")
+
+        if row.get('possible_task') not in (None, ''):
+            possible_task = self.possible_tasks.get(str(row['possible_task']).strip())
+        else:
+            possible_task = self.possible_tasks_by_name.get(str(row.get('name') or '').strip().lower())
+        if possible_task is None:
+            raise ImportRowError("Possible task not found in this house")
+
+        user_id = self.user.id
+        if row.get('user') not in (None, ''):
+            try:
+                user_id = int(row['user'])
+            except (TypeError, ValueError):
+                raise ImportRowError("Invalid user")
+            if user_id not in self.member_ids:
+                raise ImportRowError("User is not a member of the house")
+            if user_id != self.user.id and not self.can_import_for_others:
+                raise ImportRowError("Only the house admin imports tasks of other members")
+
+        return HouseworkMadeTask(
+            name=possible_task.name,
+            date=date,
+            duration=possible_task.duration,
+            difficulty=possible_task.difficulty,
+            user_id=user_id,
+            house_id=self.house.id,
+            possible_task=possible_task,
+            # Le score est basé sur la durée et la difficulté de la tâche possible
+            score=possible_task.duration * possible_task.difficulty,
+        )
+
+    def period_id(self, made_task):
+        if made_task.user_id not in self.periods:
+            return None
+        period_ids, starts = self.periods[made_task.user_id]
+        # La première période n'a pas de début : la recherche commence à la deuxième
+        return period_ids[bisect.bisect_right(starts, made_task.date, lo=1) - 1]
+
+    def run(self, rows, dry_run=False):
+        """
+        Validate and insert ``(line number, row)`` pairs with their scores.
+
+        Each batch commits its rows and the score deltas of its members in one
+        transaction. If the import stops, the rows of the committed batches are
+        imported and counted in the scores; the rest are not.
+
+        :param dry_run: Only validate the rows.
+        :return: A report with the rows imported, the row errors and the throughput.
+        """
+        started = time.perf_counter()
+        imported = rows_read = error_count = 0
+        errors = []
+        # Par membre : nombre de tâches et somme des scores importés
+        counts, scores = {}, {}
+        batch = []
+
+        def flush():
+            if batch and not dry_run:
+                # Par membre du lot : somme des scores par période d'implication
+                totals = {}
+                for made_task in batch:
+                    user_totals = totals.setdefault(made_task.user_id, {})
+                    period_id = self.period_id(made_task)
+                    user_totals[period_id] = user_totals.get(period_id, 0) + made_task.score
+                with transaction.atomic():
+                    HouseworkMadeTask.objects.bulk_create(batch)
+                    HouseworkDailyRollup.record(batch)
+                    # Scores dans la même transaction que les tâches : un arrêt ne les désaccorde pas
+                    for user_id, period_totals in totals.items():
+                        Score.add_imported_scores(self.house.id, user_id, period_totals)
+            batch.clear()
+
+        for line_number, row in rows:
+            rows_read += 1
+            try:
+                if isinstance(row, ImportRowError):
+                    raise row
+                made_task = self.parse(row)
+            except ImportRowError as error:
+                error_count += 1
+                if len(errors) < self.max_errors:
+                    errors.append({'line': line_number, 'error': str(error)})
+                continue
+            batch.append(made_task)
+            imported += 1
+            counts[made_task.user_id] = counts.get(made_task.user_id, 0) + 1
+            scores[made_task.user_id] = scores.get(made_task.user_id, 0) + made_task.score
+            if len(batch) >= self.batch_size:
+                flush()
+        flush()
+
+        if not dry_run:
+            # Un seul événement de tâches par membre pour tout l'import
+            for user_id, count in counts.items():
+                publish_on_commit([self.house.id], 'made_tasks', user=user_id, count=count, score=scores[user_id])
+
+        elapsed = time.perf_counter() - started
+        return {
+            'imported': 0 if dry_run else imported,
+            'valid': imported,
+            'rows': rows_read,
+            'error_count': error_count,
+            'errors': errors,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(rows_read / elapsed) if elapsed else None,
+        }
@@ -0,0 +1,47 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from housework.models import House, HouseworkMadeTaskArchive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the made tasks older than the archival horizon to the archive table, house by house, "
+        "in short batches. Totals and date-range reads are unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.HOUSEWORK_ARCHIVE_AFTER_DAYS,
+                            help="Archive the made tasks older than this many days.")
+        parser.add_argument('--house', type=int, action='append', help="Only archive this house id (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows moved per transaction.")
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to wait between batches, to leave room to the application.")
+
+    def handle(self, *args, **options):
+        # Limite à minuit : un jour n'est jamais coupé entre les deux tables
+        day = timezone.localdate() - datetime.timedelta(days=options['days'])
+        before = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+        house_ids = options['house'] or list(House.objects.order_by('id').values_list('id', flat=True))
+        started = time.perf_counter()
+        total = 0
+
+        for house_id in house_ids:
+            moved = 0
+            for count in HouseworkMadeTaskArchive.archive_house(house_id, before, batch_size=options['batch_size']):
+                moved += count
+                if options['pause']:
+                    time.sleep(options['pause'])
+            total += moved
+            if moved:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"house {house_id}: {moved} made tasks archived ({total / elapsed:.0f} rows/s overall)")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} made tasks dated before {before:%Y-%m-%d} archived in {elapsed:.1f} s."
+        ))
@@ -0,0 +1,106 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import get_runner, override_settings
+
+from housework.benchmark import ROUTES, BenchmarkRunner, check_results, compare_authentication, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every API route against a seeded test database, record p50/p95 latency and SQL "
+        "query counts, and fail on query budgets or latency regressions against a JSON baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30, help="Timed requests per series.")
+        parser.add_argument('--repeats', type=int, default=3, help="Timed series per route (p50: median of their medians).")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per route.")
+        parser.add_argument('--routes', nargs='*', help="Only run these route names.")
+        parser.add_argument('--houses', type=int, default=20)
+        parser.add_argument('--members', type=int, default=5)
+        parser.add_argument('--possible-tasks', type=int, default=10)
+        parser.add_argument('--made-tasks', type=int, default=20000)
+        parser.add_argument(
+            '--baseline', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'),
+            help="JSON baseline to compare with (written when missing).",
+        )
+        parser.add_argument('--update-baseline', action='store_true', help="Overwrite the baseline with this run.")
+        parser.add_argument(
+            '--max-regression', type=float, default=25.0,
+            help="Allowed p50 latency increase against the baseline, in percent.",
+        )
+        parser.add_argument(
+            '--min-regression-ms', type=float, default=2.0,
+            help="Allowed p50 latency increase in milliseconds, whatever the percentage (noise of fast routes).",
+        )
+        parser.add_argument('--output', help="Also write the results of this run to this JSON file.")
+
+    def handle(self, *args, **options):
+        routes = [route for route in ROUTES if not options['routes'] or route.name in options['routes']]
+        if not routes:
+            raise CommandError("No route matches --routes.")
+
+        # Runner des tests : base de test et cache temporaire, séparés de ceux du serveur
+        runner = get_runner(settings)(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        # Connexions sans limite (appelées bien plus souvent que la limite par IP ou par compte)
+        # et images envoyées dans un répertoire temporaire
+        media_root = tempfile.TemporaryDirectory()
+        benchmark_settings = override_settings(REST_FRAMEWORK=dict(
+            settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={'login_ip': None, 'login_account': None},
+        ), MEDIA_ROOT=media_root.name)
+        benchmark_settings.enable()
+        try:
+            cache.clear()
+            self.stdout.write("Seeding the benchmark dataset...")
+            context = seed_dataset(
+                houses=options['houses'], members=options['members'],
+                possible_tasks=options['possible_tasks'], made_tasks=options['made_tasks'],
+            )
+            bench = BenchmarkRunner(context, iterations=options['iterations'], warmup=options['warmup'],
+                                    repeats=options['repeats'])
+            results = {}
+            for route in routes:
+                results[route.name] = bench.run(route)
+                self.write_result(route.name, results[route.name])
+            authentication = compare_authentication(context['user'])
+            for name, result in authentication.items():
+                self.stdout.write(
+                    f"auth   {name:32} p50 {result['p50_us']:9.1f} us  p95 {result['p95_us']:9.1f} us  "
+                    f"{result['queries']:3d} queries"
+                )
+        finally:
+            benchmark_settings.disable()
+            media_root.cleanup()
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        report = {'dataset': context['dataset'], 'iterations': options['iterations'], 'repeats': options['repeats'],
+                  'routes': results, 'authentication': authentication}
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+
+        baseline_path = Path(options['baseline'])
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+        failures = check_results(results, routes, baseline, options['max_regression'], options['min_regression_ms'])
+
+        if options['update_baseline'] or baseline is None:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Baseline written to {baseline_path}")
+
+        if failures:
+            raise CommandError("Benchmark failed:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"{len(routes)} routes within budget."))
+
+    def write_result(self, name, result):
+        self.stdout.write(
+            f"{result['method']:6} {name:32} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+            f"{result['queries']:3d}/{result['query_budget']:<3d} queries  {result['statuses']}"
+        )
@@ -0,0 +1,232 @@
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from housework.benchmark import BENCHMARK_PASSWORD, percentile, seed_dataset
+
+SERVERS = {
+    'wsgi': ['bes.wsgi:application'],
+    'asgi': ['bes.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the read endpoints served by gunicorn (WSGI, sync views) and by gunicorn with uvicorn "
+        "workers (ASGI, async views) with the same number of workers, and report throughput, latency "
+        "and the resident memory of each server. The login scenario measures the login throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Workers per server: the shared memory budget.")
+        parser.add_argument('--concurrency', type=int, default=32, help="Concurrent client connections.")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds of load per endpoint and server.")
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--host', default=settings.ALLOWED_HOSTS[0], help="Host header sent to the servers.")
+        parser.add_argument('--servers', nargs='*', choices=list(SERVERS), default=list(SERVERS))
+        parser.add_argument('--scenario', choices=['reads', 'login'], default='reads')
+        parser.add_argument(
+            '--throttled', action='store_true',
+            help="Keep the login throttling (by default disabled to measure the hashing capacity).",
+        )
+        parser.add_argument(
+            '--seed', action='store_true',
+            help="Migrate and seed the configured database first (use a scratch SQLITE_NAME).",
+        )
+        parser.add_argument('--made-tasks', type=int, default=20000)
+        parser.add_argument('--username', default='bench-0', help="Member whose token is used for the requests.")
+        parser.add_argument('--output', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            call_command('migrate', verbosity=0)
+            self.stdout.write("Seeding the benchmark dataset...")
+            seed_dataset(made_tasks=options['made_tasks'])
+
+        user = User.objects.filter(username=options['username']).first()
+        house = user.house_set.order_by('id').first() if user else None
+        if house is None:
+            raise CommandError(f"No house for user {options['username']!r}: run with --seed.")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        results = {}
+        for index, name in enumerate(options['servers']):
+            port = options['port'] + index
+            process = self.start_server(name, port, options['workers'], options)
+            try:
+                if options['scenario'] == 'login':
+                    endpoints = self.login_endpoints()
+                else:
+                    endpoints = self.endpoints(house.id, asynchronous=name == 'asgi')
+                for endpoint, path, bodies in endpoints:
+                    result = self.load(process, f'http://127.0.0.1:{port}{path}', token, bodies, options)
+                    results.setdefault(endpoint, {})[name] = result
+                    self.stdout.write(
+                        f"{name} {endpoint:12} {result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+                        f"p95 {result['p95_ms']:8.2f} ms  rss {result['rss_mb']:7.1f} MB  {result['statuses']}"
+                    )
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({
+                'workers': options['workers'], 'concurrency': options['concurrency'], 'endpoints': results,
+            }, indent=2))
+
+    def endpoints(self, house_id, asynchronous):
+        prefix = '/housework/api/async' if asynchronous else '/housework/api'
+        date_range = urlencode({
+            'house_id': house_id, 'start_date': '2000-01-01T00:00:00Z', 'end_date': '2100-01-01T00:00:00Z',
+            'page_size': 200,
+        })
+        return [
+            ('houses', f'{prefix}/houses/', None),
+            ('tasks', f'{prefix}/house/{house_id}/tasks/', None),
+            ('scores', f'{prefix}/house/{house_id}/scores/', None),
+            ('date-range', f'{prefix}/tasks/made/date-range/?{date_range}', None),
+        ]
+
+    def login_endpoints(self):
+        """Logins of the seeded members, and logins with unknown emails (same hashing cost)."""
+        emails = list(User.objects.filter(username__startswith='bench-').values_list('email', flat=True))
+        known = itertools.cycle([{'email': email, 'password': BENCHMARK_PASSWORD} for email in emails])
+        unknown = ({'email': f'unknown-{index}@example.com', 'password': BENCHMARK_PASSWORD}
+                   for index in itertools.count())
+        return [
+            ('login', '/account/login/', known),
+            ('login-unknown', '/account/login/', unknown),
+        ]
+
+    def start_server(self, name, port, workers, options):
+        command = [
+            sys.executable, '-m', 'gunicorn', *SERVERS[name],
+            '--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+        ]
+        env = dict(os.environ)
+        if options['scenario'] == 'login' and not options['throttled']:
+            env.update(LOGIN_IP_THROTTLE_RATE='', LOGIN_ACCOUNT_THROTTLE_RATE='')
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"{name} server exited with status {process.returncode}.")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return process
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f"{name} server did not start on port {port}.")
+
+    def load(self, process, url, token, bodies, options):
+        """
+        Request ``url`` from ``concurrency`` threads for ``duration`` seconds, sampling the server memory.
+
+        Requests are GETs, or POSTs of the JSON documents yielded by ``bodies``.
+        """
+        # Le nom d'hôte doit faire partie de ALLOWED_HOSTS
+        headers = {'Authorization': f'Bearer {token}', 'Host': options['host'], 'Content-Type': 'application/json'}
+        latencies = []
+        statuses = {}
+        lock = threading.Lock()
+        peak_rss = 0
+        deadline = time.monotonic() + options['duration']
+
+        def client():
+            while time.monotonic() < deadline:
+                data = None
+                if bodies is not None:
+                    with lock:
+                        data = json.dumps(next(bodies)).encode()
+                started = time.perf_counter()
+                try:
+                    request = urllib.request.Request(url, data=data, headers=headers)
+                    with urllib.request.urlopen(request, timeout=30) as response:
+                        response.read()
+                        status = response.status
+                except urllib.error.HTTPError as error:
+                    status = error.code
+                except OSError:
+                    status = 'error'
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            for _ in range(options['concurrency']):
+                executor.submit(client)
+            while time.monotonic() < deadline:
+                peak_rss = max(peak_rss, process_tree_rss(process.pid))
+                time.sleep(0.25)
+        elapsed = time.monotonic() - started
+
+        return {
+            'requests': len(latencies),
+            'rps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'rss_mb': peak_rss / (1024 * 1024),
+            'statuses': {str(status): count for status, count in statuses.items()},
+        }
+
+
+def process_tree(pid):
+    """Ids of a process and all its living descendants (Linux ``/proc``)."""
+    pids = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        pids.append(current)
+    return pids
+
+
+def proc_memory(path, field):
+    """Value, in bytes, of a ``field: <n> kB`` line of a ``/proc`` file, 0 if the process is gone."""
+    try:
+        with open(path) as lines:
+            for line in lines:
+                if line.startswith(f'{field}:'):
+                    return int(line.split()[1]) * 1024
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return 0
+
+
+def process_tree_rss(pid):
+    """Resident memory, in bytes, of a process and all its descendants (Linux ``/proc``)."""
+    return sum(proc_memory(f'/proc/{current}/status', 'VmRSS') for current in process_tree(pid))
+
+
+def process_tree_pss(pid):
+    """
+    Proportional memory, in bytes, of a process and all its descendants.
+
+    Unlike the RSS, pages shared by several processes (copy-on-write after a
+    fork) are divided between them instead of being counted in each.
+    """
+    return sum(proc_memory(f'/proc/{current}/smaps_rollup', 'Pss') for current in process_tree(pid))
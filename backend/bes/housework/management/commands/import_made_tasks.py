@@ -0,0 +1,46 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from housework.importing import FORMATS, MadeTaskImporter, read_rows
+from housework.models import House
+
+
+class Command(BaseCommand):
+    help = (
+        "Import past made tasks of a house from an NDJSON or CSV file, in batches committed together with "
+        "the score updates of their members. Invalid rows are skipped and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import ('-' for the standard input).")
+        parser.add_argument('--house', type=int, required=True, help="House id.")
+        parser.add_argument('--user', type=int, help="Member id of the rows without user (the house admin by default).")
+        parser.add_argument('--format', choices=FORMATS, help="Guessed from the file extension by default.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows inserted per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the rows.")
+
+    def handle(self, *args, **options):
+        house = House.objects.filter(pk=options['house']).first()
+        if house is None:
+            raise CommandError(f"House {options['house']} not found.")
+        user = User.objects.filter(pk=options['user'] or house.admin_user_id).first()
+        if user is None:
+            raise CommandError("No importing user: pass --user.")
+        import_format = options['format'] or ('csv' if options['path'].endswith('.csv') else 'ndjson')
+
+        importer = MadeTaskImporter(house, user, batch_size=options['batch_size'], max_errors=1000)
+        if options['path'] == '-':
+            report = importer.run(read_rows(sys.stdin.buffer, import_format), dry_run=options['dry_run'])
+        else:
+            with open(options['path'], 'rb') as stream:
+                report = importer.run(read_rows(stream, import_format), dry_run=options['dry_run'])
+
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        verb = "valid" if options['dry_run'] else "imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['valid']} of {report['rows']} rows {verb} in {report['seconds']:.1f} s "
+            f"({report['rows_per_second'] or 0} rows/s), {report['error_count']} errors."
+        ))
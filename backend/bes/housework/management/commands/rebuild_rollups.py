@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from housework.models import HouseworkDailyRollup
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily made-task rollups from the raw HouseworkMadeTask rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--house', type=int, help="Only rebuild the rollups of this house id.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows inserted per bulk insert.")
+
+    def handle(self, *args, **options):
+        created = HouseworkDailyRollup.rebuild(house_id=options['house'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{created} daily rollups rebuilt."))
@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from housework.models import House, Score
+
+
+def init_worker():
+    # Processus lancé par spawn/forkserver : Django n'y est pas encore configuré
+    django.setup()
+    # Processus forké : ne pas réutiliser les connexions du parent
+    connections.close_all()
+
+
+def rebuild_house(house_id, chunk_size, dry_run):
+    started = time.perf_counter()
+    rows, changes = Score.rebuild_house(house_id, chunk_size=chunk_size, dry_run=dry_run)
+    return house_id, rows, changes, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the scores from the raw HouseworkMadeTask rows, house by house in parallel worker "
+        "processes. Each house is rewritten in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--house', type=int, action='append', help="Only rebuild this house id (repeatable).")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes; 1 rebuilds in the current process.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Made tasks fetched per round trip.")
+        parser.add_argument('--dry-run', action='store_true', help="Print the differences without writing them.")
+
+    def handle(self, *args, **options):
+        house_ids = options['house'] or list(House.objects.order_by('id').values_list('id', flat=True))
+        arguments = (options['chunk_size'], options['dry_run'])
+        started = time.perf_counter()
+        total_rows = total_changes = 0
+
+        if options['workers'] > 1 and len(house_ids) > 1:
+            # Les processus fils ouvrent leurs propres connexions
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as executor:
+                futures = [executor.submit(rebuild_house, house_id, *arguments) for house_id in house_ids]
+                results = (future.result() for future in as_completed(futures))
+                for done, result in enumerate(results, 1):
+                    total_rows, total_changes = self.report(done, len(house_ids), result, started,
+                                                            total_rows, total_changes, options)
+        else:
+            for done, house_id in enumerate(house_ids, 1):
+                total_rows, total_changes = self.report(done, len(house_ids), rebuild_house(house_id, *arguments),
+                                                        started, total_rows, total_changes, options)
+
+        elapsed = time.perf_counter() - started
+        verb = "would change" if options['dry_run'] else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(house_ids)} houses, {total_rows} made tasks in {elapsed:.1f} s "
+            f"({total_rows / elapsed if elapsed else 0:.0f} rows/s), {total_changes} scores {verb}."
+        ))
+
+    def report(self, done, total, result, started, total_rows, total_changes, options):
+        house_id, rows, changes, elapsed = result
+        total_rows += rows
+        total_changes += len(changes)
+        rate = total_rows / (time.perf_counter() - started)
+        self.stdout.write(
+            f"[{done}/{total}] house {house_id}: {rows} made tasks in {elapsed:.2f} s, "
+            f"{len(changes)} scores to fix ({rate:.0f} rows/s overall)"
+        )
+        if options['dry_run'] or options['verbosity'] > 1:
+            for change in changes:
+                (old_score, new_score), (old_corrected, new_corrected) = change['score'], change['corrected_score']
+                self.stdout.write(
+                    f"  user {change['user']}: score {old_score} -> {new_score}, "
+                    f"corrected_score {old_corrected:.2f} -> {new_corrected:.2f}"
+                )
+        return total_rows, total_changes
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark_servers import process_tree, process_tree_pss, process_tree_rss
+
+PROFILES = {
+    'default': {'BES_LEAN': 'False'},
+    'lean': {'BES_LEAN': 'True'},
+}
+
+# Exécuté dans un interpréteur neuf : étapes du démarrage d'un worker
+STARTUP_SCRIPT = '''
+import json, os, sys, time
+
+def rss():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+stages = [('interpreter', 0.0, len(sys.modules), rss())]
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bes.settings')
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+stages.append(('django setup', time.perf_counter() - started, len(sys.modules), rss()))
+from django.urls import get_resolver
+get_resolver().url_patterns
+stages.append(('urlconf', time.perf_counter() - started, len(sys.modules), rss()))
+from bes.lazy import load_views
+load_views()
+stages.append(('all views', time.perf_counter() - started, len(sys.modules), rss()))
+print(json.dumps(stages))
+'''
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the start-up cost of a worker for each runtime profile (default, lean): time, imported "
+        "modules and resident memory after Django setup, after the URLconf and once every view is imported, "
+        "and the slowest top-level imports. --server also starts gunicorn with and without preloading and "
+        "reports the time to the first response and the memory of the master and its workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='*', choices=list(PROFILES), default=list(PROFILES))
+        parser.add_argument('--top', type=int, default=10, help="Slowest top-level imports listed per profile.")
+        parser.add_argument('--server', action='store_true', help="Also measure gunicorn start-up and memory.")
+        parser.add_argument('--workers', type=int, default=2, help="Gunicorn workers for --server.")
+        parser.add_argument('--port', type=int, default=8200)
+        parser.add_argument('--output', help="Also write the results to this JSON file (track them per release).")
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in options['profiles']:
+            result = results[profile] = self.measure_startup(profile, options['top'])
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{profile} profile"))
+            for stage in result['stages']:
+                self.stdout.write(
+                    f"  {stage['stage']:<14} {stage['seconds'] * 1000:8.1f} ms  {stage['modules']:5d} modules  "
+                    f"rss {stage['rss_mb']:6.1f} MB"
+                )
+            for name, seconds in result['slowest_imports']:
+                self.stdout.write(f"    import {name:<40} {seconds * 1000:8.1f} ms")
+
+            if options['server']:
+                for preload in (False, True):
+                    server = self.measure_server(profile, preload, options)
+                    result.setdefault('servers', {})['preload' if preload else 'no-preload'] = server
+                    self.stdout.write(
+                        f"  gunicorn {'preload' if preload else 'no preload':<11} first response "
+                        f"{server['first_response_s'] * 1000:7.0f} ms  rss {server['rss_mb']:6.1f} MB  "
+                        f"pss {server['pss_mb']:6.1f} MB  ({server['processes']} processes)"
+                    )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2))
+
+    def environment(self, profile):
+        env = dict(os.environ, **PROFILES[profile])
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'bes.settings')
+        return env
+
+    def measure_startup(self, profile, top):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR, env=self.environment(profile), capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f"{profile} profile failed to start:\n{completed.stderr[-2000:]}")
+        stages = [
+            {'stage': stage, 'seconds': seconds, 'modules': modules, 'rss_mb': rss / (1024 * 1024)}
+            for stage, seconds, modules, rss in json.loads(completed.stdout.strip().splitlines()[-1])
+        ]
+
+        # Imports de premier niveau (les moins indentés), temps cumulé avec leurs dépendances
+        imports = [match.groups() for match in map(IMPORT_TIME.match, completed.stderr.splitlines()) if match]
+        level = min((len(indent) for _, _, indent, _ in imports), default=0)
+        slowest = sorted(
+            ((name, int(cumulative) / 1e6) for _, cumulative, indent, name in imports if len(indent) == level),
+            key=lambda item: item[1], reverse=True,
+        )[:top]
+        return {'stages': stages, 'slowest_imports': slowest}
+
+    def measure_server(self, profile, preload, options):
+        port = options['port']
+        env = dict(self.environment(profile), GUNICORN_PRELOAD=str(preload))
+        command = [
+            sys.executable, '-m', 'gunicorn', 'bes.wsgi:application',
+            '--workers', str(options['workers']), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+        ]
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        try:
+            first_response = self.wait_first_response(process, port, started)
+            # Chaque worker sert quelques requêtes : ses vues sont importées (ou déjà partagées)
+            for _ in range(options['workers'] * 4):
+                self.get(port)
+            time.sleep(0.5)
+            return {
+                'first_response_s': first_response,
+                'rss_mb': process_tree_rss(process.pid) / (1024 * 1024),
+                'pss_mb': process_tree_pss(process.pid) / (1024 * 1024),
+                'processes': len(process_tree(process.pid)),
+            }
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    def wait_first_response(self, process, port, started):
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"gunicorn exited with status {process.returncode}.")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            except OSError:
+                time.sleep(0.05)
+                continue
+            self.get(port)
+            return time.perf_counter() - started
+        raise CommandError(f"gunicorn did not start on port {port}.")
+
+    def get(self, port):
+        request = urllib.request.Request(f'http://127.0.0.1:{port}/housework/api/houses/',
+                                         headers={'Host': settings.ALLOWED_HOSTS[0]})
+        try:
+            urllib.request.urlopen(request, timeout=30).read()
+        except urllib.error.HTTPError:
+            # 401 sans jeton : la vue a quand même été chargée et exécutée
+            pass
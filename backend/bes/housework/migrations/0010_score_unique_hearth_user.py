@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+def merge_duplicate_scores(apps, schema_editor):
+    """
+    Merge duplicated (hearth, user) scores into the oldest entry before adding the constraint.
+
+    Every duplicate was created with the join bonus of the member (the highest
+    corrected score of the house at the time): its ``corrected_score`` is that
+    bonus plus its own task scores divided by its involvement. The merged entry
+    keeps the highest bonus once and adds up the task scores.
+    """
+    Score = apps.get_model('housework', 'Score')
+    duplicates = (
+        Score.objects.values('hearth_id', 'user_id')
+        .annotate(entries=models.Count('id'))
+        .filter(entries__gt=1)
+    )
+    for duplicate in duplicates:
+        scores = list(
+            Score.objects.filter(hearth_id=duplicate['hearth_id'], user_id=duplicate['user_id']).order_by('id')
+        )
+        kept = scores[0]
+        # Score des tâches de chaque entrée, pondéré par son implication
+        weighted = [score.score / (score.involvement or 1) for score in scores]
+        bonus = max(score.corrected_score - task_score for score, task_score in zip(scores, weighted))
+        kept.score = sum(score.score for score in scores)
+        kept.corrected_score = bonus + sum(weighted)
+        kept.save(update_fields=['score', 'corrected_score'])
+        Score.objects.filter(id__in=[score.id for score in scores[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housework', '0009_rename_house_score_hearth_score_involvement_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_scores, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='score',
+            constraint=models.UniqueConstraint(fields=('hearth', 'user'), name='unique_score_per_hearth_user'),
+        ),
+    ]
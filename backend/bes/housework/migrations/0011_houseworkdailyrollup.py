@@ -0,0 +1,72 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:59
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def build_rollups(apps, schema_editor):
+    """
+    Build the rollups of the made tasks logged before this migration.
+
+    Same totals as ``HouseworkDailyRollup.rebuild``: the totals of whole days are
+    read from the rollups only, so the history would be missing without them.
+    """
+    HouseworkMadeTask = apps.get_model('housework', 'HouseworkMadeTask')
+    HouseworkDailyRollup = apps.get_model('housework', 'HouseworkDailyRollup')
+    rows = (
+        HouseworkMadeTask.objects.annotate(day=TruncDate('date'))
+        .values('house_id', 'user_id', 'possible_task_id', 'day')
+        .annotate(
+            rollup_count=models.Count('id'),
+            rollup_score=models.Sum('score'),
+            rollup_duration=models.Sum('duration'),
+        )
+        .order_by()
+        .iterator(chunk_size=1000)
+    )
+    batch = []
+    for row in rows:
+        batch.append(HouseworkDailyRollup(
+            house_id=row['house_id'],
+            user_id=row['user_id'],
+            possible_task_id=row['possible_task_id'],
+            day=row['day'],
+            count=row['rollup_count'],
+            total_score=row['rollup_score'],
+            total_duration=row['rollup_duration'],
+        ))
+        if len(batch) >= 1000:
+            HouseworkDailyRollup.objects.bulk_create(batch)
+            batch = []
+    HouseworkDailyRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('housework', '0010_score_unique_hearth_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HouseworkDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('total_score', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0)),
+                ('house', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='housework.house')),
+                ('possible_task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='housework.houseworkpossibletask')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='houseworkdailyrollup',
+            constraint=models.UniqueConstraint(fields=('house', 'user', 'possible_task', 'day'), name='unique_rollup_per_house_user_task_day'),
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
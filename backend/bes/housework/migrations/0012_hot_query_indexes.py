@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housework', '0011_houseworkdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='houseworkdailyrollup',
+            index=models.Index(fields=['house', 'day'], name='rollup_house_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='houseworkmadetask',
+            index=models.Index(fields=['house', 'date'], name='made_task_house_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='houseworkmadetask',
+            index=models.Index(fields=['house', 'user', 'date'], name='made_task_house_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['hearth', 'corrected_score'], name='score_hearth_corrected_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_score_periods(apps, schema_editor):
+    """
+    Give every score a first involvement period holding its whole history.
+
+    The part of the corrected score that the history does not explain (the
+    score given when joining the hearth) becomes the bonus.
+    """
+    Score = apps.get_model('housework', 'Score')
+    ScorePeriod = apps.get_model('housework', 'ScorePeriod')
+    scores, periods = [], []
+    for score in Score.objects.order_by('id').iterator(chunk_size=1000):
+        score.bonus = score.corrected_score - score.score / score.involvement
+        scores.append(score)
+        periods.append(ScorePeriod(score_id=score.id, involvement=score.involvement, total=score.score))
+        if len(scores) >= 1000:
+            Score.objects.bulk_update(scores, ['bonus'])
+            ScorePeriod.objects.bulk_create(periods)
+            scores, periods = [], []
+    Score.objects.bulk_update(scores, ['bonus'])
+    ScorePeriod.objects.bulk_create(periods)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housework', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='score',
+            name='bonus',
+            field=models.FloatField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ScorePeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(blank=True, null=True)),
+                ('end', models.DateTimeField(blank=True, null=True)),
+                ('involvement', models.FloatField(default=1.0)),
+                ('total', models.IntegerField(default=0)),
+                ('score', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='periods', to='housework.score')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['score', 'end'], name='score_period_score_end_idx')],
+            },
+        ),
+        migrations.RunPython(fill_score_periods, migrations.RunPython.noop),
+    ]
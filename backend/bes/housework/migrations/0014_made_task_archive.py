@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('housework', '0013_score_periods'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HouseworkMadeTaskArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('score', models.IntegerField()),
+                ('date', models.DateTimeField()),
+                ('duration', models.IntegerField()),
+                ('difficulty', models.IntegerField()),
+                ('house', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='housework.house')),
+                ('possible_task', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='housework.houseworkpossibletask')),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['house', 'date'], name='made_task_archive_date_idx')],
+            },
+        ),
+    ]
@@ -1,10 +1,19 @@
+import bisect
 import datetime
-from django.db import models
+import heapq
+import itertools
+import math
+import os
+from django.db import models, transaction
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
 from django.contrib.auth.models import User
 import uuid
 from django.utils import timezone
 from django.conf import settings
 
+from .caching import bump_house_versions, get_archive_bound, raise_archive_bound
+from .events import publish_on_commit
+
 
 class House(models.Model):
     """
@@ -19,6 +28,11 @@ class House(models.Model):
     :type admin_user: models.ForeignKey
     :type imageName: models.CharField
     """
+
+    def house_directory_path(instance, filename):
+        # File will be uploaded to MEDIA_ROOT/house_<id>/<filename>
+        return os.path.join("house_{0}".format(instance.id), filename)
+
     name = models.CharField(max_length=200)
     hearthUsers = models.ManyToManyField(User)
     admin_user = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, related_name='house_admin_set')
@@ -84,7 +98,14 @@ class HouseworkPossibleTask(models.Model):
     house = models.ForeignKey(House, on_delete=models.CASCADE)
     duration = models.IntegerField()
     difficulty = models.IntegerField()
-    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Maison au chargement : une tâche déplacée change aussi le catalogue de son ancienne maison
+        instance.loaded_house_id = instance.__dict__.get('house_id')
+        return instance
+
     def __str__(self):
         return self.name
 
@@ -116,11 +137,110 @@ class HouseworkMadeTask(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     house = models.ForeignKey(House, on_delete=models.CASCADE)
     possible_task = models.ForeignKey(HouseworkPossibleTask, on_delete=models.CASCADE, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['house', 'date'], name='made_task_house_date_idx'),
+            models.Index(fields=['house', 'user', 'date'], name='made_task_house_user_date_idx'),
+        ]
     
     def __str__(self):
         return self.name
     
 
+class HouseworkMadeTaskArchive(models.Model):
+    """
+    Made task older than the archival horizon, moved out of ``HouseworkMadeTask``.
+
+    The columns are those of ``HouseworkMadeTask``, in the same order and with
+    the same ids, so both tables are read together with a UNION. Only the
+    (house, date) index is kept, without foreign key constraints, so the table
+    stays compact. The daily rollups are not touched by the archival: totals
+    stay exact.
+
+    :param name: The task name (ex: Dishes, Cooking, ...).
+    :param score: The evaluated value of the task.
+    :param date: The date when the task has been done.
+    :param duration: The time the task ordinary takes to be done.
+    :param difficulty: The difficulty of the task.
+    :param user: The person who has done the task.
+    :param house: The place where the task has been done.
+    :type name: models.CharField
+    :type score: models.IntegerField
+    :type date: models.DateTimeField
+    :type duration: models.IntegerField
+    :type difficulty: models.IntegerField
+    :type user: models.ForeignKey
+    :type house: models.ForeignKey
+    """
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    score = models.IntegerField()
+    date = models.DateTimeField()
+    duration = models.IntegerField()
+    difficulty = models.IntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False, db_index=False, related_name='+')
+    house = models.ForeignKey(House, on_delete=models.CASCADE, db_constraint=False, db_index=False, related_name='+')
+    possible_task = models.ForeignKey(HouseworkPossibleTask, on_delete=models.CASCADE, null=True, blank=True,
+                                      db_constraint=False, db_index=False, related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['house', 'date'], name='made_task_archive_date_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def sources(house_id, start=None):
+        """
+        Return the querysets holding the made tasks of a house dated from ``start``:
+        the hot table, and the archive only when ``start`` reaches into it.
+        """
+        sources = [HouseworkMadeTask.objects.filter(house_id=house_id)]
+        bound = get_archive_bound(house_id)
+        if bound is not None and (start is None or start < bound):
+            sources.append(HouseworkMadeTaskArchive.objects.filter(house_id=house_id))
+        return sources
+
+    @staticmethod
+    def date_range(house_id, start, end):
+        """Return the querysets of the made tasks of a house between two dates (inclusive), see ``sources``."""
+        return [
+            source.filter(date__gte=start, date__lte=end) for source in HouseworkMadeTaskArchive.sources(house_id, start)
+        ]
+
+    @staticmethod
+    def archive_house(house_id, before, batch_size=1000):
+        """
+        Move the made tasks of a house dated before ``before`` to the archive.
+
+        Rows are moved in batches of ``batch_size``, read in (house, date) index
+        order: each batch copies then deletes its rows in its own short
+        transaction, so the hot table is never locked for long. Readers are told
+        to look into the archive before the rows of each batch move.
+
+        :return: An iterator over the number of rows moved by each batch.
+        """
+        fields = [field.attname for field in HouseworkMadeTask._meta.concrete_fields]
+        while True:
+            with transaction.atomic():
+                # À chaque lot : la limite a pu expirer et être relue de l'archive entre deux lots
+                raise_archive_bound(house_id, before)
+                rows = list(
+                    HouseworkMadeTask.objects.filter(house_id=house_id, date__lt=before)
+                    .order_by('date', 'id').values_list(*fields)[:batch_size]
+                )
+                if not rows:
+                    return
+                HouseworkMadeTaskArchive.objects.bulk_create(
+                    [HouseworkMadeTaskArchive(**dict(zip(fields, row))) for row in rows]
+                )
+                HouseworkMadeTask.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            yield len(rows)
+
+
 class History(models.Model):
     """
     Object that keep trace of changes done by users.
@@ -143,31 +263,509 @@ class History(models.Model):
 class Score(models.Model):
     """
     Object that keeps track of the amount of efforts.
+
+    ``corrected_score`` is ``bonus`` plus, for each involvement period, the score
+    logged during the period divided by its involvement (see ``ScorePeriod``).
+
     :param user: The person who has done the efforts.
     :param hearth: The place where this score exists.
+    :param involvement: The current involvement (the one of the last period).
     :param score: The amount of realized works.
     :param corrected_score: Score after recalculation.
+    :param bonus: The corrected score given when joining the hearth.
     :type hearth: models.ForeignKey
     :type user: models.ForeignKey
+    :type involvement: models.FloatField
     :type score: models.IntegerField
     :type corrected_score: models.IntegerField
+    :type bonus: models.FloatField
     """
     hearth = models.ForeignKey(House, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     involvement = models.FloatField(default=1.0)
     score = models.IntegerField(default=0)
     corrected_score = models.FloatField(default=0)
+    bonus = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hearth', 'user'], name='unique_score_per_hearth_user'),
+        ]
+        indexes = [
+            models.Index(fields=['hearth', 'corrected_score'], name='score_hearth_corrected_idx'),
+        ]
 
     @staticmethod
     def create_score_for_user(user, hearth):
-        """Create a new score entry for a user in a hearth."""
+        """Create a new score entry for a user in a hearth, or return the existing one."""
         highest_corrected_score = Score.objects.filter(hearth=hearth).order_by('-corrected_score').first()
         corrected_score = highest_corrected_score.corrected_score if highest_corrected_score else 0
-        return Score.objects.create(user=user, hearth=hearth, corrected_score=corrected_score)
-    
+        score, created = Score.objects.get_or_create(
+            user=user, hearth=hearth, defaults={'corrected_score': corrected_score, 'bonus': corrected_score}
+        )
+        return score
+
+    @staticmethod
+    def add_task_scores(user, hearth_id, task_score):
+        """
+        Add a task score to a user's score in a hearth, creating the entry if needed.
+
+        The unique (hearth, user) constraint makes ``get_or_create`` safe when two
+        requests create the entry at the same time.
+        """
+        score, created = Score.objects.get_or_create(user=user, hearth_id=hearth_id)
+        score.update_scores(task_score)
+        return score
+
     def update_scores(self, task_score):
-        """Update the score and corrected_score for a user."""
-        self.score += task_score
-        self.corrected_score += task_score * (1 / self.involvement)
-        self.save()
+        """
+        Update the score and corrected_score for a user with an atomic database increment.
+
+        The task score is also added to the current involvement period. The score
+        row, locked by its increment, serializes the concurrent updates of the period.
+        """
+        with transaction.atomic(savepoint=False):
+            Score.objects.filter(pk=self.pk).update(
+                score=models.F('score') + task_score,
+                corrected_score=models.F('corrected_score') + models.Value(float(task_score)) / models.F('involvement'),
+            )
+            self.refresh_from_db(fields=['score', 'corrected_score', 'involvement'])
+            if not ScorePeriod.objects.filter(score_id=self.pk, end__isnull=True).update(
+                total=models.F('total') + task_score,
+            ):
+                # Score créé sans période : la première couvre tout son historique
+                ScorePeriod.objects.create(score_id=self.pk, involvement=self.involvement, total=self.score)
+        bump_house_versions([self.hearth_id])
+        publish_on_commit([self.hearth_id], 'score', user=self.user_id, score=self.score,
+                          corrected_score=self.corrected_score)
+
+    @staticmethod
+    def add_imported_scores(hearth_id, user_id, period_totals):
+        """
+        Add the scores of imported past tasks to a member's score, in a single update.
+
+        :param hearth_id: The hearth of the tasks.
+        :param user_id: The member who did them.
+        :param period_totals: The sums of task scores per involvement period id
+            (None when the score had no period yet).
+        :return: The updated score.
+        """
+        with transaction.atomic():
+            score, created = Score.objects.select_for_update().get_or_create(user_id=user_id, hearth_id=hearth_id)
+            periods = {period.pk: period for period in score.periods.all()}
+            current = next((period for period in periods.values() if period.end is None), None)
+            if current is None:
+                current = ScorePeriod.objects.create(score=score, involvement=score.involvement, total=score.score)
+                periods[current.pk] = current
+            changed = {}
+            for period_id, total in period_totals.items():
+                # Période fusionnée entre-temps par un changement d'implication : rebuild_scores la corrige
+                period = periods.get(period_id, current)
+                period.total += total
+                changed[period.pk] = period
+            ScorePeriod.objects.bulk_update(list(changed.values()), ['total'])
+            score.score += sum(period_totals.values())
+            score.corrected_score = score.bonus + sum(period.total / period.involvement for period in periods.values())
+            score.save(update_fields=['score', 'corrected_score'])
+            bump_house_versions([hearth_id])
+            publish_on_commit([hearth_id], 'score', user=user_id, score=score.score,
+                              corrected_score=score.corrected_score)
+        return score
+
+    @staticmethod
+    def change_involvement(user_id, hearth_id, involvement, effective_from):
+        """
+        Change the involvement of a member from a date, which may be in the past.
+
+        Only the affected periods are recomputed: the period containing
+        ``effective_from`` is split by summing its made tasks after that date,
+        and the later periods are merged into the new one from their stored sums.
+
+        :param user_id: The member whose involvement changes.
+        :param hearth_id: The hearth concerned.
+        :param involvement: The new involvement, strictly positive.
+        :param effective_from: When the new involvement takes effect (not in the future).
+        :return: The updated score.
+        """
+        with transaction.atomic():
+            score, created = Score.objects.select_for_update().get_or_create(user_id=user_id, hearth_id=hearth_id)
+            periods = ScorePeriod.ordered(score.periods.all())
+            if not periods:
+                periods = [ScorePeriod.objects.create(score=score, involvement=score.involvement, total=score.score)]
+
+            kept = [period for period in periods if period.end is not None and period.end <= effective_from]
+            affected = periods[len(kept):]
+            split = affected[0]
+            carried = sum(period.total for period in affected[1:])
+            if split.start is not None and split.start >= effective_from:
+                carried += split.total
+            else:
+                # Seules les tâches de la période coupée sont relues
+                moved = 0
+                for made_tasks in HouseworkMadeTaskArchive.sources(hearth_id, effective_from):
+                    made_tasks = made_tasks.filter(user_id=user_id, date__gte=effective_from)
+                    if split.end is not None:
+                        made_tasks = made_tasks.filter(date__lt=split.end)
+                    moved += made_tasks.aggregate(total=models.Sum('score'))['total'] or 0
+                split.total -= moved
+                split.end = effective_from
+                split.save(update_fields=['total', 'end'])
+                kept.append(split)
+                affected = affected[1:]
+                carried += moved
+            ScorePeriod.objects.filter(pk__in=[period.pk for period in affected]).delete()
+            kept.append(ScorePeriod.objects.create(score=score, start=effective_from, involvement=involvement,
+                                                   total=carried))
+
+            score.involvement = involvement
+            score.corrected_score = score.bonus + sum(period.total / period.involvement for period in kept)
+            score.save(update_fields=['involvement', 'corrected_score'])
+            bump_house_versions([hearth_id])
+            publish_on_commit([hearth_id], 'score', user=score.user_id, score=score.score,
+                              corrected_score=score.corrected_score)
+        return score
+
+    @staticmethod
+    def rebuild_house(house_id, chunk_size=2000, dry_run=False):
+        """
+        Recompute the scores of a house from its made tasks.
+
+        The made tasks, archived ones included, are streamed in chunks and summed
+        per user and involvement period, so the memory used does not depend on
+        the history size. The scores, corrected scores and period sums are then
+        exact again; the ``bonus`` given when joining is kept.
+
+        The house's scores are locked and rewritten in one transaction: a task
+        logged meanwhile waits for the rewrite and is then added on top of it.
+
+        :param house_id: The house whose scores are rebuilt.
+        :param chunk_size: Made tasks fetched per database round trip.
+        :param dry_run: Only compute the differences, without writing them.
+        :return: The number of made tasks read and the list of changes, one dict
+            per user with the ``(old, new)`` pairs of ``score`` and ``corrected_score``.
+        """
+        with transaction.atomic():
+            scores = Score.objects.filter(hearth_id=house_id)
+            if not dry_run:
+                scores = scores.select_for_update()
+            current = {score.user_id: score for score in scores}
+            periods = {}
+            for period in ScorePeriod.ordered(ScorePeriod.objects.filter(score__hearth_id=house_id)):
+                periods.setdefault(period.score_id, []).append(period)
+
+            # Par membre : score, périodes, début des périodes et sommes recalculées
+            accounts = {}
+
+            def account(user_id):
+                if user_id not in accounts:
+                    score = current.get(user_id) or Score(hearth_id=house_id, user_id=user_id)
+                    user_periods = periods.get(score.pk) or [ScorePeriod(involvement=score.involvement)]
+                    accounts[user_id] = (score, user_periods, [period.start for period in user_periods],
+                                         [0] * len(user_periods))
+                return accounts[user_id]
+
+            rows = 0
+            made_tasks = itertools.chain.from_iterable(
+                source.order_by().values_list('user_id', 'score', 'date').iterator(chunk_size=chunk_size)
+                for source in HouseworkMadeTaskArchive.sources(house_id)
+            )
+            for user_id, task_score, date in made_tasks:
+                score, user_periods, starts, sums = account(user_id)
+                # La première période n'a pas de début : la recherche commence à la deuxième
+                sums[bisect.bisect_right(starts, date, lo=1) - 1] += task_score
+                rows += 1
+
+            changes, stale_periods = [], []
+            for user_id in sorted(current.keys() | accounts.keys()):
+                score, user_periods, starts, sums = account(user_id)
+                total = sum(sums)
+                corrected_score = score.bonus + sum(
+                    period_sum / period.involvement for period, period_sum in zip(user_periods, sums)
+                )
+                stale = [(period, period_sum) for period, period_sum in zip(user_periods, sums)
+                         if period.total != period_sum]
+                if score.pk is not None and score.score == total and not stale and \
+                        math.isclose(score.corrected_score, corrected_score, abs_tol=1e-9):
+                    continue
+                changes.append({
+                    'user': user_id,
+                    'score': (score.score, total),
+                    'corrected_score': (score.corrected_score, corrected_score),
+                })
+                score.score, score.corrected_score = total, corrected_score
+                for period, period_sum in stale:
+                    period.total = period_sum
+                    stale_periods.append((score, period))
+
+            if not dry_run and changes:
+                for change in changes:
+                    score = accounts[change['user']][0]
+                    if score.pk is None:
+                        # Rare (tâches sans score) : insertion unitaire pour obtenir la clé sur tous les SGBD
+                        score.save()
+                    else:
+                        score.save(update_fields=['score', 'corrected_score'])
+                updated = [period for score, period in stale_periods if period.pk is not None]
+                created = []
+                for score, period in stale_periods:
+                    if period.pk is None:
+                        period.score = score
+                        created.append(period)
+                ScorePeriod.objects.bulk_update(updated, ['total'], batch_size=chunk_size)
+                ScorePeriod.objects.bulk_create(created, batch_size=chunk_size)
+                bump_house_versions([house_id])
+                for change in changes:
+                    publish_on_commit([house_id], 'score', user=change['user'], score=change['score'][1],
+                                      corrected_score=change['corrected_score'][1])
+        return rows, changes
+
+
+class ScorePeriod(models.Model):
+    """
+    Involvement of a member in a hearth over a span of time, with the score logged meanwhile.
+
+    The periods of a score follow each other: the first one has no start, the
+    current one has no end.
+
+    :param score: The score the period belongs to.
+    :param start: When the involvement takes effect.
+    :param end: When the next period starts.
+    :param involvement: The weight applied to the tasks of the period.
+    :param total: The sum of the scores of the tasks logged during the period.
+    :type score: models.ForeignKey
+    :type start: models.DateTimeField
+    :type end: models.DateTimeField
+    :type involvement: models.FloatField
+    :type total: models.IntegerField
+    """
+    score = models.ForeignKey(Score, on_delete=models.CASCADE, related_name='periods')
+    start = models.DateTimeField(null=True, blank=True)
+    end = models.DateTimeField(null=True, blank=True)
+    involvement = models.FloatField(default=1.0)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['score', 'end'], name='score_period_score_end_idx'),
+        ]
+
+    @staticmethod
+    def ordered(periods):
+        """Return the periods sorted by start, the first period (without start) first."""
+        return list(periods.order_by('score_id', models.F('start').asc(nulls_first=True)))
+
+
+class HouseworkDailyRollup(models.Model):
+    """
+    Daily totals of made tasks, per house, user and possible task.
+
+    Maintained incrementally when tasks are logged and rebuildable from the raw
+    ``HouseworkMadeTask`` rows, so period totals cost O(days) instead of O(tasks).
+
+    :param house: The place where the tasks have been done.
+    :param user: The person who has done the tasks.
+    :param possible_task: The possible task the made tasks come from.
+    :param day: The day (in the current time zone) when the tasks have been done.
+    :param count: The number of made tasks.
+    :param total_score: The sum of the made tasks scores.
+    :param total_duration: The sum of the made tasks durations.
+    :type house: models.ForeignKey
+    :type user: models.ForeignKey
+    :type possible_task: models.ForeignKey
+    :type day: models.DateField
+    :type count: models.IntegerField
+    :type total_score: models.IntegerField
+    :type total_duration: models.IntegerField
+    """
+    house = models.ForeignKey(House, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    possible_task = models.ForeignKey(HouseworkPossibleTask, on_delete=models.CASCADE, null=True, blank=True)
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+    total_score = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0)
+
+    # Groupements possibles : expression sur les rollups, expression sur les tâches réalisées
+    GROUPS = {
+        'user': (models.F('user_id'), models.F('user_id')),
+        'possible_task': (models.F('possible_task_id'), models.F('possible_task_id')),
+        'day': (models.F('day'), TruncDate('date')),
+        'week': (TruncWeek('day'), TruncWeek('date', output_field=models.DateField())),
+        'month': (TruncMonth('day'), TruncMonth('date', output_field=models.DateField())),
+    }
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['house', 'user', 'possible_task', 'day'], name='unique_rollup_per_house_user_task_day'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['house', 'day'], name='rollup_house_day_idx'),
+        ]
+
+    @staticmethod
+    def record(made_tasks):
+        """
+        Add freshly created made tasks to their daily rollups.
+
+        Uses a constant number of queries whatever the batch size: missing rollups
+        are inserted empty, then every affected rollup is incremented by a single
+        conditional UPDATE.
+        """
+        increments = {}
+        for made_task in made_tasks:
+            key = (
+                made_task.house_id,
+                made_task.user_id,
+                made_task.possible_task_id,
+                timezone.localtime(made_task.date).date(),
+            )
+            count, score, duration = increments.get(key, (0, 0, 0))
+            increments[key] = (count + 1, score + made_task.score, duration + made_task.duration)
+        if not increments:
+            return
+
+        HouseworkDailyRollup.objects.bulk_create(
+            [
+                HouseworkDailyRollup(house_id=house_id, user_id=user_id, possible_task_id=possible_task_id, day=day)
+                for house_id, user_id, possible_task_id, day in increments
+            ],
+            ignore_conflicts=True,
+        )
+        rollup_ids = {}
+        candidates = HouseworkDailyRollup.objects.filter(
+            house_id__in={key[0] for key in increments},
+            user_id__in={key[1] for key in increments},
+            day__in={key[3] for key in increments},
+        ).values_list('id', 'house_id', 'user_id', 'possible_task_id', 'day')
+        for rollup_id, *key in candidates:
+            if tuple(key) in increments:
+                rollup_ids[rollup_id] = increments[tuple(key)]
+
+        def increment(position):
+            return models.Case(
+                *[models.When(pk=rollup_id, then=models.Value(values[position])) for rollup_id, values in rollup_ids.items()],
+                default=models.Value(0),
+            )
+
+        HouseworkDailyRollup.objects.filter(pk__in=rollup_ids).update(
+            count=models.F('count') + increment(0),
+            total_score=models.F('total_score') + increment(1),
+            total_duration=models.F('total_duration') + increment(2),
+        )
+
+    @staticmethod
+    def rebuild(house_id=None, batch_size=1000):
+        """Recompute the rollups (of one house, or all of them) from the raw made tasks, archived ones included."""
+        sources = [HouseworkMadeTask.objects.all(), HouseworkMadeTaskArchive.objects.all()]
+        rollups = HouseworkDailyRollup.objects.all()
+        if house_id is not None:
+            sources = [source.filter(house_id=house_id) for source in sources]
+            rollups = rollups.filter(house_id=house_id)
+
+        def daily_totals(made_tasks):
+            # Même tri pour les deux tables : leurs totaux d'un même jour se suivent à la fusion
+            return (
+                made_tasks.annotate(day=TruncDate('date'))
+                .values('house_id', 'user_id', 'possible_task_id', 'day')
+                .annotate(
+                    rollup_count=models.Count('id'),
+                    rollup_score=models.Sum('score'),
+                    rollup_duration=models.Sum('duration'),
+                )
+                .order_by('house_id', 'user_id', models.F('possible_task_id').asc(nulls_first=True), 'day')
+                .iterator(chunk_size=batch_size)
+            )
+
+        def rollup_key(row):
+            possible_task_id = row['possible_task_id']
+            return row['house_id'], row['user_id'], possible_task_id is not None, possible_task_id or 0, row['day']
+
+        created = 0
+        with transaction.atomic():
+            rollups.delete()
+            batch = []
+            rows = heapq.merge(*(daily_totals(source) for source in sources), key=rollup_key)
+            for key, group in itertools.groupby(rows, key=rollup_key):
+                group = list(group)
+                batch.append(HouseworkDailyRollup(
+                    house_id=group[0]['house_id'],
+                    user_id=group[0]['user_id'],
+                    possible_task_id=group[0]['possible_task_id'],
+                    day=group[0]['day'],
+                    count=sum(row['rollup_count'] for row in group),
+                    total_score=sum(row['rollup_score'] for row in group),
+                    total_duration=sum(row['rollup_duration'] for row in group),
+                ))
+                if len(batch) >= batch_size:
+                    created += len(HouseworkDailyRollup.objects.bulk_create(batch))
+                    batch = []
+            created += len(HouseworkDailyRollup.objects.bulk_create(batch))
+        return created
+
+    @staticmethod
+    def totals(house_id, start, end, group_by=()):
+        """
+        Return count, score and duration totals of a house between two datetimes (inclusive).
+
+        Whole days inside the period are read from the rollups; only the partial
+        days at both ends of the period are read from the raw made tasks.
+
+        :param group_by: Names among ``GROUPS`` keys to group the totals by: ``user``,
+            ``possible_task`` and the periods ``day``, ``week`` (starting on Monday) and ``month``.
+        :return: A list of dicts with the group keys, ``count``, ``total_score`` and ``total_duration``,
+            sorted by group keys.
+        """
+        # Alias distincts des noms de champs (``user`` est déjà un champ du modèle)
+        rollup_groups = {f'group_{name}': HouseworkDailyRollup.GROUPS[name][0] for name in group_by}
+        made_task_groups = {f'group_{name}': HouseworkDailyRollup.GROUPS[name][1] for name in group_by}
+        fields = list(rollup_groups)
+        start, end = (moment if timezone.is_aware(moment) else timezone.make_aware(moment) for moment in (start, end))
+        first_day = timezone.localtime(start).date()
+        if timezone.localtime(start) != _start_of_day(first_day):
+            first_day += datetime.timedelta(days=1)
+        last_day = timezone.localtime(end + datetime.timedelta(microseconds=1)).date() - datetime.timedelta(days=1)
+
+        results = {}
+
+        def accumulate(queryset, groups, **sums):
+            # Sans groupement, un seul agrégat (values() vide grouperait par toutes les colonnes)
+            rows = queryset.values(**groups).annotate(**sums).order_by() if groups else [queryset.aggregate(**sums)]
+            for row in rows:
+                if not row['count']:
+                    continue
+                key = tuple(row[field] for field in fields)
+                count, score, duration = results.get(key, (0, 0, 0))
+                results[key] = (count + row['count'], score + (row['score'] or 0), duration + (row['duration'] or 0))
+
+        if first_day <= last_day:
+            accumulate(
+                HouseworkDailyRollup.objects.filter(house_id=house_id, day__gte=first_day, day__lte=last_day),
+                rollup_groups,
+                count=models.Sum('count'), score=models.Sum('total_score'), duration=models.Sum('total_duration'),
+            )
+            edges = (
+                models.Q(date__gte=start, date__lt=_start_of_day(first_day))
+                | models.Q(date__gte=_start_of_day(last_day + datetime.timedelta(days=1)), date__lte=end)
+            )
+        else:
+            edges = models.Q(date__gte=start, date__lte=end)
+        for made_tasks in HouseworkMadeTaskArchive.sources(house_id, start):
+            accumulate(
+                made_tasks.filter(edges),
+                made_task_groups,
+                count=models.Count('id'), score=models.Sum('score'), duration=models.Sum('duration'),
+            )
+
+        return [
+            dict(zip(group_by, key), count=count, total_score=score, total_duration=duration)
+            for key, (count, score, duration) in sorted(
+                results.items(), key=lambda item: [(value is None, value) for value in item[0]]
+            )
+        ]
+
 
+def _start_of_day(day):
+    """Return the aware datetime at midnight of a day, in the current time zone."""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
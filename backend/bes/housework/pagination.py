@@ -0,0 +1,139 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+
+class DateIdKeysetPagination(BasePagination):
+    """
+    Keyset pagination on ``(date, id)``.
+
+    Each page is read with an index range on the ordering columns instead of an
+    OFFSET, so the cost of a page does not depend on its position. The cursor is
+    the opaque, url-safe encoding of the last ``(date, id)`` of the previous page.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'HOUSEWORK_PAGE_SIZE', 200)
+        self.max_page_size = getattr(settings, 'HOUSEWORK_MAX_PAGE_SIZE', 1000)
+        self.current_page_size = self.page_size
+        self.next_position = None
+        self.request = None
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.build_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """
+        Return the queryset of the requested page, with one extra row to detect the next page.
+
+        ``queryset`` may also be a list of querysets with the same columns (recent
+        and archived made tasks): the cursor filters each one, then their union is paged.
+        """
+        self.request = request
+        self.current_page_size = self.get_page_size(request)
+        querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            date, last_id = self.decode_cursor(encoded)
+            querysets = [queryset.filter(Q(date__gt=date) | Q(date=date, id__gt=last_id)) for queryset in querysets]
+        return ordered_union(querysets)[:self.current_page_size + 1]
+
+    def build_page(self, rows):
+        """Trim the rows fetched from ``page_queryset`` to the page and remember the next position."""
+        if len(rows) > self.current_page_size:
+            rows = rows[:self.current_page_size]
+            self.next_position = (rows[-1].date, rows[-1].id)
+        return rows
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(*self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def encode_cursor(self, date, last_id):
+        position = json.dumps([date, last_id], cls=JSONEncoder)
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, encoded):
+        try:
+            date, last_id = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            date = parse_datetime(date)
+            last_id = int(last_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return date, last_id
+
+
+def ordered_union(querysets):
+    """Combine querysets with the same columns (``UNION ALL``), ordered by ``(date, id)``."""
+    if len(querysets) == 1:
+        return querysets[0].order_by('date', 'id')
+    # Pas d'ORDER BY dans les membres d'une union
+    first, *others = (queryset.order_by() for queryset in querysets)
+    return first.union(*others, all=True).order_by('date', 'id')
+
+
+def stream_json_array(queryset, serializer_class, chunk_size):
+    """
+    Yield a queryset as a JSON array, one chunk of rows at a time.
+
+    Rows are read with ``iterator(chunk_size=...)`` and serialized one by one, so
+    memory stays constant whatever the number of rows.
+    """
+    serializer = serializer_class()
+    encoder = JSONEncoder()
+    yield '['
+    buffer = []
+    first = True
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        buffer.append(encoder.encode(serializer.to_representation(instance)))
+        if len(buffer) >= chunk_size:
+            yield ('' if first else ',') + ','.join(buffer)
+            first = False
+            buffer = []
+    if buffer:
+        yield ('' if first else ',') + ','.join(buffer)
+    yield ']'
+
+
+async def astream_json_array(queryset, serializer_class, chunk_size):
+    """Asynchronous version of ``stream_json_array``, reading rows with ``aiterator()``."""
+    serializer = serializer_class()
+    encoder = JSONEncoder()
+    yield '['
+    buffer = []
+    first = True
+    async for instance in queryset.aiterator(chunk_size=chunk_size):
+        buffer.append(encoder.encode(serializer.to_representation(instance)))
+        if len(buffer) >= chunk_size:
+            yield ('' if first else ',') + ','.join(buffer)
+            first = False
+            buffer = []
+    if buffer:
+        yield ('' if first else ',') + ','.join(buffer)
+    yield ']'
@@ -1,20 +1,41 @@
 from rest_framework import serializers
+from bes import media
 from .models import House, HouseworkPossibleTask, HouseworkMadeTask, History, Score
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
+
+class VariantUrlsField(serializers.Field):
+    """URLs of the pre-resized variants of an uploaded image, by side in pixels (None for bundled images)."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return media.variant_urls(value)
 
 class UserHouseDetailSerializer(serializers.ModelSerializer):
     avatar = serializers.CharField(source='profile.avatar', read_only=True)
+    avatarUrls = VariantUrlsField(source='profile.avatar')
     class Meta:
         model = User
-        fields = ['id', 'username', 'avatar']
+        fields = ['id', 'username', 'avatar', 'avatarUrls']
 
 class HouseSerializer(serializers.ModelSerializer):
     hearthUsers = UserHouseDetailSerializer(many=True, required=False)
+    imageUrls = VariantUrlsField(source='imageName')
 
     class Meta:
         model = House
-        fields = ['id', 'name', 'hearthUsers', 'imageName', 'admin_user']
+        fields = ['id', 'name', 'hearthUsers', 'imageName', 'imageUrls', 'admin_user']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load members and their profiles along with the houses, in a fixed number of queries."""
+        return queryset.prefetch_related(
+            Prefetch('hearthUsers', queryset=User.objects.select_related('profile'))
+        )
 
     def update(self, instance, validated_data):
         user = self.context['request'].user  # Récupère l'utilisateur à partir du contexte de la requête
@@ -36,6 +57,23 @@ class ScoreSerializer(serializers.ModelSerializer):
         fields = ['user', 'hearth', 'score', 'corrected_score', 'involvement']
 
 
+class InvolvementSerializer(serializers.Serializer):
+    """A change of involvement: ``user`` defaults to the caller, ``effective_from`` to now."""
+    user = serializers.IntegerField(required=False)
+    involvement = serializers.FloatField()
+    effective_from = serializers.DateTimeField(required=False)
+
+    def validate_involvement(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("L'implication doit être strictement positive.")
+        return value
+
+    def validate_effective_from(self, value):
+        if value > timezone.now():
+            raise serializers.ValidationError("L'implication ne peut pas changer dans le futur.")
+        return value
+
+
 class HouseworkPossibleTaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = HouseworkPossibleTask
@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .caching import bump_house_versions, invalidate_memberships, invalidate_possible_task_catalogs
+from .events import publish_on_commit
+from .models import House, HouseworkPossibleTask, Score
+
+
+@receiver(m2m_changed, sender=House.hearthUsers.through)
+def house_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the cached memberships and house versions and publish an event when members are added or removed."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    change = {'post_add': 'added', 'post_remove': 'removed', 'pre_clear': 'removed'}[action]
+    if reverse:
+        # Modification depuis l'utilisateur (user.house_set)
+        house_ids = list(pk_set if action != 'pre_clear' else instance.house_set.values_list('id', flat=True))
+        invalidate_memberships([instance.pk])
+        bump_house_versions(house_ids)
+        publish_on_commit(house_ids, 'members', change=change, users=[instance.pk])
+    else:
+        if action == 'pre_clear':
+            user_ids = list(instance.hearthUsers.values_list('id', flat=True))
+        else:
+            user_ids = list(pk_set)
+        invalidate_memberships(user_ids)
+        bump_house_versions([instance.pk])
+        publish_on_commit([instance.pk], 'members', change=change, users=sorted(user_ids))
+
+
+@receiver(pre_delete, sender=House)
+def house_deleted(sender, instance, **kwargs):
+    """Invalidate the cached memberships of the members of a deleted house."""
+    invalidate_memberships(instance.hearthUsers.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=House)
+def house_saved(sender, instance, **kwargs):
+    bump_house_versions([instance.pk])
+
+
+@receiver(post_save, sender=HouseworkPossibleTask)
+@receiver(post_delete, sender=HouseworkPossibleTask)
+@receiver(post_save, sender=Score)
+@receiver(post_delete, sender=Score)
+def house_content_changed(sender, instance, **kwargs):
+    """
+    Change the version of the house a possible task or a score belongs to.
+
+    The possible-task catalogs are only invalidated here, whatever made the
+    change (API, admin, cascade deletion of a house).
+    """
+    if sender is Score:
+        bump_house_versions([instance.hearth_id])
+        return
+    house_ids = {instance.house_id, getattr(instance, 'loaded_house_id', None)} - {None}
+    bump_house_versions(house_ids)
+    invalidate_possible_task_catalogs(house_ids)
+    instance.loaded_house_id = instance.house_id
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender='account.ClaimsUser')
+@receiver(post_save, sender='account.UserProfile')
+def member_changed(sender, instance, **kwargs):
+    """Member names and avatars are part of the house details: change the version of their houses."""
+    user_id = instance.pk if isinstance(instance, User) else instance.user_id
+    bump_house_versions(House.hearthUsers.through.objects.filter(user_id=user_id).values_list('house_id', flat=True))
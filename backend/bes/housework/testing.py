@@ -0,0 +1,44 @@
+"""
+Fixtures shared by the test suites of the apps.
+
+Not a test module: the runner does not collect it, and the test modules that
+import ``HouseTestCase`` only inherit from it.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import House, HouseworkPossibleTask
+
+
+class HouseTestMixin:
+    """
+    Alice, admin of the house 'Maison' with its possible task 'Vaisselle', and an API client authenticated as her.
+
+    Sets ``self.user``, ``self.house``, ``self.dishes`` and ``self.client``. The cache is cleared first: it is
+    shared with the other tests (and the other processes) and would keep their memberships and versions.
+
+    :cvar member: Whether alice is a member of the house (with her score), not only its admin.
+    :cvar possible_task: Whether the house has the 'Vaisselle' possible task (``self.dishes`` is None otherwise).
+    """
+    member = True
+    possible_task = True
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.house = House.objects.create(name='Maison', admin_user=self.user)
+        if self.member:
+            self.house.add_user(self.user)
+        self.dishes = None
+        if self.possible_task:
+            self.dishes = HouseworkPossibleTask.objects.create(name='Vaisselle', house=self.house, duration=10,
+                                                               difficulty=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class HouseTestCase(HouseTestMixin, TestCase):
+    """``TestCase`` starting from alice and her house (see ``HouseTestMixin``)."""
@@ -1,3 +1,1125 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import io
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from account.models import UserProfile
+from bes.lazy import LAZY_VIEWS, load_views
+from bes.routers import PIN_KEY
+from bes.testing import cache_environment
+
+from . import benchmark, caching
+from .caching import ARCHIVE_BOUND_KEY, HOUSE_VERSION_KEY, MEMBERSHIP_KEY, get_house_version, is_house_member
+from .events import InProcessBroker
+from .importing import MadeTaskImporter
+from .models import (
+    History, House, HouseInvitation, HouseworkDailyRollup, HouseworkMadeTask, HouseworkMadeTaskArchive, HouseworkPossibleTask,
+    Score,
+)
+from .testing import HouseTestCase, HouseTestMixin
+
+
+def cache_get_in_other_process(key):
+    """Return the repr of a cache entry read by a new interpreter, as another worker would read it."""
+    script = 'import sys, django; django.setup(); from django.core.cache import cache; print(repr(cache.get(sys.argv[1])))'
+    completed = subprocess.run(
+        [sys.executable, '-c', script, key], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        env=dict(cache_environment(), DJANGO_SETTINGS_MODULE='bes.settings'),
+    )
+    return completed.stdout.strip()
+
+
+class ScoreConcurrencyTests(HouseTestMixin, TransactionTestCase):
+    """Score increments must not be lost when several workers log tasks at once."""
+
+    threads = 8
+    increments_per_thread = 25
+
+    def _hammer(self, barrier, errors):
+        try:
+            barrier.wait()
+            for _ in range(self.increments_per_thread):
+                # SQLite verrouille la table au lieu d'attendre : on rejoue l'incrément refusé
+                while True:
+                    try:
+                        Score.add_task_scores(self.user, self.house.id, 3)
+                        break
+                    except OperationalError:
+                        continue
+        except Exception as exc:  # pragma: no cover - remonté dans le test
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_increments_are_exact(self):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+        workers = [threading.Thread(target=self._hammer, args=(barrier, errors)) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        score = Score.objects.get(user=self.user, hearth=self.house)
+        expected = self.threads * self.increments_per_thread * 3
+        self.assertEqual(score.score, expected)
+        self.assertAlmostEqual(score.corrected_score, expected)
+        self.assertEqual(Score.objects.filter(user=self.user, hearth=self.house).count(), 1)
+
+
+class ScoreTests(HouseTestCase):
+    member = False
+
+    def test_add_task_scores_creates_a_single_entry(self):
+        Score.add_task_scores(self.user, self.house.id, 10)
+        score = Score.add_task_scores(self.user, self.house.id, 5)
+        self.assertEqual(score.score, 15)
+        self.assertEqual(Score.objects.filter(user=self.user, hearth=self.house).count(), 1)
+
+    def test_corrected_score_is_weighted_by_involvement(self):
+        score = Score.create_score_for_user(self.user, self.house)
+        Score.objects.filter(pk=score.pk).update(involvement=0.5)
+        score.update_scores(10)
+        self.assertEqual(score.score, 10)
+        self.assertAlmostEqual(score.corrected_score, 20.0)
+
+    def test_rebuild_fixes_drifted_scores(self):
+        bob = User.objects.create_user('bob', 'bob@example.com', 'password')
+        for user, task_score in [(self.user, 10), (self.user, 6), (bob, 4)]:
+            HouseworkMadeTask.objects.create(name='Vaisselle', score=task_score, date=timezone.now(), duration=5,
+                                             difficulty=2, user=user, house=self.house)
+        Score.objects.create(user=self.user, hearth=self.house, involvement=0.5, score=20, corrected_score=45.0, bonus=5.0)
+
+        out = io.StringIO()
+        call_command('rebuild_scores', house=[self.house.id], workers=1, chunk_size=2, dry_run=True, stdout=out)
+        self.assertIn(f"user {self.user.id}: score 20 -> 16, corrected_score 45.00 -> 37.00", out.getvalue())
+        self.assertIn(f"user {bob.id}: score 0 -> 4", out.getvalue())
+        self.assertFalse(Score.objects.filter(user=bob).exists())
+
+        rows, changes = Score.rebuild_house(self.house.id, chunk_size=2)
+        self.assertEqual((rows, len(changes)), (3, 2))
+        scores = {score.user_id: score for score in Score.objects.filter(hearth=self.house)}
+        self.assertEqual((scores[self.user.id].score, scores[self.user.id].corrected_score), (16, 37.0))
+        self.assertEqual((scores[bob.id].score, scores[bob.id].corrected_score), (4, 4.0))
+        self.assertEqual(Score.rebuild_house(self.house.id), (3, []))
+
+    def log(self, user, task_score, days_ago):
+        HouseworkMadeTask.objects.create(name='Vaisselle', score=task_score, duration=5, difficulty=2, user=user,
+                                         house=self.house, date=timezone.now() - datetime.timedelta(days=days_ago))
+        Score.add_task_scores(user, self.house.id, task_score)
+
+    def test_involvement_change_recomputes_the_later_periods(self):
+        self.house.add_user(self.user)
+        for task_score, days_ago in [(10, 10), (20, 5), (30, 1)]:
+            self.log(self.user, task_score, days_ago)
+        now = timezone.now()
+
+        score = Score.change_involvement(self.user.id, self.house.id, 0.5, now - datetime.timedelta(days=7))
+        self.assertEqual((score.score, score.corrected_score), (60, 10 + 50 / 0.5))
+        score = Score.change_involvement(self.user.id, self.house.id, 2.0, now - datetime.timedelta(days=3))
+        self.assertEqual(score.corrected_score, 10 + 20 / 0.5 + 30 / 2.0)
+        self.assertEqual(list(score.periods.order_by('id').values_list('total', 'involvement')),
+                         [(10, 1.0), (20, 0.5), (30, 2.0)])
+
+        # Un changement au début d'une période la remplace, avec les suivantes
+        score = Score.change_involvement(self.user.id, self.house.id, 1.0, now - datetime.timedelta(days=7))
+        self.assertEqual(score.corrected_score, 60.0)
+        self.assertEqual(score.periods.count(), 2)
+
+        self.log(self.user, 4, 0)
+        score.refresh_from_db()
+        self.assertEqual((score.score, score.corrected_score), (64, 64.0))
+        self.assertEqual(Score.rebuild_house(self.house.id), (4, []))
+
+    def test_involvement_endpoint(self):
+        bob = User.objects.create_user('bob', 'bob@example.com', 'password')
+        self.house.add_user(self.user)
+        self.house.add_user(bob)
+        self.log(bob, 10, 3)
+        url = f'/housework/api/house/{self.house.id}/involvement/'
+        client = APIClient()
+
+        client.force_authenticate(bob)
+        self.assertEqual(client.put(url, {'user': self.user.id, 'involvement': 2}, format='json').status_code, 403)
+        self.assertEqual(client.put(url, {'involvement': 0}, format='json').status_code, 400)
+        future = (timezone.now() + datetime.timedelta(days=1)).isoformat()
+        self.assertEqual(client.put(url, {'involvement': 2, 'effective_from': future}, format='json').status_code, 400)
+        response = client.put(url, {'involvement': 0.5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['involvement'], response.json()['corrected_score']), (0.5, 10.0))
+
+        client.force_authenticate(self.user)
+        past = (timezone.now() - datetime.timedelta(days=5)).isoformat()
+        response = client.put(url, {'user': bob.id, 'involvement': 0.5, 'effective_from': past}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['corrected_score'], 20.0)
+
+
+class CreateMultipleMadeTasksTests(HouseTestCase):
+
+    def post(self, *tasks):
+        return self.client.post('/housework/api/tasks/made/create-multiple/', list(tasks), format='json')
+
+    def test_one_invalid_entry_rejects_the_whole_payload(self):
+        foreign = HouseworkPossibleTask.objects.create(name='Jardin', house=House.objects.create(name='Autre'),
+                                                       duration=5, difficulty=1)
+        scores = list(Score.objects.values_list('id', 'score', 'corrected_score'))
+        for invalid in [{'possible_task_id': 0, 'count': 1}, {'possible_task_id': foreign.id, 'count': 1},
+                        {'possible_task_id': self.dishes.id, 'count': -1},
+                        {'possible_task_id': self.dishes.id, 'count': '2'}]:
+            response = self.post({'possible_task_id': self.dishes.id, 'count': 2}, invalid)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(len(response.data['errors']), 1)
+        self.assertFalse(HouseworkMadeTask.objects.exists())
+        self.assertFalse(HouseworkDailyRollup.objects.exists())
+        self.assertEqual(list(Score.objects.values_list('id', 'score', 'corrected_score')), scores)
+
+        response = self.post({'possible_task_id': self.dishes.id, 'count': 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created_tasks_ids']), 2)
+        self.assertEqual(Score.objects.get(user=self.user, hearth=self.house).score, 40)
+
+    @override_settings(HOUSEWORK_MADE_TASKS_MAX_COUNT=5)
+    def test_total_count_is_bounded(self):
+        for tasks in [[{'possible_task_id': self.dishes.id, 'count': 10 ** 9}],
+                      [{'possible_task_id': self.dishes.id, 'count': 3}, {'possible_task_id': self.dishes.id, 'count': 3}]]:
+            response = self.post(*tasks)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('At most 5 made tasks', response.data['errors'][0]['error'])
+        self.assertFalse(HouseworkMadeTask.objects.exists())
+        self.assertEqual(self.post({'possible_task_id': self.dishes.id, 'count': 5}).status_code, 201)
+
+
+class ScoreMigrationTests(TransactionTestCase):
+    """Migration 0010 merges the duplicated scores of a member before making them unique."""
+
+    before = [('housework', '0009_rename_house_score_hearth_score_involvement_and_more')]
+    after = [('housework', '0010_score_unique_hearth_user')]
+
+    def tearDown(self):
+        # Schéma complet pour les tests suivants
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_keep_a_single_join_bonus(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old_apps = executor.loader.project_state(self.before).apps
+        alice = old_apps.get_model('auth', 'User').objects.create(username='alice')
+        house = old_apps.get_model('housework', 'House').objects.create(name='Maison')
+        OldScore = old_apps.get_model('housework', 'Score')
+        # Chaque doublon a reçu le bonus d'arrivée (50) puis une partie des tâches
+        OldScore.objects.create(user=alice, hearth=house, score=20, corrected_score=50 + 20)
+        OldScore.objects.create(user=alice, hearth=house, score=10, corrected_score=50 + 10 / 0.5, involvement=0.5)
+        OldScore.objects.create(user=alice, hearth=house, score=0, corrected_score=40)
+
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+        Score = executor.loader.project_state(self.after).apps.get_model('housework', 'Score')
+        score = Score.objects.get()
+        self.assertEqual((score.score, score.corrected_score), (30, 50 + 20 + 10 / 0.5))
+
+
+class RollupMigrationTests(TransactionTestCase):
+    """Migration 0011 builds the rollups of the made tasks logged before it."""
+
+    before = [('housework', '0010_score_unique_hearth_user')]
+    after = [('housework', '0011_houseworkdailyrollup')]
+
+    def tearDown(self):
+        # Schéma complet pour les tests suivants
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_made_tasks_are_rolled_up(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old_apps = executor.loader.project_state(self.before).apps
+        alice = old_apps.get_model('auth', 'User').objects.create(username='alice')
+        house = old_apps.get_model('housework', 'House').objects.create(name='Maison')
+        dishes = old_apps.get_model('housework', 'HouseworkPossibleTask').objects.create(
+            name='Vaisselle', house=house, duration=10, difficulty=2)
+        now = timezone.now()
+        for days, possible_task in [(30, dishes), (30, dishes), (30, None), (2, dishes)]:
+            old_apps.get_model('housework', 'HouseworkMadeTask').objects.create(
+                name='Vaisselle', score=20, date=now - datetime.timedelta(days=days), duration=10, difficulty=2,
+                user=alice, house=house, possible_task=possible_task)
+
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(HouseworkDailyRollup.objects.count(), 3)
+        self.assertEqual(HouseworkDailyRollup.totals(house.id, now - datetime.timedelta(days=60), now),
+                         [{'count': 4, 'total_score': 80, 'total_duration': 40}])
+        # Mêmes rollups que la reconstruction
+        rollups = HouseworkDailyRollup.objects.values_list('possible_task_id', 'day', 'count', 'total_score',
+                                                           'total_duration').order_by('day', 'possible_task_id')
+        migrated = list(rollups)
+        self.assertEqual(HouseworkDailyRollup.rebuild(house.id), 3)
+        self.assertEqual(list(rollups), migrated)
+
+
+class HouseworkDailyRollupTests(HouseTestCase):
+
+    def log(self, *dates):
+        made_tasks = [
+            HouseworkMadeTask(name='Vaisselle', score=20, date=date, duration=10, difficulty=2,
+                              user=self.user, house=self.house, possible_task=self.dishes)
+            for date in dates
+        ]
+        HouseworkMadeTask.objects.bulk_create(made_tasks)
+        HouseworkDailyRollup.record(made_tasks)
+
+    def test_incremental_rollups_match_rebuild(self):
+        response = self.client.post('/housework/api/tasks/made/create-multiple/',
+                                    [{'possible_task_id': self.dishes.id, 'count': 3}], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.log(timezone.now() - datetime.timedelta(days=2), timezone.now() - datetime.timedelta(days=2))
+        incremental = set(HouseworkDailyRollup.objects.values_list('day', 'count', 'total_score', 'total_duration'))
+
+        HouseworkDailyRollup.rebuild(house_id=self.house.id)
+        rebuilt = set(HouseworkDailyRollup.objects.values_list('day', 'count', 'total_score', 'total_duration'))
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(sum(count for _, count, _, _ in rebuilt), 5)
+
+    def test_totals_combine_rollups_and_partial_days(self):
+        day = datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone.utc)
+        self.log(day + datetime.timedelta(hours=6), day + datetime.timedelta(hours=20),
+                 day + datetime.timedelta(days=1, hours=12), day + datetime.timedelta(days=2, hours=1),
+                 day + datetime.timedelta(days=2, hours=23))
+        start, end = day + datetime.timedelta(hours=12), day + datetime.timedelta(days=2, hours=12)
+
+        totals = HouseworkDailyRollup.totals(self.house.id, start, end, group_by=['user'])
+        expected = HouseworkMadeTask.objects.filter(house=self.house, date__gte=start, date__lte=end).count()
+        self.assertEqual(totals, [{'user': self.user.id, 'count': expected,
+                                   'total_score': 20 * expected, 'total_duration': 10 * expected}])
+
+    def test_stats_grouped_by_period(self):
+        # Du mercredi 28 février au mardi 5 mars 2024
+        day = datetime.datetime(2024, 2, 28, tzinfo=datetime.timezone.utc)
+        dates = [day + datetime.timedelta(days=offset, hours=hours)
+                 for offset, hours in [(0, 2), (0, 20), (1, 8), (2, 9), (4, 10), (5, 11), (6, 23)]]
+        self.log(*dates)
+        other = HouseworkMadeTask.objects.create(name='Autre', score=5, date=day + datetime.timedelta(days=5),
+                                                 duration=5, difficulty=1, user=self.user, house=self.house)
+        HouseworkDailyRollup.record([other])
+        params = {'start_date': (day + datetime.timedelta(hours=12)).isoformat(), 'end_date': '2024-03-05'}
+        url = f'/housework/api/house/{self.house.id}/stats/'
+
+        # Appartenance, rollups des jours entiers, limite de l'archive (puis en cache) et tâches des jours partiels
+        with self.assertNumQueries(4):
+            response = self.client.get(url, dict(params, group_by='week'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'week': '2024-02-26', 'count': 4, 'total_score': 80, 'total_duration': 40},
+            {'week': '2024-03-04', 'count': 3, 'total_score': 45, 'total_duration': 25},
+        ])
+
+        response = self.client.get(url, dict(params, group_by='month,possible_task'))
+        self.assertEqual(response.json()['results'], [
+            {'month': '2024-02-01', 'possible_task': self.dishes.id, 'count': 2, 'total_score': 40, 'total_duration': 20},
+            {'month': '2024-03-01', 'possible_task': self.dishes.id, 'count': 4, 'total_score': 80, 'total_duration': 40},
+            {'month': '2024-03-01', 'possible_task': None, 'count': 1, 'total_score': 5, 'total_duration': 5},
+        ])
+
+        response = self.client.get(url, params)
+        self.assertEqual(response.json()['results'], [{'count': 7, 'total_score': 125, 'total_duration': 65}])
+        self.assertEqual(self.client.get(url, dict(params, group_by='year')).status_code, 400)
+        self.assertEqual(self.client.get(url, {'group_by': 'user'}).status_code, 400)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "Query plans are checked on SQLite")
+class QueryPlanTests(TestCase):
+    """The hot filters must keep being served by their indexes."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan, plan)
+
+    def test_made_tasks_date_range_uses_house_date_index(self):
+        now = timezone.now()
+        self.assertUsesIndex(
+            HouseworkMadeTask.objects.filter(house_id=1, date__gte=now, date__lte=now).order_by('date', 'id'),
+            'made_task_house_date_idx',
+        )
+
+    def test_user_made_tasks_use_house_user_date_index(self):
+        now = timezone.now()
+        self.assertUsesIndex(
+            HouseworkMadeTask.objects.filter(house_id=1, user_id=1, date__gte=now, date__lte=now),
+            'made_task_house_user_date_idx',
+        )
+
+    def test_highest_corrected_score_uses_hearth_index(self):
+        self.assertUsesIndex(
+            Score.objects.filter(hearth_id=1).order_by('-corrected_score')[:1],
+            'score_hearth_corrected_idx',
+        )
+
+    def test_rollup_period_uses_house_day_index(self):
+        today = timezone.now().date()
+        self.assertUsesIndex(
+            HouseworkDailyRollup.objects.filter(house_id=1, day__gte=today, day__lte=today),
+            'rollup_house_day_idx',
+        )
+
+    def test_invitation_lookup_uses_unique_token_index(self):
+        self.assertUsesIndex(
+            HouseInvitation.objects.filter(token=uuid.uuid4(), expires_at__gte=timezone.now()),
+            'sqlite_autoindex_housework_houseinvitation_1',
+        )
+
+
+class HouseworkMadeTaskDateRangeTests(HouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.post('/housework/api/tasks/made/create-multiple/',
+                         [{'possible_task_id': self.dishes.id, 'count': 7}], format='json')
+        self.params = {'start_date': '2000-01-01T00:00:00Z', 'end_date': '2100-01-01T00:00:00Z',
+                       'house_id': self.house.id}
+
+    def test_keyset_pages_cover_the_range_once(self):
+        expected = [task['id'] for task in self.client.get('/housework/api/tasks/made/date-range/', self.params).data]
+        seen = []
+        url, params = '/housework/api/tasks/made/date-range/', dict(self.params, page_size=3)
+        while url:
+            page = self.client.get(url, params).data
+            self.assertLessEqual(len(page['results']), 3)
+            seen += [task['id'] for task in page['results']]
+            url, params = page['next'], None
+        self.assertEqual(seen, expected)
+
+    def test_stream_mode_returns_the_same_rows(self):
+        expected = self.client.get('/housework/api/tasks/made/date-range/', self.params).json()
+        response = self.client.get('/housework/api/tasks/made/date-range/', dict(self.params, stream='1'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+
+
+class HouseworkMadeTaskArchiveTests(HouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        made_tasks = [
+            HouseworkMadeTask(name='Vaisselle', score=20, date=now - datetime.timedelta(days=days, hours=hours),
+                              duration=10, difficulty=2, user=self.user, house=self.house, possible_task=self.dishes)
+            for days, hours in [(400, 0), (400, 0), (390, 5), (10, 0), (1, 0)]
+        ]
+        HouseworkMadeTask.objects.bulk_create(made_tasks)
+        HouseworkDailyRollup.record(made_tasks)
+        Score.add_task_scores(self.user, self.house.id, 100)
+        self.params = {'start_date': '2000-01-01T00:00:00Z', 'end_date': '2100-01-01T00:00:00Z',
+                       'house_id': self.house.id}
+
+    def read(self, url='/housework/api/tasks/made/date-range/', **params):
+        return self.client.get(url, dict(self.params, **params)).json()
+
+    def test_archived_rows_are_read_transparently(self):
+        expected = self.read()
+        totals = self.read(totals=1, group_by='user')
+        rollups = set(HouseworkDailyRollup.objects.values_list('day', 'count', 'total_score'))
+
+        out = io.StringIO()
+        call_command('archive_made_tasks', days=365, batch_size=2, stdout=out)
+        self.assertIn("3 made tasks dated before", out.getvalue())
+        self.assertEqual(HouseworkMadeTask.objects.count(), 2)
+        self.assertEqual(HouseworkMadeTaskArchive.objects.count(), 3)
+
+        self.assertEqual(self.read(), expected)
+        self.assertEqual(json.loads(b''.join(
+            self.client.get('/housework/api/tasks/made/date-range/', dict(self.params, stream=1)).streaming_content
+        )), expected)
+        async_client = APIClient()
+        async_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.assertEqual(async_client.get('/housework/api/async/tasks/made/date-range/', self.params).json(), expected)
+        pages, params = [], dict(self.params, page_size=2)
+        url = '/housework/api/tasks/made/date-range/'
+        while url:
+            page = self.client.get(url, params).json()
+            pages += page['results']
+            url, params = page['next'], None
+        self.assertEqual(pages, expected)
+
+        self.assertEqual(self.read(totals=1, group_by='user'), totals)
+        HouseworkDailyRollup.rebuild(house_id=self.house.id)
+        self.assertEqual(set(HouseworkDailyRollup.objects.values_list('day', 'count', 'total_score')), rollups)
+        self.assertEqual(Score.rebuild_house(self.house.id), (5, []))
+
+    def test_export_streams_the_full_history(self):
+        call_command('archive_made_tasks', days=365, stdout=io.StringIO())
+        History.objects.create(house=self.house, action_log='alice a rejoint la maison')
+        url = f'/housework/api/house/{self.house.id}/export/'
+
+        response = self.client.get(url, {'export_format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['id'] for row in rows], [str(task['id']) for task in self.read()])
+        self.assertEqual(rows[0]['user'], str(self.user.id))
+
+        response = self.client.get(url, {'include': 'made_tasks,scores,history'})
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['type'] for line in lines], ['made_tasks'] * 5 + ['scores', 'history'])
+        self.assertEqual(lines[0]['date'], self.read()[0]['date'])
+        self.assertEqual(lines[5]['score'], 100)
+
+        self.assertEqual(self.client.get(url, {'export_format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'export_format': 'csv', 'include': 'scores,history'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'include': 'users'}).status_code, 400)
+
+    def test_csv_export_neutralizes_formulas(self):
+        HouseworkMadeTask.objects.update(name='=HYPERLINK("http://example.com","x")')
+        for text in ['+1', '-1', '@SUM(A1)', '\tTab', '\rReturn', 'Vaisselle - cuisine']:
+            History.objects.create(house=self.house, action_log=text)
+        url = f'/housework/api/house/{self.house.id}/export/'
+
+        response = self.client.get(url, {'export_format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual({row['name'] for row in rows}, {'\'=HYPERLINK("http://example.com","x")'})
+        response = self.client.get(url, {'export_format': 'csv', 'include': 'history'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode(), newline='')))
+        self.assertEqual([row['log'] for row in rows],
+                         ["'+1", "'-1", "'@SUM(A1)", "'\tTab", "'\rReturn", 'Vaisselle - cuisine'])
+        # NDJSON : texte inchangé
+        response = self.client.get(url, {'include': 'history'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content).decode().splitlines()[0])['log'], '+1')
+
+    def test_recent_ranges_skip_the_archive(self):
+        call_command('archive_made_tasks', days=365, stdout=io.StringIO())
+        start = (timezone.now() - datetime.timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.read(start_date=start)), 2)
+        self.assertFalse([query for query in queries if 'archive' in query['sql']])
+
+        # Limite perdue (cache vidé) : relue depuis l'archive
+        cache.clear()
+        self.assertEqual(len(self.read()), 5)
+
+    def test_archive_bound_is_shared_and_expires(self):
+        key = ARCHIVE_BOUND_KEY.format(house_id=self.house.id)
+        self.assertEqual(len(self.read()), 5)
+        self.assertEqual(cache_get_in_other_process(key), '(None,)')
+        call_command('archive_made_tasks', days=365, stdout=io.StringIO())
+        self.assertEqual(len(HouseworkMadeTaskArchive.sources(self.house.id)), 2)
+        self.assertNotEqual(cache_get_in_other_process(key), '(None,)')
+
+        # Copie périmée (worker qui a manqué l'archivage) : relue depuis l'archive après expiration
+        cache.set(key, (None,), settings.HOUSEWORK_ARCHIVE_BOUND_CACHE_TIMEOUT)
+        self.assertEqual(len(HouseworkMadeTaskArchive.sources(self.house.id)), 1)
+        later = time.time() + settings.HOUSEWORK_ARCHIVE_BOUND_CACHE_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(len(HouseworkMadeTaskArchive.sources(self.house.id)), 2)
+
+
+class MadeTaskImportTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'password')
+        self.house = House.objects.create(name='Maison', admin_user=self.alice)
+        self.house.add_user(self.alice)
+        self.house.add_user(self.bob)
+        self.dishes = HouseworkPossibleTask.objects.create(name='Vaisselle', house=self.house, duration=10, difficulty=2)
+        HouseworkPossibleTask.objects.create(name='Cuisine', house=self.house, duration=30, difficulty=3)
+        self.url = f'/housework/api/house/{self.house.id}/import/'
+        self.client = APIClient()
+
+    def days_ago(self, days):
+        return (timezone.now() - datetime.timedelta(days=days)).isoformat()
+
+    def test_ndjson_import_updates_scores_per_involvement_period(self):
+        Score.change_involvement(self.bob.id, self.house.id, 0.5, timezone.now() - datetime.timedelta(days=10))
+        lines = [
+            {'date': self.days_ago(30)[:10], 'possible_task': self.dishes.id},
+            {'date': self.days_ago(20), 'name': 'cuisine', 'user': self.bob.id},
+            'pas du json',
+            {'date': self.days_ago(-1), 'possible_task': self.dishes.id},
+            {'date': self.days_ago(5), 'name': 'Jardinage'},
+            {'date': self.days_ago(5), 'possible_task': self.dishes.id, 'user': 999},
+            {'date': self.days_ago(2), 'name': 'Cuisine', 'user': self.bob.id},
+        ]
+        body = '\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+        self.client.force_authenticate(self.alice)
+
+        response = self.client.post(f'{self.url}?dry_run=1', body, content_type='application/x-ndjson')
+        self.assertEqual((response.status_code, response.json()['valid'], response.json()['imported']), (200, 3, 0))
+        self.assertFalse(HouseworkMadeTask.objects.exists())
+
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual((report['imported'], report['rows'], report['error_count']), (3, 7, 4))
+        self.assertEqual([error['line'] for error in report['errors']], [3, 4, 5, 6])
+        scores = {score.user_id: score for score in Score.objects.filter(hearth=self.house)}
+        self.assertEqual((scores[self.alice.id].score, scores[self.alice.id].corrected_score), (20, 20.0))
+        self.assertEqual((scores[self.bob.id].score, scores[self.bob.id].corrected_score), (180, 90 + 90 / 0.5))
+        self.assertEqual(HouseworkDailyRollup.objects.aggregate(total=Sum('count'))['total'], 3)
+        self.assertEqual(Score.rebuild_house(self.house.id), (3, []))
+
+    def test_csv_import_by_a_member(self):
+        body = f"date,name,user\n{self.days_ago(3)},Vaisselle,\n{self.days_ago(3)},Vaisselle,{self.alice.id}\n"
+        self.client.force_authenticate(self.bob)
+        response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.json()['errors'], [
+            {'line': 3, 'error': 'Only the house admin imports tasks of other members'},
+        ])
+        self.assertEqual(Score.objects.get(hearth=self.house, user=self.bob).score, 20)
+
+    def test_command_imports_in_batches(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('date,possible_task\n' + ''.join(f'{self.days_ago(day)},{self.dishes.id}\n' for day in range(5)))
+        self.addCleanup(os.remove, file.name)
+        out = io.StringIO()
+        call_command('import_made_tasks', file.name, house=self.house.id, batch_size=2, stdout=out)
+        self.assertIn('5 of 5 rows imported', out.getvalue())
+        self.assertEqual(Score.objects.get(hearth=self.house, user=self.alice).score, 100)
+
+    def test_interrupted_import_keeps_scores_consistent(self):
+        rows = [(line, {'date': self.days_ago(line), 'possible_task': self.dishes.id}) for line in range(1, 6)]
+        record = HouseworkDailyRollup.record
+        batches = []
+
+        def record_then_fail(made_tasks):
+            batches.append(len(made_tasks))
+            if len(batches) == 2:
+                raise OperationalError("disk I/O error")
+            return record(made_tasks)
+
+        with mock.patch.object(HouseworkDailyRollup, 'record', side_effect=record_then_fail):
+            with self.assertRaises(OperationalError):
+                MadeTaskImporter(self.house, self.alice, batch_size=2).run(iter(rows))
+        # Premier lot validé avec son score, le second annulé en entier
+        self.assertEqual(HouseworkMadeTask.objects.count(), 2)
+        self.assertEqual(Score.objects.get(hearth=self.house, user=self.alice).score, 40)
+        self.assertEqual(Score.rebuild_house(self.house.id), (2, []))
+
+
+class HouseSerializerQueryCountTests(TestCase):
+    """Listing houses must cost the same number of queries whatever the number of houses and members."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.created = 0
+
+    def add_houses(self, houses, members):
+        for _ in range(houses):
+            self.created += 1
+            house = House.objects.create(name=f'Maison {self.created}', admin_user=self.user)
+            house.add_user(self.user)
+            for member in range(members):
+                user = User.objects.create_user(f'member-{self.created}-{member}')
+                UserProfile.objects.create(user=user, avatar='avatar.png')
+                house.hearthUsers.add(user)
+        return house
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_house_lists_query_count_is_constant(self):
+        self.add_houses(1, 1)
+        small = {url: self.count_queries(url) for url in ('/housework/api/houses/', '/housework/api/houses/details/')}
+        self.add_houses(5, 4)
+        large = {url: self.count_queries(url) for url in small}
+        self.assertEqual(small, large)
+
+    def test_house_detail_query_count_is_constant(self):
+        small = self.count_queries(f'/housework/api/house/{self.add_houses(1, 1).id}/')
+        large = self.count_queries(f'/housework/api/house/{self.add_houses(1, 8).id}/')
+        self.assertEqual(small, large)
+
+
+class MembershipCacheTests(HouseTestCase):
+    member = False
+
+    def test_membership_is_cached(self):
+        self.house.add_user(self.user)
+        self.assertTrue(is_house_member(self.user, self.house.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_house_member(self.user, self.house.id))
+
+    def test_membership_changes_invalidate_the_cache(self):
+        self.assertFalse(is_house_member(self.user, self.house.id))
+        self.house.add_user(self.user)
+        self.assertTrue(is_house_member(self.user, self.house.id))
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        other = User.objects.create_user('bob')
+        self.house.add_user(other)
+        self.assertTrue(is_house_member(other, self.house.id))
+        client.post(f'/housework/api/house/{self.house.id}/remove_user/{other.id}/')
+        self.assertFalse(is_house_member(other, self.house.id))
+
+        house_id = self.house.id
+        self.house.delete()
+        self.assertFalse(is_house_member(self.user, house_id))
+
+    def test_tests_do_not_use_the_server_cache(self):
+        server_location = os.getenv('CACHE_LOCATION', str(settings.BASE_DIR / 'cache_files'))
+        self.assertNotEqual(settings.CACHES['default']['LOCATION'], server_location)
+
+    def test_membership_cache_is_shared_by_the_workers(self):
+        other = User.objects.create_user('bob')
+        self.house.add_user(self.user)
+        self.house.add_user(other)
+        self.assertTrue(is_house_member(other, self.house.id))
+        key = MEMBERSHIP_KEY.format(user_id=other.id)
+        self.assertEqual(cache_get_in_other_process(key), repr(frozenset({self.house.id})))
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.post(f'/housework/api/house/{self.house.id}/remove_user/{other.id}/')
+        self.assertEqual(cache_get_in_other_process(key), 'None')
+
+
+class PerformanceInstrumentationTests(HouseTestCase):
+
+    def test_server_timing_header_reports_queries(self):
+        response = self.client.get(f'/housework/api/house/{self.house.id}/scores/')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries", render;dur=[\d.]+')
+
+    def test_metrics_endpoint_is_restricted_to_staff(self):
+        self.client.get(f'/housework/api/house/{self.house.id}/scores/')
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('bes_request_duration_seconds_bucket{method="GET",route="housework/api/house/<int:house_id>/scores/"',
+                      response.content.decode())
+
+
+class HouseETagTests(HouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.urls = [f'/housework/api/house/{self.house.id}/scores/', f'/housework/api/house/{self.house.id}/tasks/',
+                     f'/housework/api/house/{self.house.id}/']
+
+    def etags(self):
+        return {url: self.client.get(url)['ETag'] for url in self.urls}
+
+    def test_unchanged_house_answers_not_modified_without_queries(self):
+        for url, etag in self.etags().items():
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etags(self):
+        etags = self.etags()
+        self.client.post('/housework/api/tasks/made/create-multiple/',
+                         [{'possible_task_id': self.dishes.id, 'count': 1}], format='json')
+        self.assertEqual(self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etags[self.urls[0]]).status_code, 200)
+
+        etags = self.etags()
+        self.house.add_user(User.objects.create_user('bob'))
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_house_versions_are_shared_by_the_workers(self):
+        # Un autre worker doit voir la version changée par une écriture, sinon il répond 304 à tort
+        key = HOUSE_VERSION_KEY.format(house_id=self.house.id)
+        version = get_house_version(self.house.id)
+        self.assertEqual(cache_get_in_other_process(key), repr(version))
+        self.client.post('/housework/api/tasks/made/create-multiple/',
+                         [{'possible_task_id': self.dishes.id, 'count': 1}], format='json')
+        self.assertNotEqual(get_house_version(self.house.id), version)
+        self.assertEqual(cache_get_in_other_process(key), repr(get_house_version(self.house.id)))
+
+
+class PossibleTaskCatalogCacheTests(HouseTestCase):
+    possible_task = False
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/housework/api/house/{self.house.id}/tasks/'
+
+    def test_catalog_is_served_from_cache_until_edited(self):
+        self.assertEqual(self.client.get(self.url).data, [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data, [])
+
+        response = self.client.post('/housework/api/tasks/possible/add/',
+                                    {'name': 'Vaisselle', 'house': self.house.id, 'duration': 10, 'difficulty': 2})
+        task_id = response.data['id']
+        self.assertEqual([task['name'] for task in self.client.get(self.url).data], ['Vaisselle'])
+
+        self.client.put(f'/housework/api/tasks/possible/{task_id}/', {'duration': 20})
+        self.assertEqual(self.client.get(self.url).data[0]['duration'], 20)
+
+        self.client.delete(f'/housework/api/tasks/possible/{task_id}/')
+        self.assertEqual(self.client.get(self.url).data, [])
+
+    def test_each_write_invalidates_the_catalogs_once(self):
+        other = House.objects.create(name='Chalet', admin_user=self.user)
+        other.add_user(self.user)
+        other_url = f'/housework/api/house/{other.id}/tasks/'
+        task_id = self.client.post('/housework/api/tasks/possible/add/',
+                                   {'name': 'Vaisselle', 'house': self.house.id, 'duration': 10, 'difficulty': 2}).data['id']
+        self.assertEqual(len(self.client.get(self.url).data), 1)
+        self.assertEqual(self.client.get(other_url).data, [])
+
+        with mock.patch('housework.caching._delete_now_and_on_commit',
+                        wraps=caching._delete_now_and_on_commit) as delete:
+            self.client.put(f'/housework/api/tasks/possible/{task_id}/', {'house': other.id})
+        delete.assert_called_once()
+        # Tâche déplacée : les catalogues des deux maisons sont à jour
+        self.assertEqual(self.client.get(self.url).data, [])
+        self.assertEqual(len(self.client.get(other_url).data), 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(TestCase):
+    """Safe requests read a replica, except for users who have just written."""
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'password')
+        self.house = House.objects.create(name='Maison', admin_user=self.alice)
+        self.house.add_user(self.alice)
+        self.house.add_user(self.bob)
+        self.dishes = HouseworkPossibleTask.objects.create(name='Vaisselle', house=self.house, duration=10, difficulty=2)
+
+        # Deuxième fichier SQLite : copie de la base principale, comme une réplique à jour
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings['replica1'] = dict(connections.settings['default'],
+                                                NAME=os.path.join(directory.name, 'replica.sqlite3'))
+        self.addCleanup(connections.settings.pop, 'replica1')
+        self.addCleanup(connections.__delitem__, 'replica1')
+        self.addCleanup(lambda: connections['replica1'].close())
+        replica = connections['replica1']
+        connection.ensure_connection()
+        with replica.constraint_checks_disabled():
+            replica.connection.executescript('\n'.join(connection.connection.iterdump()))
+
+        self.url = '/housework/api/tasks/made/date-range/'
+        self.params = {'house_id': self.house.id, 'start_date': '2000-01-01T00:00:00Z', 'end_date': '2100-01-01T00:00:00Z'}
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_safe_reads_go_to_the_replica(self):
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            response = self.client_for(self.alice).get(self.url, self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(replica_queries), 0)
+
+        # Hors requête (commandes, shell) : base principale
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            self.assertTrue(House.objects.filter(id=self.house.id).exists())
+        self.assertEqual(len(replica_queries), 0)
+
+    def test_writer_reads_its_writes_from_the_primary(self):
+        alice = self.client_for(self.alice)
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            response = alice.post('/housework/api/tasks/made/create-multiple/',
+                                  [{'possible_task_id': self.dishes.id, 'count': 1}], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica_queries), 0)
+
+        # La réplique n'a pas encore reçu la tâche : l'auteur lit la base principale
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            self.assertEqual(len(alice.get(self.url, self.params).data), 1)
+        self.assertEqual(len(replica_queries), 0)
+        # Les autres membres lisent la réplique
+        self.assertEqual(len(self.client_for(self.bob).get(self.url, self.params).data), 0)
+
+        # Fin de la fenêtre : retour sur la réplique
+        cache.delete(PIN_KEY.format(user_id=self.alice.id))
+        self.assertEqual(len(alice.get(self.url, self.params).data), 0)
+
+    def test_cache_fills_read_the_primary(self):
+        # Écritures que la réplique n'a pas encore reçues : nouveau membre et nouvelle tâche
+        carol = User.objects.create_user('carol', 'carol@example.com', 'password')
+        self.house.add_user(carol)
+        HouseworkPossibleTask.objects.create(name='Cuisine', house=self.house, duration=30, difficulty=3)
+        carol = self.client_for(carol)
+        self.assertEqual(carol.get(self.url, self.params).status_code, 200)
+        catalog = carol.get(f'/housework/api/house/{self.house.id}/tasks/').data
+        self.assertEqual(sorted(task['name'] for task in catalog), ['Cuisine', 'Vaisselle'])
+        # Les autres lectures restent sur la réplique
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            self.assertEqual(carol.get(self.url, self.params).status_code, 200)
+        self.assertGreater(len(replica_queries), 0)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_the_primary(self):
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            self.client_for(self.alice).get(self.url, self.params)
+        self.assertEqual(len(replica_queries), 0)
+
+
+class AsyncReadEndpointTests(HouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.post('/housework/api/tasks/made/create-multiple/',
+                         [{'possible_task_id': self.dishes.id, 'count': 3}], format='json')
+        # Jeton seul (sans session, absente du profil allégé), comme les clients des vues asynchrones
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.range = {'house_id': self.house.id, 'start_date': '2000-01-01T00:00:00Z',
+                      'end_date': '2100-01-01T00:00:00Z'}
+
+    def test_async_endpoints_match_the_sync_ones(self):
+        cases = [
+            ('/housework/api/houses/', '/housework/api/async/houses/', {}),
+            (f'/housework/api/house/{self.house.id}/tasks/', f'/housework/api/async/house/{self.house.id}/tasks/', {}),
+            (f'/housework/api/house/{self.house.id}/scores/', f'/housework/api/async/house/{self.house.id}/scores/', {}),
+            ('/housework/api/tasks/made/date-range/', '/housework/api/async/tasks/made/date-range/', self.range),
+            ('/housework/api/tasks/made/date-range/', '/housework/api/async/tasks/made/date-range/',
+             dict(self.range, totals=1, group_by='user')),
+        ]
+        for sync_url, async_url, params in cases:
+            expected = self.client.get(sync_url, params)
+            response = self.client.get(async_url, params)
+            self.assertEqual(response.status_code, 200, async_url)
+            self.assertEqual(response.json(), expected.json(), async_url)
+
+    def test_async_pagination_and_conditional_get(self):
+        page = self.client.get('/housework/api/async/tasks/made/date-range/', dict(self.range, page_size=2)).json()
+        self.assertEqual(len(page['results']), 2)
+        rest = self.client.get(page['next']).json()
+        self.assertEqual((len(rest['results']), rest['next']), (1, None))
+
+        url = f'/housework/api/async/house/{self.house.id}/scores/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_async_endpoints_require_a_member_token(self):
+        url = f'/housework/api/async/house/{self.house.id}/scores/'
+        outsider = User.objects.create_user('bob')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(outsider).access_token}')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.credentials()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_async_endpoints_reject_revoked_tokens(self):
+        # Objet de réglages importé par chaque module : modifié en place
+        with mock.patch.object(jwt_settings, 'CHECK_REVOKE_TOKEN', True):
+            token = RefreshToken.for_user(self.user).access_token
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            urls = [f'/housework/api/async/house/{self.house.id}/scores/', f'/housework/api/house/{self.house.id}/scores/']
+            for url in urls:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.user.set_password('changed')
+            self.user.save()
+            for url in urls:
+                self.assertEqual(self.client.get(url).status_code, 401, url)
+            self.client.credentials()
+            events = f'/housework/api/async/house/{self.house.id}/events/'
+            self.assertEqual(self.client.get(events, {'token': str(token)}).status_code, 401)
+
+    async def test_async_stream(self):
+        response = await self.async_client.get('/housework/api/async/tasks/made/date-range/', dict(self.range, stream=1),
+                                               AUTHORIZATION=f'Bearer {self.token}')
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(json.loads(body)), 3)
+
+
+class BenchmarkCheckTests(SimpleTestCase):
+
+    def test_latency_regression_needs_both_thresholds(self):
+        route = benchmark.Route('csrf', 'GET', None, 0, 200)
+        baseline = {'routes': {'csrf': {'p50_ms': 1.0}}}
+
+        def failures(p50_ms):
+            results = {'csrf': {'statuses': [200], 'queries': 0, 'p50_ms': p50_ms}}
+            return benchmark.check_results(results, [route], baseline, max_regression=25, min_regression_ms=2)
+
+        # +50 % sur une route rapide : bruit
+        self.assertEqual(failures(1.5), [])
+        self.assertEqual(failures(3.0), [])
+        self.assertEqual(len(failures(3.5)), 1)
+
+
+class RecordingBroker:
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, house_id, event):
+        self.events.append((house_id, event))
+
+
+class HouseEventTests(HouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def test_writes_publish_events_once_committed(self):
+        broker = RecordingBroker()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch('housework.events.get_broker', return_value=broker):
+            with self.captureOnCommitCallbacks() as callbacks:
+                client.post('/housework/api/tasks/made/create-multiple/',
+                            [{'possible_task_id': self.dishes.id, 'count': 2}], format='json')
+            self.assertEqual(broker.events, [])
+            for callback in callbacks:
+                callback()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.house.add_user(User.objects.create_user('bob'))
+
+        events = [event for _, event in broker.events]
+        self.assertEqual(events[0], {'type': 'score', 'house': self.house.id, 'user': self.user.id,
+                                     'score': 40, 'corrected_score': 40.0})
+        self.assertEqual(events[1], {'type': 'made_tasks', 'house': self.house.id, 'user': self.user.id,
+                                     'count': 2, 'score': 40})
+        self.assertEqual(events[2]['type'], 'members')
+        self.assertEqual(events[2]['change'], 'added')
+
+    async def test_in_process_broker_delivers_from_other_threads(self):
+        broker = InProcessBroker(max_queue_size=2)
+        subscription = broker.subscribe(self.house.id)
+        await asyncio.to_thread(broker.publish, self.house.id, {'type': 'score'})
+        self.assertEqual(await subscription.get(timeout=1), {'type': 'score'})
+        self.assertIsNone(await subscription.get(timeout=0.01))
+
+        for _ in range(3):
+            broker.publish(self.house.id, {'type': 'score'})
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.overflowed)
+        broker.unsubscribe(subscription)
+        self.assertEqual(broker.subscriber_count(self.house.id), 0)
+
+    @override_settings(HOUSEWORK_EVENT_HEARTBEAT=0.01, HOUSEWORK_EVENT_STREAM_TIMEOUT=0.1)
+    async def test_event_stream(self):
+        broker = InProcessBroker()
+        url = f'/housework/api/async/house/{self.house.id}/events/'
+        with mock.patch('housework.async_views.get_broker', return_value=broker):
+            self.assertEqual((await self.async_client.get(url)).status_code, 401)
+            response = await self.async_client.get(url, {'token': self.token})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content.__aiter__()
+        self.assertEqual(await stream.__anext__(), b'retry: 3000\n\n')
+
+        broker.publish(self.house.id, {'type': 'made_tasks', 'house': self.house.id, 'count': 1})
+        self.assertEqual(
+            await stream.__anext__(),
+            f'event: made_tasks\ndata: {{"type":"made_tasks","house":{self.house.id},"count":1}}\n\n'.encode(),
+        )
+        rest = [chunk async for chunk in stream]
+        self.assertEqual(set(rest), {b': keep-alive\n\n'})
+        self.assertEqual(broker.subscriber_count(self.house.id), 0)
+
+
+class HouseImageTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=directory.name, MEDIA_IMAGE_SIZES=[64])
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.admin = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.member = User.objects.create_user('bob', 'bob@example.com', 'password')
+        self.house = House.objects.create(name='Maison', admin_user=self.admin, imageName='defaultHouse')
+        self.house.add_user(self.admin)
+        self.house.add_user(self.member)
+        self.url = f'/housework/api/house/{self.house.id}/image/'
+
+    def upload(self, user):
+        buffer = io.BytesIO()
+        Image.new('RGB', (120, 80), 'green').save(buffer, 'PNG')
+        client = APIClient()
+        client.force_authenticate(user)
+        return client, client.post(self.url, {'image': SimpleUploadedFile('house.png', buffer.getvalue())},
+                                   format='multipart')
+
+    def test_only_the_admin_uploads_the_house_image(self):
+        _, response = self.upload(self.member)
+        self.assertEqual(response.status_code, 403)
+
+        client, response = self.upload(self.admin)
+        self.assertEqual(response.status_code, 200)
+        name = response.data['imageName']
+        self.assertRegex(name, rf'^house_{self.house.id}/[0-9a-f]{{16}}$')
+        house = client.get(f'/housework/api/house/{self.house.id}/').data
+        self.assertEqual(house['imageName'], name)
+        self.assertEqual(house['imageUrls'], {'64': f'/media/{name}-64.webp'})
+        self.assertIsNone(house['hearthUsers'][0]['avatarUrls'])
+
+
+class LazyViewTests(TestCase):
+
+    def callbacks(self, patterns):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                yield from self.callbacks(pattern.url_patterns)
+            else:
+                yield pattern.callback
+
+    def test_lazy_views_declare_what_the_views_they_load_declare(self):
+        self.assertEqual(load_views(), len(LAZY_VIEWS))
+        for callback in self.callbacks(get_resolver().url_patterns):
+            lazy = getattr(callback, 'lazy', None)
+            if lazy is None:
+                continue
+            # CsrfViewMiddleware et le gestionnaire lisent ces attributs avant que la vue ne soit importée
+            self.assertEqual(callback.csrf_exempt, getattr(lazy.view, 'csrf_exempt', False), lazy.path)
+            self.assertEqual(iscoroutinefunction(callback), iscoroutinefunction(lazy.view), lazy.path)
+
+    def test_gunicorn_refuses_several_workers_with_a_process_local_cache(self):
+        config = runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+        server = SimpleNamespace(cfg=SimpleNamespace(workers=2))
+        config['on_starting'](server)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with self.assertRaisesMessage(RuntimeError, 'process-local cache default'):
+                config['on_starting'](server)
+            server.cfg.workers = 1
+            config['on_starting'](server)
+
+    def test_startup_report(self):
+        out = io.StringIO()
+        call_command('startup_report', '--profiles', 'lean', '--top', '3', stdout=out)
+        self.assertRegex(out.getvalue(), r'all views\s+[\d.]+ ms\s+\d+ modules\s+rss\s+[\d.]+ MB')
 
-# Create your tests here.
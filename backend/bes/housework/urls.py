@@ -1,32 +1,62 @@
 from django.urls import path
-from . import views
-from .views import  HouseScoresView, HouseViewSet, HouseworkMadeTaskDateRangeView, HouseworkPossibleTaskView, RemoveUserFromHouse, generate_invitation, accept_invitation
-from django.views.decorators.csrf import csrf_exempt
+
+from bes.lazy import lazy_view
+
+# Vues importées à leur première requête (voir bes.lazy)
+views = 'housework.views.'
+
+
+def async_view(name):
+    # Vues async (ASGI) : pas d'exemption CSRF, comme les fonctions qu'elles chargent
+    return lazy_view('housework.async_views.' + name, asynchronous=True, csrf_exempt=False)
+
 
 #Available routes
 urlpatterns = [
     # Requête pour les maison / foyers
-    path('api/houses/', views.HouseList.as_view()),
-    path('api/houses/details/', HouseViewSet.as_view({'get': 'list'})),
-    path('api/house/<int:pk>/', views.HouseDetail.as_view()),
-    path('api/house/', views.HouseDetail.as_view()),
-    path('api/house/<int:house_id>/remove_user/<int:user_id>/', RemoveUserFromHouse.as_view(), name='remove_user_from_house'),
-    path('api/house/create/', HouseViewSet.as_view({'post': 'create'})),
+    path('api/houses/', lazy_view(views + 'HouseList')),
+    path('api/houses/details/', lazy_view(views + 'HouseViewSet', {'get': 'list'})),
+    path('api/house/<int:pk>/', lazy_view(views + 'HouseDetail')),
+    path('api/house/', lazy_view(views + 'HouseDetail')),
+    path('api/house/<int:house_id>/remove_user/<int:user_id>/', lazy_view(views + 'RemoveUserFromHouse'), name='remove_user_from_house'),
+    path('api/house/create/', lazy_view(views + 'HouseViewSet', {'post': 'create'})),
     
     # Requête pour les tâches possible
-    path('api/house/<int:house_id>/tasks/', HouseworkPossibleTaskView.as_view()),
-    path('api/tasks/possible/add/', HouseworkPossibleTaskView.as_view()),
-    path('api/tasks/possible/<int:task_id>/', HouseworkPossibleTaskView.as_view()),
+    path('api/house/<int:house_id>/tasks/', lazy_view(views + 'HouseworkPossibleTaskView')),
+    path('api/tasks/possible/add/', lazy_view(views + 'HouseworkPossibleTaskView')),
+    path('api/tasks/possible/<int:task_id>/', lazy_view(views + 'HouseworkPossibleTaskView')),
 
     # Requête pour les tâches faîtes
-    path('api/tasks/made/date-range/', HouseworkMadeTaskDateRangeView.as_view(), name='housework-made-task-date-range'),
-    path('api/tasks/made/create-multiple/', views.create_multiple_made_tasks, name='create_multiple_made_tasks'),
+    path('api/tasks/made/date-range/', lazy_view(views + 'HouseworkMadeTaskDateRangeView'), name='housework-made-task-date-range'),
+    path('api/tasks/made/create-multiple/', lazy_view(views + 'create_multiple_made_tasks'), name='create_multiple_made_tasks'),
 
     # Requêtes pour les invitation
-    path('api/house/<int:house_id>/invite/', generate_invitation),
-    path('api/invite/accept/<uuid:token>/', accept_invitation),
+    path('api/house/<int:house_id>/invite/', lazy_view(views + 'generate_invitation')),
+    path('api/invite/accept/<uuid:token>/', lazy_view(views + 'accept_invitation')),
 
     # Requête pour les scores des membres d'une maison
-    path('api/house/<int:house_id>/scores/', HouseScoresView.as_view(), name='get_house_scores'),
+    path('api/house/<int:house_id>/scores/', lazy_view(views + 'HouseScoresView'), name='get_house_scores'),
+
+    # Changement d'implication d'un membre (éventuellement rétroactif)
+    path('api/house/<int:house_id>/involvement/', lazy_view(views + 'HouseInvolvementView'), name='change_involvement'),
+
+    # Statistiques agrégées (par membre, tâche, jour, semaine ou mois) d'une maison
+    path('api/house/<int:house_id>/stats/', lazy_view(views + 'HouseStatsView'), name='get_house_stats'),
+
+    # Image d'une maison, enregistrée en variantes redimensionnées
+    path('api/house/<int:house_id>/image/', lazy_view(views + 'HouseImageView'), name='upload_house_image'),
+
+    # Export en flux de l'historique d'une maison (CSV ou NDJSON)
+    path('api/house/<int:house_id>/export/', lazy_view(views + 'HouseExportView'), name='export_house'),
+
+    # Import en masse de tâches réalisées passées (NDJSON ou CSV)
+    path('api/house/<int:house_id>/import/', lazy_view(views + 'HouseImportView'), name='import_made_tasks'),
+
+    # Variantes asynchrones des lectures fréquentes (servies par ASGI)
+    path('api/async/houses/', async_view('house_list'), name='async_house_list'),
+    path('api/async/house/<int:house_id>/tasks/', async_view('possible_tasks'), name='async_possible_tasks'),
+    path('api/async/house/<int:house_id>/scores/', async_view('house_scores'), name='async_house_scores'),
+    path('api/async/tasks/made/date-range/', async_view('made_task_date_range'), name='async_made_task_date_range'),
+    path('api/async/house/<int:house_id>/events/', async_view('house_events'), name='house_events'),
     
 ]
\ No newline at end of file
@@ -1,12 +1,32 @@
+import datetime
+import functools
 
-from django.http import HttpResponse, JsonResponse
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.parsers import JSONParser
-from .models import House, HouseInvitation, HouseworkMadeTask, HouseworkPossibleTask, Score
-from .serializers import HouseSerializer, HouseworkMadeTaskDateRangeSerializer, HouseworkPossibleTaskSerializer, ScoreSerializer
+from django.views.decorators.http import condition
+from rest_framework.parsers import JSONParser, MultiPartParser
+from bes import media
+from .models import (
+    House, HouseInvitation, HouseworkDailyRollup, HouseworkMadeTask, HouseworkMadeTaskArchive, HouseworkPossibleTask,
+    Score,
+)
+from .caching import (
+    bump_house_versions, get_possible_task_catalog, get_user_house_ids, house_etag, is_house_member,
+)
+from . import export, importing
+from .events import publish_on_commit
+from .pagination import DateIdKeysetPagination, ordered_union, stream_json_array
+from .serializers import (
+    HouseSerializer, HouseworkMadeTaskDateRangeSerializer, HouseworkPossibleTaskSerializer, InvolvementSerializer,
+    ScoreSerializer,
+)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
@@ -14,9 +34,8 @@ from rest_framework import views
 from rest_framework import viewsets
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
-from django.utils.dateparse import parse_datetime
+from django.utils.dateparse import parse_date, parse_datetime
 
 
 
@@ -39,7 +58,7 @@ class HouseList(APIView):
     """
     @permission_classes([IsAuthenticated])
     def get(self, request):
-        houses = House.objects.filter(users__id=request.user.id).all()
+        houses = HouseSerializer.setup_eager_loading(House.objects.filter(hearthUsers__id=request.user.id))
         serializer = HouseSerializer(houses, many=True)
         return Response(serializer.data)
 
@@ -60,7 +79,7 @@ class HouseViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     def list(self, request):
-        queryset = House.objects.all()
+        queryset = HouseSerializer.setup_eager_loading(House.objects.all())
         serializer = HouseSerializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -101,9 +120,10 @@ class HouseDetail(APIView):
     Retrieve, update, or delete a house.
     """
     @permission_classes([IsAuthenticated])
+    @method_decorator(condition(etag_func=lambda request, pk: house_etag(request, pk, members_only=False)))
     def get(self, request, pk):
         try:
-            house = House.objects.get(pk=pk)
+            house = HouseSerializer.setup_eager_loading(House.objects.all()).get(pk=pk)
         except House.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
         serializer = HouseSerializer(house)
@@ -149,16 +169,19 @@ class HouseworkPossibleTaskView(APIView):
 
     def check_house_membership(self, house_id, user):
         """Vérifie si l'utilisateur fait partie de la maison donnée."""
-        if not House.objects.filter(id=house_id, hearthUsers=user).exists():
+        if not is_house_member(user, house_id):
             raise PermissionDenied("Vous n'appartenez pas à cette maison.")
 
+    @method_decorator(condition(etag_func=lambda request, house_id=None: house_etag(request, house_id)))
     def get(self, request, house_id=None):
         if house_id:
             self.check_house_membership(house_id, request.user)
-            tasks = HouseworkPossibleTask.objects.filter(house__id=house_id)
-        else:
-            tasks = HouseworkPossibleTask.objects.all()
+            # Catalogue sérialisé mis en cache par maison
+            return Response(get_possible_task_catalog(house_id, lambda: HouseworkPossibleTaskSerializer(
+                HouseworkPossibleTask.objects.filter(house__id=house_id), many=True
+            ).data))
 
+        tasks = HouseworkPossibleTask.objects.all()
         serializer = HouseworkPossibleTaskSerializer(tasks, many=True)
         return Response(serializer.data)
 
@@ -194,17 +217,12 @@ class HouseworkPossibleTaskView(APIView):
 # TODO: vérification d'être dans cette house
 @api_view(['POST'])
 @csrf_exempt
-# @method_decorator(csrf_exempt, name='dispatch')
 @permission_classes([IsAuthenticated])
 def generate_invitation(request, house_id):
-    print("User ID:", request.user.id)  # assurez-vous d’avoir l'ID
-    print("House ID:", house_id)  # ID de la maison
-    house = House.objects.filter(id=house_id, hearthUsers=request.user).first()
-    print("House:", house)
-    if not house:
+    if not is_house_member(request.user, house_id):
         return Response({'error': 'House not found or access denied'}, status=status.HTTP_404_NOT_FOUND)
     
-    invitation = HouseInvitation.objects.create(house=house, invited_by=request.user)
+    invitation = HouseInvitation.objects.create(house_id=house_id, invited_by=request.user)
     return Response({'token': str(invitation.token)}, status=status.HTTP_201_CREATED)
 
 # Vue pour accepter une invitation via Token dans une House
@@ -218,7 +236,7 @@ def accept_invitation(request, token):
         return Response({'error': 'Invalid or expired token'}, status=status.HTTP_404_NOT_FOUND)
     
     house = invitation.house
-    if request.user in house.hearthUsers.all():
+    if is_house_member(request.user, house.id):
         return Response({'message': 'You are already a member of this house'}, status=status.HTTP_400_BAD_REQUEST)
 
     house.add_user(request.user)
@@ -249,13 +267,32 @@ class HouseworkMadeTaskDateRangeView(views.APIView):
         if not all([start_date, end_date, house_id]):
             return Response({'error': 'Missing required parameters'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Filtrage des tâches réalisées
-        tasks = HouseworkMadeTask.objects.filter(
-            date__gte=start_date,
-            date__lte=end_date,
-            house_id=house_id
-        )
-        
+        # Totaux seulement : lus depuis les agrégats journaliers
+        if request.query_params.get('totals') in ('1', 'true'):
+            group_by = [name for name in request.query_params.get('group_by', '').split(',') if name]
+            if any(name not in HouseworkDailyRollup.GROUPS for name in group_by):
+                return Response({'error': 'Invalid group_by'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(HouseworkDailyRollup.totals(house_id, start_date, end_date, group_by))
+
+        # Filtrage des tâches réalisées (et archivées si la période remonte jusqu'à l'archive)
+        sources = HouseworkMadeTaskArchive.date_range(house_id, start_date, end_date)
+        tasks = ordered_union(sources)
+
+        # Mode flux : les lignes sont écrites au fur et à mesure, mémoire constante
+        if request.query_params.get('stream') in ('1', 'true'):
+            chunk_size = getattr(settings, 'HOUSEWORK_STREAM_CHUNK_SIZE', 500)
+            return StreamingHttpResponse(
+                stream_json_array(tasks, HouseworkMadeTaskDateRangeSerializer, chunk_size),
+                content_type='application/json',
+            )
+
+        # Pagination par curseur (date, id), activée par les paramètres cursor ou page_size
+        paginator = DateIdKeysetPagination()
+        if any(param in request.query_params for param in (paginator.cursor_query_param, paginator.page_size_query_param)):
+            page = paginator.paginate_queryset(sources, request, view=self)
+            serializer = HouseworkMadeTaskDateRangeSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         # Sérialisation des données
         serializer = HouseworkMadeTaskDateRangeSerializer(tasks, many=True)
         return Response(serializer.data)
@@ -266,65 +303,112 @@ class HouseworkMadeTaskDateRangeView(views.APIView):
 def create_multiple_made_tasks(request):
     """
     Permet d'enregistrer une liste de tâches réalisées à son nom.
+
+    Les tâches possibles référencées sont chargées en une seule requête et
+    l'appartenance de l'utilisateur à leurs maisons est lue depuis le cache. Les tâches réalisées sont ensuite
+    insérées avec ``bulk_create`` dans une transaction unique et le score n'est
+    incrémenté qu'une fois par maison. Si un élément est invalide, rien n'est écrit.
+    La somme des ``count`` est bornée par ``HOUSEWORK_MADE_TASKS_MAX_COUNT``.
     """
     # Extrait les données de la requête
     task_list = request.data
-
-    # Listes pour stocker les tâches créées et les erreurs
-    created_tasks = []
+    if not isinstance(task_list, list):
+        return Response({"errors": [{"error": "A list of tasks is expected"}]}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Charge en une requête les tâches possibles
+    possible_task_ids = {
+        str(task.get('possible_task_id')) for task in task_list if isinstance(task, dict)
+    }
+    possible_tasks = HouseworkPossibleTask.objects.filter(
+        id__in=[int(task_id) for task_id in possible_task_ids if task_id.isdigit()]
+    ).in_bulk()
+    member_house_ids = get_user_house_ids(request.user.id)
+
+    # Valide tous les éléments avant toute écriture
     errors = []
-
+    now = timezone.now()
+    made_tasks = []
+    house_totals = {}
+    house_counts = {}
+    max_count = settings.HOUSEWORK_MADE_TASKS_MAX_COUNT
+    total_count = 0
     for task in task_list:
-        # Récupère l'ID de la tâche possible et le nombre de fois que la tâche a été effectuée
-        possible_task_id = task.get('possible_task_id')
-        count = task.get('count')
+        possible_task_id = task.get('possible_task_id') if isinstance(task, dict) else None
+        count = task.get('count') if isinstance(task, dict) else None
+        possible_task = possible_tasks.get(int(possible_task_id)) if str(possible_task_id).isdigit() else None
 
-        try:
-            # Récupère la tâche possible à partir de son ID
-            possible_task = HouseworkPossibleTask.objects.get(id=possible_task_id)
-            
-            # Vérifie que l'utilisateur est bien membre de la maison
-            if not possible_task.house.hearthUsers.filter(id=request.user.id).exists():
-                errors.append({"possible_task_id": possible_task_id, "error": "User is not a member of the house"})
-                continue
-
-            # Obtenir ou créer le score de l'utilisateur pour la maison
-            score_entry, created = Score.objects.get_or_create(
+        if possible_task is None:
+            errors.append({"possible_task_id": possible_task_id, "error": "Possible task not found"})
+            continue
+        if possible_task.house_id not in member_house_ids:
+            errors.append({"possible_task_id": possible_task_id, "error": "User is not a member of the house"})
+            continue
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            errors.append({"possible_task_id": possible_task_id, "error": "Invalid count"})
+            continue
+        # Borne avant de construire les instances en mémoire
+        total_count += count
+        if total_count > max_count:
+            errors.append({"possible_task_id": possible_task_id,
+                           "error": f"At most {max_count} made tasks can be created per request"})
+            continue
+
+        # Le score est basé sur la durée et la difficulté de la tâche possible
+        task_score = possible_task.duration * possible_task.difficulty
+        made_tasks.extend(
+            HouseworkMadeTask(
+                name=possible_task.name,
+                date=now,
+                duration=possible_task.duration,
+                difficulty=possible_task.difficulty,
                 user=request.user,
-                hearth=possible_task.house,
-                defaults={'involvement': 1.0, 'score': 0, 'corrected_score': 0}
+                house_id=possible_task.house_id,
+                possible_task=possible_task,
+                score=task_score,
             )
-
-            # Crée les tâches réalisées en fonction du nombre spécifié
-            for _ in range(count):
-                made_task = HouseworkMadeTask.objects.create(
-                    name=possible_task.name,  # Utilise le nom de la tâche possible
-                    date=timezone.now(),  # Définit la date à maintenant
-                    duration=possible_task.duration,  # Utilise la durée de la tâche possible
-                    difficulty=possible_task.difficulty,  # Utilise la difficulté de la tâche possible
-                    user=request.user,  # Associe la tâche réalisée à l'utilisateur courant
-                    house=possible_task.house,  # Associe la tâche réalisée à la maison de la tâche possible
-                    possible_task=possible_task,  # Référence la tâche possible
-                    score=possible_task.duration * possible_task.difficulty  # Calcule le score basé sur la durée et la difficulté
-                )
-                # Ajoute l'ID de la tâche réalisée à la liste des tâches créées
-                created_tasks.append(made_task.id)
-
-                # Met à jour le score de l'utilisateur
-                score_entry.update_scores(made_task.score)
-
-        except HouseworkPossibleTask.DoesNotExist:
-            # Ajoute une erreur si la tâche possible n'est pas trouvée
-            errors.append({"possible_task_id": possible_task_id, "error": "Possible task not found"})
+            for _ in range(count)
+        )
+        house_totals[possible_task.house_id] = house_totals.get(possible_task.house_id, 0) + task_score * count
+        house_counts[possible_task.house_id] = house_counts.get(possible_task.house_id, 0) + count
 
     if errors:
-        # Retourne les erreurs si des erreurs sont survenues
+        # Retourne les erreurs sans avoir rien enregistré
         return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
 
+    with transaction.atomic():
+        created_tasks = _bulk_create_made_tasks(made_tasks, request.user, now)
+        bump_house_versions(house_totals)
+        HouseworkDailyRollup.record(made_tasks)
+
+        # Une seule mise à jour de score par maison
+        for house_id, total in house_totals.items():
+            Score.add_task_scores(request.user, house_id, total)
+            publish_on_commit([house_id], 'made_tasks', user=request.user.id, count=house_counts[house_id],
+                              score=total)
+
     # Retourne les IDs des tâches créées en cas de succès
     return Response({"created_tasks_ids": created_tasks}, status=status.HTTP_201_CREATED)
 
 
+def _bulk_create_made_tasks(made_tasks, user, date):
+    """
+    Insert made tasks in one statement and return their ids in insertion order.
+
+    Backends that cannot return primary keys from a bulk insert (MySQL) get
+    them back with a single query on the batch's user and timestamp; it must
+    be called inside the transaction that did the insert.
+    """
+    if not made_tasks:
+        return []
+    HouseworkMadeTask.objects.bulk_create(made_tasks)
+    if all(made_task.pk is not None for made_task in made_tasks):
+        return [made_task.pk for made_task in made_tasks]
+    created_ids = list(
+        HouseworkMadeTask.objects.filter(user=user, date=date).order_by('id').values_list('id', flat=True)
+    )
+    return created_ids[-len(made_tasks):]
+
+
 
 class RemoveUserFromHouse(APIView):
     permission_classes = [IsAuthenticated]
@@ -341,7 +425,7 @@ class RemoveUserFromHouse(APIView):
             return Response({"message": "Seul l'administrateur peut retirer un utilisateur."}, status=status.HTTP_403_FORBIDDEN)
 
         # Vérification si l'utilisateur est actuellement membre de la maison
-        if user_to_remove not in house.hearthUsers.all():
+        if not is_house_member(user_to_remove, house.id):
             return Response({"message": "L'utilisateur n'est pas membre de cette maison."}, status=status.HTTP_404_NOT_FOUND)
 
         # Retrait de l'utilisateur
@@ -359,6 +443,7 @@ class HouseScoresView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=lambda request, house_id: house_etag(request, house_id)))
     def get(self, request, house_id):
         """
         Handle GET request to retrieve scores of all users in a house.
@@ -366,22 +451,262 @@ class HouseScoresView(APIView):
         :param request: The HTTP request object.
         :param house_id: The ID of the house for which to retrieve scores.
         :return: A JSON response with scores of all users in the house.
+
+        Answers ``If-None-Match`` with a 304 while the house version is unchanged.
         """
-        try:
-            # Try to fetch the house by its ID
-            house = House.objects.get(pk=house_id)
-        except House.DoesNotExist:
-            # Return a 404 error if the house does not exist
-            return Response({'error': 'House not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        # Check if the requesting user is a member of the house
-        if not house.hearthUsers.filter(id=request.user.id).exists():
+        # Check if the requesting user is a member of the house (cached membership)
+        if not is_house_member(request.user, house_id):
+            if not House.objects.filter(pk=house_id).exists():
+                # Return a 404 error if the house does not exist
+                return Response({'error': 'House not found'}, status=status.HTTP_404_NOT_FOUND)
             # Return a 403 error if the user is not a member of the house
             return Response({'error': 'Access denied: You are not a member of this house'}, status=status.HTTP_403_FORBIDDEN)
         
+        # Scores over a period: totals per user read from the daily rollups
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        if start_date or end_date:
+            try:
+                start_date = parse_datetime(start_date or '')
+                end_date = parse_datetime(end_date or '')
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if not (start_date and end_date):
+                return Response({'error': 'Invalid date format'}, status=status.HTTP_400_BAD_REQUEST)
+            totals = HouseworkDailyRollup.totals(house_id, start_date, end_date, group_by=['user'])
+            return Response([
+                {'user': total['user'], 'hearth': house_id, 'score': total['total_score'],
+                 'count': total['count'], 'total_duration': total['total_duration']}
+                for total in totals
+            ])
+
         # Fetch the scores for all users in the house
-        scores = Score.objects.filter(hearth=house)
+        scores = Score.objects.filter(hearth_id=house_id)
         # Serialize the scores data
         serializer = ScoreSerializer(scores, many=True)
         # Return the serialized data in the response
         return Response(serializer.data)
+
+
+class HouseInvolvementView(APIView):
+    """
+    API endpoint that changes the involvement of a member of a house, possibly from a past date.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, house_id):
+        """
+        Handle PUT request to change an involvement.
+
+        :param request: The HTTP request object, with ``involvement``, and optionally ``user``
+            (the caller by default) and ``effective_from`` (now by default).
+        :param house_id: The ID of the house.
+        :return: A JSON response with the updated score of the member.
+
+        Members change their own involvement; the admin of the house can change anyone's.
+        Only the involvement periods after ``effective_from`` are recomputed.
+        """
+        if not is_house_member(request.user, house_id):
+            if not House.objects.filter(pk=house_id).exists():
+                return Response({'error': 'House not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'error': 'Access denied: You are not a member of this house'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = InvolvementSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user_id = serializer.validated_data.get('user', request.user.id)
+        if user_id != request.user.id:
+            # Seul l'administrateur modifie l'implication des autres membres
+            if not House.objects.filter(pk=house_id, admin_user_id=request.user.id).exists():
+                return Response({'error': "Seul l'administrateur peut modifier l'implication d'un autre membre."},
+                                status=status.HTTP_403_FORBIDDEN)
+            if not House.objects.filter(pk=house_id, hearthUsers__id=user_id).exists():
+                return Response({'error': "L'utilisateur n'est pas membre de cette maison."},
+                                status=status.HTTP_404_NOT_FOUND)
+
+        score = Score.change_involvement(
+            user_id, house_id, serializer.validated_data['involvement'],
+            serializer.validated_data.get('effective_from') or timezone.now(),
+        )
+        return Response(ScoreSerializer(score).data)
+
+
+class HouseImageView(APIView):
+    """
+    API endpoint that uploads the image of a house, stored as pre-resized variants.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, house_id):
+        """
+        Handle POST request with the ``image`` file of the house.
+
+        :param request: The HTTP request object, a multipart form with an ``image`` file.
+        :param house_id: The ID of the house.
+        :return: A JSON response with the image name and the URL of each variant.
+
+        Only the admin of the house changes its image, like its other information.
+        """
+        try:
+            house = House.objects.get(pk=house_id)
+        except House.DoesNotExist:
+            return Response({'error': 'House not found'}, status=status.HTTP_404_NOT_FOUND)
+        if house.admin_user_id != request.user.id:
+            return Response({'error': "Seul l'administrateur de la maison peut modifier les informations."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('image')
+        if upload is None:
+            return Response({'error': 'No image provided'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            name = media.store_image(upload, functools.partial(House.house_directory_path, house))
+        except media.ImageError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        media.replace_image(house.imageName, name)
+        house.imageName = name
+        house.save(update_fields=['imageName'])
+        return Response({'imageName': name, 'imageUrls': media.variant_urls(name)})
+
+
+class HouseExportView(APIView):
+    """
+    API endpoint streaming the full history of a house as CSV or NDJSON.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, house_id):
+        """
+        Handle GET request to export the data of a house.
+
+        :param request: The HTTP request object, with ``export_format`` (``ndjson`` by default, or ``csv``)
+            and ``include``, a comma separated list among ``made_tasks`` (default), ``scores`` and ``history``.
+        :param house_id: The ID of the house.
+        :return: A streamed attachment. NDJSON lines carry a ``type`` key; a CSV file holds one dataset.
+
+        Made tasks include the archived ones, ordered by date.
+        """
+        if not is_house_member(request.user, house_id):
+            if not House.objects.filter(pk=house_id).exists():
+                return Response({'error': 'House not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'error': 'Access denied: You are not a member of this house'}, status=status.HTTP_403_FORBIDDEN)
+
+        # ``format`` est réservé par DRF à la négociation du rendu
+        export_format = request.query_params.get('export_format', 'ndjson')
+        datasets = [name for name in request.query_params.get('include', 'made_tasks').split(',') if name]
+        if export_format not in export.FORMATS:
+            return Response({'error': 'Invalid export_format'}, status=status.HTTP_400_BAD_REQUEST)
+        if not datasets or any(name not in export.DATASETS for name in datasets) or len(set(datasets)) != len(datasets):
+            return Response({'error': 'Invalid include'}, status=status.HTTP_400_BAD_REQUEST)
+        if export_format == 'csv' and len(datasets) > 1:
+            return Response({'error': 'A CSV export holds a single dataset'}, status=status.HTTP_400_BAD_REQUEST)
+
+        chunk_size = getattr(settings, 'HOUSEWORK_STREAM_CHUNK_SIZE', 500)
+        if export_format == 'csv':
+            content = export.stream_csv(house_id, datasets[0], chunk_size)
+        else:
+            content = export.stream_ndjson(house_id, datasets, chunk_size)
+        response = StreamingHttpResponse(content, content_type=export.FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="house-{house_id}-{"-".join(datasets)}.{export_format}"'
+        return response
+
+
+class HouseImportView(APIView):
+    """
+    API endpoint importing past made tasks of a house from a streamed NDJSON or CSV body.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, house_id):
+        """
+        Handle POST request to import made tasks (see ``housework.importing`` for the row format).
+
+        :param request: The HTTP request object. The body is NDJSON, or CSV with a ``text/csv`` content
+            type (or ``import_format=csv``); ``dry_run=1`` only validates the rows.
+        :param house_id: The ID of the house.
+        :return: A JSON report: rows imported, row errors (line and message), rows per second.
+
+        The body is read line by line, never loaded whole. Invalid rows are skipped.
+        """
+        if not is_house_member(request.user, house_id):
+            if not House.objects.filter(pk=house_id).exists():
+                return Response({'error': 'House not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'error': 'Access denied: You are not a member of this house'}, status=status.HTTP_403_FORBIDDEN)
+
+        default_format = 'csv' if request.content_type.startswith('text/csv') else 'ndjson'
+        import_format = request.query_params.get('import_format', default_format)
+        if import_format not in importing.FORMATS:
+            return Response({'error': 'Invalid import_format'}, status=status.HTTP_400_BAD_REQUEST)
+        # Flux brut de la requête : request.data chargerait tout le corps
+        if request.stream is None:
+            return Response({'error': 'Empty body'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        importer = importing.MadeTaskImporter(House.objects.get(pk=house_id), request.user)
+        report = importer.run(importing.read_rows(request.stream, import_format), dry_run=dry_run)
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+class HouseStatsView(APIView):
+    """
+    API endpoint returning aggregated statistics of the made tasks of a house over a period:
+    count, total score and total duration, grouped by user, possible task and/or day, week or month.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @method_decorator(condition(etag_func=lambda request, house_id: house_etag(request, house_id)))
+    def get(self, request, house_id):
+        """
+        Handle GET request to retrieve the statistics of a house.
+
+        :param request: The HTTP request object, with ``start_date`` and ``end_date`` (datetimes, or
+            dates for whole days) and ``group_by``, a comma separated list among ``user``,
+            ``possible_task``, ``day``, ``week`` and ``month``.
+        :param house_id: The ID of the house.
+        :return: A JSON response with one row of totals per group.
+
+        Totals are computed by the database (GROUP BY), from the daily rollups for whole days.
+        """
+        if not is_house_member(request.user, house_id):
+            if not House.objects.filter(pk=house_id).exists():
+                return Response({'error': 'House not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'error': 'Access denied: You are not a member of this house'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            start = _parse_period_bound(request.query_params.get('start_date'))
+            end = _parse_period_bound(request.query_params.get('end_date'), end_of_day=True)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not (start and end):
+            return Response({'error': 'Missing or invalid start_date/end_date'}, status=status.HTTP_400_BAD_REQUEST)
+
+        group_by = [name for name in request.query_params.get('group_by', '').split(',') if name]
+        if any(name not in HouseworkDailyRollup.GROUPS for name in group_by) or len(set(group_by)) != len(group_by):
+            return Response({'error': 'Invalid group_by'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'house': house_id,
+            'start_date': start,
+            'end_date': end,
+            'group_by': group_by,
+            'results': HouseworkDailyRollup.totals(house_id, start, end, group_by),
+        })
+
+
+def _parse_period_bound(value, end_of_day=False):
+    """
+    Parse a period bound given as a datetime or as a date.
+
+    A date stands for the start of that day, or its last instant when ``end_of_day`` is set.
+    """
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is not None:
+        moment = datetime.datetime.combine(day, datetime.time.max if end_of_day else datetime.time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            return None
+    return moment if timezone.is_aware(moment) else timezone.make_aware(moment)